@@ -0,0 +1,103 @@
+"""Synthetic git repository fleet.
+
+Repositories are written straight to disk, without running git, so large fleets
+are generated in seconds. Only what `pm` reads is created: `HEAD`, `config`,
+loose and packed refs, `objects/` and worktree metadata.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@dataclass
+class FleetSpec:
+    """Synthetic fleet definition.
+
+    Attributes:
+        n_projects: int, number of managed projects
+        n_non_managed: int, number of plain, non-managed dirs
+        bare_ratio: float, share of bare repos
+        n_branches: int, local branches per repo
+        n_remotes: int, remotes per repo
+        n_remote_branches: int, branches per remote
+        n_worktrees: int, worktrees per bare repo
+    """
+
+    n_projects: int = 10
+    n_non_managed: int = 0
+    bare_ratio: float = 0.5
+    n_branches: int = 5
+    n_remotes: int = 1
+    n_remote_branches: int = 20
+    n_worktrees: int = 2
+
+
+def _write(path: Path, content: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def make_repo(path: Path, spec: FleetSpec, bare: bool) -> None:
+    """Write a synthetic repository at path."""
+    git_dir = path if bare else path / ".git"
+    branches = ["main"] + [f"feature/b{i}" for i in range(1, spec.n_branches)]
+
+    _write(git_dir / "HEAD", "ref: refs/heads/main\n")
+    _write(git_dir / "config", f"[core]\n\tbare = {str(bare).lower()}\n")
+    (git_dir / "objects").mkdir(parents=True, exist_ok=True)
+    # half of the branches loose, half packed
+    packed = [f"{SHA} refs/heads/{b}" for b in branches[len(branches) // 2 :]]
+    for branch in branches[: len(branches) // 2]:
+        _write(git_dir / "refs" / "heads" / branch, f"{SHA}\n")
+    for r in range(spec.n_remotes):
+        remote = "origin" if r == 0 else f"remote{r}"
+        packed.extend(f"{SHA} refs/remotes/{remote}/r{i}" for i in range(spec.n_remote_branches))
+    (git_dir / "refs" / "heads").mkdir(parents=True, exist_ok=True)
+    _write(
+        git_dir / "packed-refs",
+        "# pack-refs with: peeled fully-peeled sorted\n" + "\n".join(sorted(packed)) + "\n",
+    )
+    if not bare:
+        return
+    for branch in branches[: spec.n_worktrees]:
+        name = branch.replace("/", "-")
+        worktree = path / branch
+        admin_dir = git_dir / "worktrees" / name
+        _write(worktree / ".git", f"gitdir: {admin_dir}\n")
+        _write(admin_dir / "gitdir", f"{worktree / '.git'}\n")
+        _write(admin_dir / "HEAD", f"ref: refs/heads/{branch}\n")
+        _write(admin_dir / "commondir", "../..\n")
+
+
+def age_fleet(projects_dir: Path, seconds: int = 60) -> None:
+    """Move the mtimes of the fleet back by seconds.
+
+    `pm` does not cache dirs and refs modified within the last seconds, see
+    `caches.RACY_NS`, so a fleet written just now would never be read warm.
+    """
+    delta = seconds * 10**9
+    for dir_path, dir_names, file_names in os.walk(projects_dir, topdown=False):
+        for name in [*file_names, *dir_names, ""]:
+            path = os.path.join(dir_path, name) if name else dir_path
+            mtime = os.lstat(path).st_mtime_ns - delta
+            os.utime(path, ns=(mtime, mtime), follow_symlinks=False)
+
+
+def make_fleet(projects_dir: Path, spec: FleetSpec) -> list[str]:
+    """Write a synthetic fleet in projects_dir.
+
+    Returns:
+        The names of the managed projects
+    """
+    names = []
+    n_bare = int(spec.n_projects * spec.bare_ratio)
+    for i in range(spec.n_projects):
+        name = f"proj{i:05}"
+        make_repo(projects_dir / name, spec, bare=i < n_bare)
+        names.append(name)
+    for i in range(spec.n_non_managed):
+        os.makedirs(projects_dir / f"dir{i:05}", exist_ok=True)
+    return names
@@ -0,0 +1,273 @@
+"""Startup and listing benchmarks.
+
+Generates synthetic fleets, times the listing path and saves the results as JSON.
+Every benchmark also records `peak_rss_mb`, the peak resident set size, not on
+Windows. For the `process_*` benchmarks it is the peak of the child process, for
+the others the peak of the benchmark process so far, so it only grows with the
+benchmarks run before.
+
+Usage:
+    python -m benchmarks.run [--sizes 10 100 1000] [--repeat 5] [--output FILE]
+                             [--compare BASELINE_FILE] [--threshold 1.25]
+
+`pm` reads its home dir at import, so the benchmarks run with `HOME` pointing
+to a temporary dir and import `pm` only after setting it.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.fleet import FleetSpec, age_fleet, make_fleet
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_OUTPUT = ROOT_DIR / "build" / "benchmarks" / "results.json"
+
+Stats = dict[str, float]
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB, None on Windows.
+
+    On Linux, read from `VmHWM`, as `ru_maxrss` keeps the peak of the parent
+    process through fork and exec.
+    """
+    if sys.platform == "win32":
+        return None
+    with contextlib.suppress(OSError), open("/proc/self/status", encoding="ascii") as fp:
+        for line in fp:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Callable[[], Any] | None = None) -> Stats:
+    """Time fn, calling setup before each run, and return the stats in ms."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    stats = {
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.fmean(times),
+    }
+    if (rss := peak_rss_mb()) is not None:
+        stats["peak_rss_mb"] = rss
+    return stats
+
+
+# runs code in a new process and writes its peak resident set size to stderr
+_CHILD = """{code}
+import sys
+from benchmarks.run import peak_rss_mb
+if (rss := peak_rss_mb()) is not None:
+    print(rss, file=sys.stderr)
+"""
+
+
+def measure_process(
+    code: str, env: dict[str, str], repeat: int, setup: Callable[[], Any] | None = None
+) -> Stats:
+    """Time code run in a new process, like `measure`, with the peak RSS of the process."""
+    args = [sys.executable, "-c", _CHILD.format(code=code)]
+    peaks: list[float] = []
+
+    def run() -> None:
+        proc = subprocess.run(args, env=env, check=True, capture_output=True, text=True)
+        if lines := proc.stderr.splitlines():
+            peaks.append(float(lines[-1]))
+
+    stats = measure(run, repeat, setup=setup)
+    if peaks:
+        stats["peak_rss_mb"] = max(peaks)
+    return stats
+
+
+def _setup_home(home: Path) -> Path:
+    os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+    projects_dir = home / "projects"
+    os.environ["PROJECTS_DIR"] = str(projects_dir)
+    return projects_dir
+
+
+# cache attribute of `pm.caches` to its file
+_CACHES = {
+    "git_cache": "GIT_CACHE_FILE",
+    "dirs_cache": "DIRS_CACHE_FILE",
+    "local_configs_cache": "LOCAL_CONFIGS_FILE",
+}
+
+
+def _reset(projects_dir: Path) -> None:
+    from pm import config, const
+
+    shutil.rmtree(const.PM_DIR, ignore_errors=True)
+    shutil.rmtree(projects_dir, ignore_errors=True)
+    projects_dir.mkdir(parents=True)
+    config.get_config.cache_clear()
+    config.get_projects_dir.cache_clear()
+    _warm_caches()
+
+
+def _cold_caches() -> None:
+    from pm import caches, snapshot
+
+    for file_attr in _CACHES.values():
+        getattr(caches, file_attr).unlink(missing_ok=True)
+    snapshot.SNAPSHOT_FILE.unlink(missing_ok=True)
+    _warm_caches()
+
+
+def _warm_caches() -> None:
+    """Reload the caches from disk, as a new process would."""
+    from pm import caches, proj_manager
+
+    for cache_attr, file_attr in _CACHES.items():
+        version = getattr(caches, cache_attr).version
+        setattr(caches, cache_attr, caches.FileCache(getattr(caches, file_attr), version))
+    proj_manager.get_proj_manager.cache_clear()
+
+
+def run_size(n: int, projects_dir: Path, repeat: int) -> dict[str, Stats]:
+    """Run the benchmarks for a fleet of n projects."""
+    from pm import cli, config, db, printer, proj_manager
+
+    _reset(projects_dir)
+    config.create_config()
+    db.create_db()
+    names = make_fleet(projects_dir, FleetSpec(n_projects=n, n_non_managed=n // 2))
+    for name in names:
+        db.add_record(record=(name, None, None, "", ""))
+    age_fleet(projects_dir)
+
+    results: dict[str, Stats] = {}
+    results["read_managed_cold"] = measure(
+        lambda: asyncio.run(proj_manager.read_managed()), repeat, setup=_cold_caches
+    )
+    results["read_managed_warm"] = measure(
+        lambda: asyncio.run(proj_manager.read_managed()), repeat, setup=_warm_caches
+    )
+    managed = asyncio.run(proj_manager.read_managed())
+    results["read_non_managed"] = measure(
+        lambda: asyncio.run(proj_manager.read_non_managed(managed)), repeat
+    )
+
+    def render() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            printer.print_table(printer.projects_to_table(projects=managed))
+
+    results["render_table"] = measure(render, repeat)
+    opened = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results["db_update_record"] = measure(
+        lambda: db.update_record(record=(names[-1], None, None, opened, "main")), repeat
+    )
+
+    def app_ls() -> None:
+        sys.argv = ["pm", "ls"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.app()
+
+    results["app_ls_warm"] = measure(app_ls, repeat, setup=_warm_caches)
+
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR)}
+    read_managed = (
+        "import asyncio; from pm import proj_manager; asyncio.run(proj_manager.read_managed())"
+    )
+    results["process_read_managed_cold"] = measure_process(
+        read_managed, env, repeat, setup=_cold_caches
+    )
+    results["process_read_managed_warm"] = measure_process(read_managed, env, repeat)
+    ls = "import sys; sys.argv = ['pm', 'ls']; from pm import cli; cli.app()"
+    results["process_ls_warm"] = measure_process(ls, env, repeat)
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Compare median times with a baseline.
+
+    Returns:
+        Descriptions of the benchmarks slower than threshold times the baseline
+    """
+    regressions = []
+    for size, benchmarks in results["results"].items():
+        for name, stats in benchmarks.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = stats["median_ms"] / max(base["median_ms"], 1e-6)
+            if ratio > threshold:
+                regressions.append(
+                    f"{name}[{size}]: {base['median_ms']:.2f} -> {stats['median_ms']:.2f} ms"
+                    f" ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="Baseline results file")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="pm-bench-") as tmp:
+        projects_dir = _setup_home(Path(tmp))
+        import pm
+
+        results: dict[str, Any] = {
+            "meta": {
+                "version": pm.__version__,
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": {},
+        }
+        for n in args.sizes:
+            print(f"Running {n} projects...", file=sys.stderr)
+            results["results"][str(n)] = run_size(n, projects_dir, args.repeat)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    for size, benchmarks in results["results"].items():
+        for name, stats in benchmarks.items():
+            rss = f"{stats['peak_rss_mb']:>10.1f} MB" if "peak_rss_mb" in stats else ""
+            print(f"{size:>6} {name:<26} {stats['median_ms']:>10.2f} ms{rss}")
+    print(f"Saved {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if regressions := compare(results, baseline, args.threshold):
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,9 @@
 import logging
 import os
+import time
+
+# start of the `pm` import, for `pm --profile`
+START_TIME = time.perf_counter()
 
 # https://peps.python.org/pep-0440/
 # [N!]N(.N)*[{a|b|rc}N][.postN][.devN]
@@ -14,6 +18,3 @@ def setup_logging() -> None:
     logger = logging.getLogger("pm")
     logger.setLevel(lvl)
     logging.getLogger("git.repo.base").setLevel("ERROR")
-
-
-setup_logging()
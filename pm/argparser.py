@@ -28,7 +28,6 @@ def parse(argv: StrList) -> Cmd:
         - perform `ls` command, if not a repo
 
     """
-    MAX_POSITIONAL_ARGS = 4
     app_flag_names = commands.get_app_flag_names()
 
     # Call without arguments == `ls` command
@@ -63,7 +62,8 @@ def parse(argv: StrList) -> Cmd:
             cmd = commands.create_cmd(arg)
         else:
             positional.append(arg)
-            if len(positional) > MAX_POSITIONAL_ARGS:
+            max_positional = cmd.max_positional if cmd else Cmd.max_positional
+            if max_positional is not None and len(positional) > max_positional:
                 raise ValueError(f"Too many positional arguments{SEE_HELP}")
         ndx += 1
     if not cmd:
@@ -73,6 +73,24 @@ def parse(argv: StrList) -> Cmd:
     return cmd
 
 
+def parse_profile(argv: StrList) -> tuple[StrList, bool, str]:
+    """Strip the `--profile[=FILE]` app option, given anywhere in argv.
+
+    Returns:
+        A tuple of the remaining argv, if profiling and the trace file, if any
+    """
+    rest: StrList = []
+    profile, trace_file = False, ""
+    for arg in argv:
+        if arg == "--profile":
+            profile = True
+        elif arg.startswith("--profile="):
+            profile, trace_file = True, arg.partition("=")[2]
+        else:
+            rest.append(arg)
+    return rest, profile, trace_file
+
+
 def parse_flag(flag: Flag, argv: StrList, ndx: int) -> int:
     """Consume flag based on flag definition."""
     if isinstance(flag.val, bool):
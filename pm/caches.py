@@ -0,0 +1,233 @@
+"""Persistent caches stored in the `pm` home dir."""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from pm import const, git_refs
+from pm.models import Git, Worktree
+from pm.typedef import AnyDict
+
+logger = logging.getLogger("pm")
+
+GIT_CACHE_FILE = Path(const.PM_DIR / "git-cache.json")
+DIRS_CACHE_FILE = Path(const.PM_DIR / "dirs-cache.json")
+LOCAL_CONFIGS_FILE = Path(const.PM_DIR / "local-configs.json")
+
+Signature = list[int]
+
+# files and dirs modified more recently than this may change unnoticed, within
+# the mtime granularity, they are read, but not cached
+RACY_NS = 2 * 10**9
+
+
+class FileCache:
+    """JSON file cache, loaded on first use and saved atomically.
+
+    Each entry is stored together with a signature. An entry is valid
+    only while its stored signature equals the one computed by the caller.
+    """
+
+    def __init__(self, path: Path, version: int) -> None:
+        self.path = path
+        self.version = version
+        self._entries: AnyDict | None = None
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def _load(self) -> AnyDict:
+        with self._lock:
+            if self._entries is not None:
+                return self._entries
+            self._entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as fp:
+                    data = json.load(fp)
+                if data.get("version") == self.version:
+                    self._entries = dict(data["entries"])
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.debug(f"Ignoring invalid cache {self.path}: {e}")
+            return self._entries
+
+    def get(self, key: str, signature: Signature) -> Any:
+        """Returns the cached data for key or None, if missing or outdated."""
+        entry = self._load().get(key)
+        if not entry or entry["sig"] != signature:
+            return None
+        return entry["data"]
+
+    def peek(self, key: str) -> Any:
+        """Returns the cached data for key or None, without validating it."""
+        entry = self._load().get(key)
+        return entry["data"] if entry else None
+
+    def put(self, key: str, signature: Signature, data: Any) -> None:
+        """Store data for key."""
+        entry = {"sig": signature, "data": data}
+        with self._lock:
+            entries = self._load()
+            if entries.get(key) != entry:
+                entries[key] = entry
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache file, if there are changes."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            if not self.path.parent.is_dir():
+                return
+            tmp_file = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_file, "w", encoding="utf-8") as fp:
+                    json.dump(
+                        {"version": self.version, "entries": self._entries},
+                        fp,
+                        separators=(",", ":"),
+                    )
+                os.replace(tmp_file, self.path)
+            except OSError as e:
+                logger.warning(f"Failed to write cache {self.path}: {e}")
+                tmp_file.unlink(missing_ok=True)
+                return
+            self._dirty = False
+
+
+git_cache = FileCache(GIT_CACHE_FILE, version=3)
+dirs_cache = FileCache(DIRS_CACHE_FILE, version=2)
+local_configs_cache = FileCache(LOCAL_CONFIGS_FILE, version=1)
+
+
+def _mtime(path: str | Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _dir_mtimes(path: str, signature: Signature) -> None:
+    """Append the mtimes of path and of every dir under it, in name order."""
+    try:
+        signature.append(os.stat(path).st_mtime_ns)
+        with os.scandir(path) as entries:
+            sub_dirs = sorted(e.path for e in entries if e.is_dir(follow_symlinks=False))
+    except OSError:
+        return
+    for sub_dir in sub_dirs:
+        _dir_mtimes(sub_dir, signature)
+
+
+def git_signature(git_dir: Path, remote_filter: git_refs.RemoteFilter | None = None) -> Signature:
+    """Signature of the repository refs state.
+
+    Made of the mtimes of `HEAD`, `packed-refs` and every dir of `worktrees/` and
+    `refs/`. Git updates refs and worktree HEADs with a lock file and a rename,
+    so any change updates the mtime of the directory that holds it.
+    The signature of remote_filter, if given, is appended, as it shapes the Git model.
+    """
+    common_dir = os.fspath(git_refs.find_common_dir(git_dir))
+    signature = [_mtime(os.path.join(git_dir, "HEAD"))]
+    signature.append(_mtime(os.path.join(common_dir, "packed-refs")))
+    for sub_dir in ("worktrees", "refs"):
+        _dir_mtimes(os.path.join(common_dir, sub_dir), signature)
+    if remote_filter:
+        signature.extend(remote_filter.signature())
+    return signature
+
+
+def _git_from_dict(data: AnyDict) -> Git:
+    worktree_details = [Worktree(**wt) for wt in data.get("worktree_details", [])]
+    return Git(
+        **{
+            **data,
+            "active_branch": sys.intern(data["active_branch"]),
+            "branches": git_refs.intern_names(data["branches"]),
+            "remote_branches": git_refs.intern_names(data["remote_branches"]),
+            "worktrees": git_refs.intern_names(data["worktrees"]),
+            "worktree_details": worktree_details,
+        }
+    )
+
+
+def get_git(proj_path: Path, signature: Signature) -> Git | None:
+    """Returns the cached Git model for a project or None."""
+    data = git_cache.get(str(proj_path), signature)
+    if data is None:
+        return None
+    return _git_from_dict(data)
+
+
+def peek_git(proj_path: Path) -> Git | None:
+    """Returns the last cached Git model for a project, even if outdated, or None."""
+    data = git_cache.peek(str(proj_path))
+    if data is None:
+        return None
+    return _git_from_dict(data)
+
+
+def is_racy(signature: Signature) -> bool:
+    """Checks if the newest mtime of a signature is within the racy window."""
+    return time.time_ns() - max(signature, default=0) <= RACY_NS
+
+
+def put_git(proj_path: Path, signature: Signature, git: Git) -> None:
+    """Cache the Git model for a project, unless its refs were modified just now.
+
+    The remote filter signature, a crc32, is far below any mtime in ns, so the
+    newest value of the signature is its newest mtime.
+    """
+    if not is_racy(signature):
+        git_cache.put(str(proj_path), signature, asdict(git))
+
+
+def store_git(proj_path: Path, git: Git, remote_filter: git_refs.RemoteFilter) -> None:
+    """Cache the Git model for a project with its current signature."""
+    if git_dir := git_refs.find_git_dir(proj_path):
+        put_git(proj_path, git_signature(git_dir, remote_filter), git)
+
+
+def local_config_signature(config_file: str | Path) -> Signature | None:
+    """Signature of a local config file, its mtime and size, or None if missing."""
+    try:
+        st = os.stat(config_file)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def get_local_config(config_file: Path, signature: Signature) -> AnyDict | None:
+    """Returns the cached content of a local config file or None."""
+    data = local_configs_cache.get(str(config_file), signature)
+    return None if data is None else dict(data)
+
+
+def peek_local_config(config_file: Path) -> AnyDict:
+    """Returns the last cached content of a local config file, even if outdated."""
+    return dict(local_configs_cache.peek(str(config_file)) or {})
+
+
+def put_local_config(config_file: Path, signature: Signature, data: AnyDict) -> None:
+    """Cache the content of a local config file, unless modified just now."""
+    if not is_racy(signature[:1]):
+        local_configs_cache.put(str(config_file), signature, data)
+
+
+def store_local_config(config_file: Path, data: AnyDict) -> None:
+    """Cache the content of a local config file with its current signature."""
+    if signature := local_config_signature(config_file):
+        put_local_config(config_file, signature, data)
+
+
+def save() -> None:
+    """Save all caches."""
+    git_cache.save()
+    dirs_cache.save()
+    local_configs_cache.save()
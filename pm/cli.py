@@ -2,8 +2,12 @@
 
 import logging
 import sys
+import time
 
-from pm import argparser, const
+import pm
+from pm import argparser, const, profiling, setup_logging
+from pm.models import Cmd
+from pm.typedef import StrList
 
 logger = logging.getLogger("pm")
 
@@ -15,14 +19,51 @@ def die(msg: str | None) -> None:
     raise SystemExit
 
 
+def run_in_daemon(cmd: Cmd, argv: StrList) -> bool:
+    """Run `ls` in the daemon, if it is running.
+
+    `ls PROJECT WORKTREE` runs `ls` in a child process, its output cannot
+    be captured by the daemon, so it always runs in process.
+
+    Returns:
+        False, if the command must run in process
+    """
+    if cmd.name != "ls" or len(cmd.positional) > 1:
+        return False
+    if not (const.PM_DIR / const.DAEMON_SOCKET_NAME).exists():
+        return False
+    from pm import daemon
+
+    try:
+        with profiling.span("daemon request"):
+            out = daemon.run_ls(argv)
+    except daemon.DaemonUnavailableError as e:
+        logger.debug(f"Running in process, {e}")
+        return False
+    sys.stdout.write(out)
+    return True
+
+
 def app() -> None:
     """Application entry point."""
+    setup_logging()
+    argv, profile, trace_file = argparser.parse_profile(sys.argv[1:])
+    if profile:
+        profiling.enable()
+        profiling.add_span("import", profiling.PHASE, pm.START_TIME, time.perf_counter())
     try:
-        cmd = argparser.parse(sys.argv[1:])
+        cmd = argparser.parse(argv)
+        if run_in_daemon(cmd, argv):
+            return
         logger.debug(f"Running {cmd.name}")
         cmd.run()
     except Exception as e:
         die(e.args[0])
+    finally:
+        if profile:
+            profiling.print_summary()
+            if trace_file:
+                profiling.write_trace(trace_file)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,22 @@
 """Commands module."""
 
-import asyncio
+import copy
+import dataclasses
 import logging
 import os
-import subprocess
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from pm import config, const, db, printer, utils
+from pm import complete, config, const, db, profiling, utils
 from pm.models import Cmd, Flag, Proj, TCmd, Usage
-from pm.proj_manager import ProjManager, add_new_proj, get_proj_manager, open_and_update
+
+if TYPE_CHECKING:
+    from pm.proj_manager import ProjManager
+
+# Modules like `asyncio`, `subprocess`, `pm.printer` and `pm.proj_manager` (GitPython)
+# are imported by the commands that use them, to keep `pm -h`, `pm -V` and `pm init` fast.
 
 logger = logging.getLogger("pm")
 
@@ -18,6 +24,21 @@ logger = logging.getLogger("pm")
 cmd_help_flag = Flag(name="h/help", usage=Usage("Show help on this command"))
 
 
+def find_proj(name: str) -> Proj | None:
+    """Find project by name, through the daemon if it is running."""
+    if (const.PM_DIR / const.DAEMON_SOCKET_NAME).exists():
+        from pm import daemon
+
+        try:
+            return daemon.find_proj(name)
+        except daemon.DaemonUnavailableError as e:
+            logger.debug(f"Finding {name} in process, {e}")
+
+    from pm.proj_manager import get_proj_manager
+
+    return get_proj_manager().find_proj(name)
+
+
 class Ls(Cmd):
     """Handler for the ls command."""
 
@@ -40,6 +61,14 @@ class Ls(Cmd):
                 ],
             ),
         ),
+        Flag(
+            name="s/stream",
+            val=False,
+            usage=Usage(
+                header="Print projects as they are read",
+                description=["Column widths are estimated from the last listing"],
+            ),
+        ),
     ]
 
     usage = Usage(
@@ -49,13 +78,15 @@ class Ls(Cmd):
             ("PROJECT", ["Optional project name"]),
             ("WORKTREE", ["Optional worktree or folder name"]),
         ],
-        short="List projects / project worktrees [-ar]",
+        short="List projects / project worktrees [-ars]",
     )
+    positional_kinds = [complete.PROJECT, complete.WORKTREE]
 
     def __init__(self) -> None:
         """Constructor."""
         self.all_flag = False
         self.recent = False
+        self.stream = False
         self.proj_name = ""
         self.worktree = ""
 
@@ -65,9 +96,13 @@ class Ls(Cmd):
                 self.all_flag = bool(flag.val)
             if flag.name == "r/recent":
                 self.recent = bool(flag.val)
+            if flag.name == "s/stream":
+                self.stream = bool(flag.val)
 
     def _ls_worktree(self, proj: Proj) -> None:
         """Run ls in a worktree of a project."""
+        import subprocess
+
         path = Path(proj.path) / proj.name / self.worktree
         if not path.is_dir():
             raise FileNotFoundError(f"Failed to find {self.worktree} in {self.proj_name}")
@@ -84,36 +119,57 @@ class Ls(Cmd):
 
     def _ls_proj(self, proj: Proj) -> None:
         """Run ls in a project."""
-        if proj.git:
-            if proj.recent_branch and proj.recent_branch in proj.git.branches:
-                ndx = proj.git.branches.index(proj.recent_branch)
-                if ndx > 0:
-                    proj.git.branches.insert(0, proj.git.branches.pop(ndx))
+        from pm import printer
 
-            if not self.all_flag:
-                proj.git.remote_branches.clear()
-        printer.print_project(proj=proj)
+        if proj.git and proj.recent_branch and proj.recent_branch in proj.git.branches:
+            # projects may be shared, e.g. by the daemon, reorder a copy
+            branches = [b for b in proj.git.branches if b != proj.recent_branch]
+            git = dataclasses.replace(proj.git, branches=[proj.recent_branch] + branches)
+            proj = dataclasses.replace(proj, git=git)
+        printer.print_project(proj=proj, remotes=self.all_flag)
 
-    def _ls_projects(self, proj_mgr: ProjManager) -> None:
+    def _ls_projects(self, proj_mgr: "ProjManager") -> None:
         """List all projects."""
+        from pm import printer
+
+        if self.stream:
+            self._ls_projects_stream(proj_mgr=proj_mgr)
+            return
         projects = proj_mgr.get_managed()
-        if not self.all_flag:
-            for _, proj in projects.items():
-                if proj.git:
-                    proj.git.remote_branches.clear()
         if self.recent:
             projects = dict(sorted(projects.items(), key=lambda item: item[1].last_opened))
-        print("> Projects:")
-        table = printer.projects_to_table(projects=projects)
-        printer.print_table(table=table)
+        with profiling.span("render"):
+            print("> Projects:")
+            table = printer.projects_to_table(projects=projects, remotes=self.all_flag)
+            printer.print_table(table=table)
+
+    def _ls_projects_stream(self, proj_mgr: "ProjManager") -> None:
+        """List all projects, printing each project as soon as it is read."""
+        from pm import printer
+
+        estimate = printer.projects_to_table(
+            projects={proj.name: proj for proj in proj_mgr.peek_managed()},
+            remotes=self.all_flag,
+        )
+        print("> Projects:", flush=True)
+        table = printer.stream_projects_table(
+            projects=proj_mgr.iter_managed(recent=self.recent),
+            widths=estimate.widths,
+            remotes=self.all_flag,
+        )
+        printer.print_table_stream(table=table)
 
-    def _ls_non_managed(self, proj_mgr: ProjManager) -> None:
+    def _ls_non_managed(self, proj_mgr: "ProjManager") -> None:
         """List non-managed projects."""
+        from pm import printer
+
         if non_managed := proj_mgr.get_non_managed():
             printer.print_non_managed(config.dirs(), non_managed)
 
     def run(self) -> None:
         """Run ls command."""
+        from pm.proj_manager import get_proj_manager
+
         if self.positional:
             utils.set_positional(self, self.positional, ["proj_name", "worktree"])
         self._set_flags()
@@ -146,6 +202,7 @@ class Cd(Cmd):
         ],
         short="Navigate to project",
     )
+    positional_kinds = [complete.PROJECT, complete.WORKTREE]
 
     def __init__(self) -> None:
         self.proj_name = ""
@@ -158,18 +215,13 @@ class Cd(Cmd):
         utils.set_positional(self, self.positional, ["proj_name", "worktree"])
         proj_name, wt = self.proj_name, self.worktree
 
-        proj_mgr = get_proj_manager()
-        projects = proj_mgr.get_managed()
-
         if config.PLATFORM != config.WINDOWS:
             print(f"Command not supported on '{config.PLATFORM}'")
             return
 
-        for _, proj in projects.items():
-            if proj.short == proj_name or proj.name == proj_name:
-                break
-        else:
-            raise ValueError(f"Cannot find project {proj}")
+        proj = find_proj(proj_name)
+        if not proj:
+            raise ValueError(f"Cannot find project {proj_name}")
 
         path = Path(proj.path) / proj.name
         if wt:
@@ -190,19 +242,41 @@ class Open(Cmd):
         ],
         short="Open project",
     )
+    positional_kinds = [complete.PROJECT, complete.WORKTREE]
+
+    flags = [
+        Flag(
+            name="d/detach",
+            val=False,
+            usage=Usage(
+                header="Start the editor and return, without waiting for it",
+                description=["Default with `detach_editor = true` in the config"],
+            ),
+        ),
+    ]
 
     def __init__(self) -> None:
         self.proj_name = ""
         self.worktree = ""
+        self.detach = False
+
+    def _set_flags(self) -> None:
+        for flag in self.flags:
+            if flag.name == "d/detach":
+                self.detach = bool(flag.val)
 
     def run(self) -> None:
         """Run open command."""
+        import asyncio
+
+        from pm.proj_manager import open_and_update, open_detached
+
         utils.check_npositional(self.positional, mn=1, mx=2)
         utils.set_positional(self, self.positional, ["proj_name", "worktree"])
+        self._set_flags()
         proj_name, wt = self.proj_name, self.worktree
 
-        proj_mgr = get_proj_manager()
-        proj = proj_mgr.find_proj(proj_name)
+        proj = find_proj(proj_name)
         if not proj:
             raise ValueError(f"Could not find project `{proj_name}`")
         path = utils.get_proj_path(config_path=proj.path, proj_name=proj.name, worktree=wt)
@@ -210,7 +284,10 @@ class Open(Cmd):
         if wt:
             proj.recent_branch = wt
         proj.last_opened = datetime.now()
-        asyncio.run(open_and_update(path, proj), debug=True)
+        if self.detach or config.detach_editor():
+            open_detached(path, proj)
+        else:
+            asyncio.run(open_and_update(path, proj), debug=True)
 
 
 class Add(Cmd):
@@ -218,30 +295,70 @@ class Add(Cmd):
 
     name = "add"
     usage = Usage(
-        header=f"{name} PROJECT [-s SHORT_NAME]",
-        description=["Add managed project"],
+        header=f"{name} PROJECT... [-s SHORT_NAME]",
+        description=[
+            "Add managed projects",
+            "Many paths or glob patterns add the projects in one batch and report the",
+            "conflicting ones, SHORT_NAME applies only to a single project.",
+        ],
         positional=[
             ("PROJECT", ["Project path, also used as project name.", "`.` uses current dir."]),
         ],
-        short="Add managed project",
+        short="Add managed projects",
     )
+    max_positional = None
+    positional_kinds = [complete.DIR]
 
     flags = [
         Flag(name="s/short", val="", usage=Usage(header="", arg="SHORT_NAME")),
     ]
 
     def __init__(self) -> None:
-        self.proj_name: str = ""
         self.short_name: str = ""
 
-    def _check_config(self) -> None:
-        proj_mgr = get_proj_manager()
-        projects = proj_mgr.get_managed()
-        for name, project in projects.items():
-            if project.name == self.proj_name:
-                raise FileExistsError(f"Project '{name}' already exists")
-            if project.short == self.short_name:
-                raise NameError(f"Short name '{self.short_name}' already exists")
+    @staticmethod
+    def _expand(paths: list[str]) -> list[str]:
+        """Expand the glob patterns in paths to the dirs they match."""
+        import glob
+
+        expanded = []
+        for path in paths:
+            path = os.path.expanduser(path)
+            if glob.has_magic(path):
+                expanded.extend(sorted(p for p in glob.glob(path) if os.path.isdir(p)))
+            else:
+                expanded.append(path)
+        return expanded
+
+    def _check_config(
+        self, proj_mgr: "ProjManager", paths: list[str]
+    ) -> tuple[list[tuple[str, str, str]], list[Exception]]:
+        """Validate paths against the project names index and each other.
+
+        Returns:
+            A tuple of the (name, short, path) of the projects to add and the conflicts
+        """
+        index = proj_mgr.index
+        projs: list[tuple[str, str, str]] = []
+        conflicts: list[Exception] = []
+        names: set[str] = set()
+        shorts: set[str] = set()
+        for path in paths:
+            try:
+                name, parent = utils.path_name_and_parent(path)
+            except FileNotFoundError as e:
+                conflicts.append(e)
+                continue
+            short = self.short_name or name
+            if name in index.by_name or name in names:
+                conflicts.append(FileExistsError(f"Project '{name}' already exists"))
+            elif short in index.by_short or short in shorts:
+                conflicts.append(NameError(f"Short name '{short}' already exists"))
+            else:
+                names.add(name)
+                shorts.add(short)
+                projs.append((name, short, parent))
+        return projs, conflicts
 
     def _set_flags(self) -> None:
         for flag in self.flags:
@@ -250,16 +367,29 @@ class Add(Cmd):
 
     def run(self) -> None:
         """Run add command."""
+        from pm.proj_manager import get_proj_manager
+
         config.get_config()
-        utils.check_npositional(self.positional, mn=1, mx=1)
-        utils.set_positional(self, self.positional, ["proj_name"])
+        utils.check_npositional(self.positional, mn=1)
         self._set_flags()
-        self.proj_name, parent = utils.path_name_and_parent(self.proj_name)
+        paths = self._expand(self.positional)
+        if not paths:
+            raise FileNotFoundError(f"No project dirs match {' '.join(self.positional)}")
+        if self.short_name and len(paths) > 1:
+            raise ValueError(f"SHORT_NAME needs a single project{const.SEE_HELP}")
+
+        proj_mgr = get_proj_manager()
+        projs, conflicts = self._check_config(proj_mgr, paths)
+        if len(paths) == 1 and conflicts:
+            raise conflicts[0]
+        if projs:
+            proj_mgr.add_projs(projs)
+        if len(paths) > 1:
+            from pm import printer
 
-        if not self.short_name:
-            self.short_name = self.proj_name
-        self._check_config()
-        add_new_proj(name=self.proj_name, short=self.short_name, path=parent)
+            printer.print_add_report(
+                [name for name, _, _ in projs], [e.args[0] for e in conflicts]
+            )
 
 
 class Init(Cmd):
@@ -278,6 +408,78 @@ class Init(Cmd):
         db.create_db()
 
 
+class Daemon(Cmd):
+    """Handler for the daemon command."""
+
+    name = "daemon"
+    actions = ["start", "stop", "status", "run"]
+    usage = Usage(
+        header=f"{name} [start|stop|status|run]",
+        description=[
+            "Manage the pm daemon, keeps projects in memory and serves `ls` and lookups.",
+            "`pm` uses the daemon when it is running, otherwise runs in process.",
+        ],
+        positional=[
+            ("ACTION", ["start (default), stop, status", "or run, to serve in the foreground"]),
+        ],
+        short="Manage the pm daemon",
+    )
+    positional_kinds = [actions]
+
+    def __init__(self) -> None:
+        self.action = "start"
+
+    def run(self) -> None:
+        """Run daemon command."""
+        from pm import daemon
+
+        utils.check_npositional(self.positional, mx=1)
+        utils.set_positional(self, self.positional, ["action"])
+        if self.action not in self.actions:
+            raise ValueError(f"Invalid daemon action `{self.action}`{const.SEE_HELP}")
+        config.get_config()
+        action = {
+            "start": daemon.start,
+            "stop": daemon.stop,
+            "status": daemon.status,
+            "run": daemon.serve,
+        }[self.action]
+        action()
+
+
+class Completion(Cmd):
+    """Handler for the completion command."""
+
+    name = "completion"
+    shells = ["bash", "zsh", "fish"]
+    usage = Usage(
+        header=f"{name} SHELL",
+        description=[
+            "Print the shell completion script and update the completion index.",
+            'e.g. `eval "$(pm completion bash)"` in ~/.bashrc',
+        ],
+        positional=[
+            ("SHELL", ["bash, zsh or fish"]),
+        ],
+        short="Print shell completion script",
+    )
+    positional_kinds = [shells]
+
+    def __init__(self) -> None:
+        self.shell = ""
+
+    def run(self) -> None:
+        """Run completion command."""
+        from pm import completion
+
+        utils.check_npositional(self.positional, mn=1, mx=1)
+        utils.set_positional(self, self.positional, ["shell"])
+        if self.shell not in self.shells:
+            raise ValueError(f"Invalid shell `{self.shell}`{const.SEE_HELP}")
+        completion.update_index()
+        sys.stdout.write(completion.script(self.shell))
+
+
 class Help(Cmd):
     """Handler for the help command."""
 
@@ -302,6 +504,8 @@ class Help(Cmd):
             self._app_help()
 
     def _cmd_help(self) -> None:
+        from pm import printer
+
         if not self._cmd:
             return
         flags = self._cmd.flags
@@ -310,10 +514,13 @@ class Help(Cmd):
         printer.print_flags(flags=flags)
 
     def _app_help(self) -> None:
+        from pm import printer
+
         app_usage = Usage(
-            header="pm [-h] COMMAND [FLAGS] PROJECT [WORKTREE]",
+            header="pm [-h] [--profile[=FILE]] COMMAND [FLAGS] PROJECT [WORKTREE]",
             description=[
                 f"Calling `{const.APP_NAME}` without args, lists managed projects.",
+                "`--profile` prints phase timings, FILE saves a Chrome trace of them.",
             ],
         )
         printer.print_usage(app_usage)
@@ -332,6 +539,8 @@ class PackageVersion(Cmd):
 
     def run(self) -> None:
         """Run the version command."""
+        from pm import printer
+
         printer.print_version_info()
 
 
@@ -341,6 +550,8 @@ COMMANDS: list[TCmd] = [
     Open,
     Add,
     Init,
+    Daemon,
+    Completion,
 ]
 
 
@@ -371,5 +582,8 @@ def create_cmd(name: str) -> Cmd:
     """Returns the command for an app flag."""
     for cmd in COMMANDS:
         if name == cmd.name:
-            return cmd()
+            instance = cmd()
+            # parsing sets flag values, keep the class flags untouched
+            instance.flags = copy.deepcopy(cmd.flags)
+            return instance
     raise ValueError(f"Invalid command name {name}")
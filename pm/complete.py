@@ -0,0 +1,123 @@
+"""Shell completion entry point, `pm-complete`.
+
+Called by the scripts of `pm completion SHELL` on every TAB, so it imports
+only the standard library and answers from the completion index, written
+by `pm.completion` whenever the database or the projects change.
+
+Usage:
+    pm-complete WORD... , the command line words up to the current one, e.g.
+    `pm-complete pm open my` prints the projects starting with `my`
+"""
+
+import json
+import os
+import sys
+from typing import Any
+
+INDEX_FILE = os.path.join(os.path.expanduser("~"), ".pm", "completion.json")
+INDEX_VERSION = 1
+
+# kinds of positional arguments, a list of str is a choice
+PROJECT = "project"
+WORKTREE = "worktree"
+DIR = "dir"
+
+
+def load_index() -> dict[str, Any]:
+    """Load the completion index, empty if missing or invalid."""
+    try:
+        with open(INDEX_FILE, encoding="utf-8") as fp:
+            index = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return {}
+    return index
+
+
+def _dirs(prefix: str) -> list[str]:
+    """Directories starting with prefix, with a trailing `/`."""
+    head, tail = os.path.split(prefix)
+    try:
+        entries = list(os.scandir(os.path.expanduser(head) or "."))
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(head, entry.name) + "/"
+        for entry in entries
+        if entry.name.startswith(tail)
+        and (tail.startswith(".") or not entry.name.startswith("."))
+        and entry.is_dir()
+    )
+
+
+def _worktrees(projects: dict[str, list[Any]], name: str) -> list[str]:
+    """Worktrees of a project, found by name or short name."""
+    if name in projects:
+        return list(projects[name][1])
+    for short, worktrees in projects.values():
+        if short == name:
+            return list(worktrees)
+    return []
+
+
+def complete(words: list[str], index: dict[str, Any]) -> list[str]:
+    """Candidates for the last word of a command line.
+
+    Args:
+        words: list, the command line words, the program name first
+        index: dict, the completion index
+
+    Returns:
+        A list with the candidates starting with the last word
+    """
+    commands: dict[str, dict[str, Any]] = index.get("commands", {})
+    projects: dict[str, list[Any]] = index.get("projects", {})
+    *before, current = words[1:] or [""]
+
+    cmd: dict[str, Any] | None = None
+    positional: list[str] = []
+    takes_value = False
+    for word in before:
+        if takes_value:
+            takes_value = False
+        elif word.startswith("-"):
+            takes_value = cmd is not None and word in cmd["value_flags"]
+        elif cmd is None and word in commands:
+            cmd = commands[word]
+        else:
+            positional.append(word)
+    if takes_value:
+        return []
+
+    if current.startswith("-"):
+        flags = cmd["flags"] if cmd else index.get("app_flags", [])
+        return [flag for flag in flags if flag.startswith(current)]
+    if cmd is None:
+        return [name for name in commands if name.startswith(current)]
+    kinds = cmd["positional"]
+    if len(positional) >= len(kinds):
+        return []
+    kind = kinds[len(positional)]
+    if isinstance(kind, list):
+        candidates = kind
+    elif kind == PROJECT:
+        candidates = sorted({*projects, *(short for short, _ in projects.values() if short)})
+    elif kind == WORKTREE:
+        candidates = _worktrees(projects, positional[0]) if positional else []
+    elif kind == DIR:
+        return _dirs(current)
+    else:
+        return []
+    return [candidate for candidate in candidates if candidate.startswith(current)]
+
+
+def main() -> None:
+    """Print the candidates for the command line in argv, one per line."""
+    candidates = complete(sys.argv[1:], load_index())
+    if candidates:
+        sys.stdout.write("\n".join(candidates) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Shell completion scripts and the completion index.
+
+The index is a JSON file with the commands, their flags and positional
+arguments and the managed projects with their worktrees. It is read by
+the `pm-complete` entry point, see `pm.complete`, and written again when
+the database or the projects change.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Iterable
+
+from pm import commands, complete, db, utils
+from pm.models import Proj, TCmd
+from pm.typedef import StrList
+
+logger = logging.getLogger("pm")
+
+_BASH_SCRIPT = """\
+_pm_completion() {
+    local IFS=$'\\n'
+    COMPREPLY=($(pm-complete "${COMP_WORDS[@]:0:COMP_CWORD+1}"))
+    if [[ ${#COMPREPLY[@]} -eq 1 && ${COMPREPLY[0]} == */ ]]; then
+        compopt -o nospace
+    fi
+}
+complete -F _pm_completion pm
+"""
+
+_ZSH_SCRIPT = """\
+#compdef pm
+_pm_completion() {
+    local -a candidates
+    candidates=(${(f)"$(pm-complete "${(@)words[1,CURRENT]}")"})
+    compadd -a candidates
+}
+compdef _pm_completion pm
+"""
+
+_FISH_SCRIPT = """\
+function __pm_completion
+    pm-complete (commandline -opc) (commandline -ct)
+end
+complete -c pm -f -a '(__pm_completion)'
+"""
+
+
+def script(shell: str) -> str:
+    """Completion script for shell, `bash`, `zsh` or `fish`."""
+    return {"bash": _BASH_SCRIPT, "zsh": _ZSH_SCRIPT, "fish": _FISH_SCRIPT}[shell]
+
+
+def _flag_names(cmd: TCmd) -> tuple[StrList, StrList]:
+    """Returns the flag names of a command and the names of the flags taking a value."""
+    names = utils.expand_flag_name(commands.cmd_help_flag.name)
+    value_names = []
+    for flag in cmd.flags:
+        expanded = utils.expand_flag_name(flag.name)
+        names.extend(expanded)
+        if isinstance(flag.val, str):
+            value_names.extend(expanded)
+    return names, value_names
+
+
+def _commands_index() -> dict[str, Any]:
+    index = {}
+    for cmd in commands.COMMANDS:
+        flags, value_flags = _flag_names(cmd)
+        index[cmd.name] = {
+            "flags": flags,
+            "value_flags": value_flags,
+            "positional": cmd.positional_kinds,
+        }
+    return index
+
+
+def _app_flags() -> StrList:
+    names = utils.expand_flag_name(commands.cmd_help_flag.name)
+    for app_flag in commands.APP_FLAGS:
+        names.extend(utils.expand_flag_name(app_flag.name))
+    return names + ["--profile"]
+
+
+def _proj_worktrees(proj: Proj) -> StrList:
+    """Names of the worktrees of a project inside its dir, as given to `open` and `cd`."""
+    if not proj.git:
+        return []
+    proj_dir = os.path.join(proj.path, proj.name, "")
+    return [wt.name for wt in proj.git.worktree_details if wt.path.startswith(proj_dir)]
+
+
+def _load_worktrees() -> dict[str, StrList]:
+    """Worktrees per project from the current index."""
+    projects = complete.load_index().get("projects", {})
+    return {name: worktrees for name, (_, worktrees) in projects.items()}
+
+
+def update_index(
+    projects: Iterable[Proj] | None = None, records: Iterable[StrList] | None = None
+) -> None:
+    """Write the completion index from the database records.
+
+    Args:
+        projects: the projects read, to update their worktrees,
+            the other projects keep the worktrees in the current index
+        records: the database records, if already read, read from the database if None
+    """
+    worktrees = _load_worktrees()
+    for proj in projects or []:
+        worktrees[proj.name] = _proj_worktrees(proj)
+    if records is None:
+        try:
+            records = list(db.read_db())
+        except FileNotFoundError:
+            records = []
+    index = {
+        "version": complete.INDEX_VERSION,
+        "app_flags": _app_flags(),
+        "commands": _commands_index(),
+        "projects": {name: [short, worktrees.get(name, [])] for name, short, *_ in records},
+    }
+    index_file = complete.INDEX_FILE
+    if not os.path.isdir(os.path.dirname(index_file)):
+        return
+    tmp_file = f"{index_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as fp:
+            json.dump(index, fp, separators=(",", ":"))
+        os.replace(tmp_file, index_file)
+    except OSError as e:
+        logger.warning(f"Failed to write completion index {index_file}: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
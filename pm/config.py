@@ -1,13 +1,14 @@
 """Project configuration."""
 
+import math
 import os
 import sys
 from configparser import ConfigParser
 from functools import cache
 from pathlib import Path
 
-from pm import const
-from pm.typedef import AnyDict, StrDict
+from pm import const, profiling
+from pm.typedef import AnyDict, StrDict, StrList
 
 CONFIG_FILE = Path(const.PM_DIR / "pmconf.ini")
 
@@ -16,6 +17,28 @@ WINDOWS = "Windows"
 LINUX = "Linux"
 MACOS = "Darwin"
 
+NATIVE_BACKEND = "native"
+GITPYTHON_BACKEND = "gitpython"
+
+THREAD_EXECUTOR = "thread"
+PROCESS_EXECUTOR = "process"
+NO_EXECUTOR = "none"
+EXECUTORS = (THREAD_EXECUTOR, PROCESS_EXECUTOR, NO_EXECUTOR)
+DEFAULT_WORKERS = 8
+
+CSV_BACKEND = "csv"
+SQLITE_BACKEND = "sqlite"
+
+DEFAULT_READ_TIMEOUT = 5.0
+DEFAULT_LS_TIMEOUT = 10.0
+
+DEFAULT_SCAN_DEPTH = 1
+DEFAULT_SCAN_IGNORE = "node_modules, __pycache__"
+
+NAME_SORT = "name"
+RECENT_SORT = "recent"
+DEFAULT_REMOTE_LIMIT = 0
+
 PLATFORM = ""
 if sys.platform == "win32":
     PLATFORM = WINDOWS
@@ -49,6 +72,84 @@ def dirs() -> StrDict:
     return dict(get_config()["dirs"])
 
 
+def scan_depth() -> int:
+    """Depth to look for non-managed projects at, 1 for the direct sub dirs of `dirs`."""
+    return get_config().getint("sett", "scan_depth", fallback=DEFAULT_SCAN_DEPTH)
+
+
+def scan_ignore() -> StrList:
+    """Patterns of dir names skipped when looking for non-managed projects."""
+    patterns = get_config().get("sett", "scan_ignore", fallback=DEFAULT_SCAN_IGNORE)
+    return [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+
+
+def remote_limit() -> int:
+    """Max number of remote refs kept per project, 0 for all."""
+    return max(0, get_config().getint("sett", "remote_limit", fallback=DEFAULT_REMOTE_LIMIT))
+
+
+def remote_sort() -> str:
+    """Remote refs kept, when over the limit, `name` for the first by name or `recent`."""
+    return get_config().get("sett", "remote_sort", fallback=NAME_SORT)
+
+
+def remote_patterns() -> StrList:
+    """Patterns of the remote ref names kept, e.g. `origin/release/*`, empty for all."""
+    patterns = get_config().get("sett", "remote_patterns", fallback="")
+    return [pattern.strip() for pattern in patterns.split(",") if pattern.strip()]
+
+
+def detach_editor() -> bool:
+    """Start the editor of `open` detached, without waiting for it to exit."""
+    return get_config().getboolean("sett", "detach_editor", fallback=False)
+
+
+def git_backend() -> str:
+    """Backend used to read git repositories, `native` or `gitpython`."""
+    return get_config().get("sett", "git_backend", fallback=NATIVE_BACKEND)
+
+
+def db_backend() -> str:
+    """Storage of the project database, `csv` or `sqlite`."""
+    return get_config().get("sett", "db_backend", fallback=CSV_BACKEND)
+
+
+def executor() -> str:
+    """Executor used to read projects, `thread`, `process` or `none`."""
+    name = get_config().get("sett", "executor", fallback=THREAD_EXECUTOR)
+    if name not in EXECUTORS:
+        raise ValueError(
+            f"Invalid executor `{name}` in {CONFIG_FILE}, expected one of {EXECUTORS}"
+        )
+    return name
+
+
+def workers() -> int:
+    """Max number of workers reading projects in parallel."""
+    return max(1, get_config().getint("sett", "workers", fallback=DEFAULT_WORKERS))
+
+
+def _timeout(key: str, default: float) -> float:
+    timeout = get_config().getfloat("sett", key, fallback=default)
+    return timeout if timeout > 0 else math.inf
+
+
+def read_timeout() -> float:
+    """Seconds a project read may take before its cached info is shown, 0 for no limit.
+
+    Applies to the `thread` executor only.
+    """
+    return _timeout("read_timeout", DEFAULT_READ_TIMEOUT)
+
+
+def ls_timeout() -> float:
+    """Seconds to read all managed projects before showing cached info, 0 for no limit.
+
+    Applies to the `thread` executor only.
+    """
+    return _timeout("ls_timeout", DEFAULT_LS_TIMEOUT)
+
+
 def ljust() -> int:
     """Text left justify configuration."""
     return int(get_config()["print"]["ljust"])
@@ -66,7 +167,8 @@ def get_config() -> ConfigParser:
 
     if not const.PM_DIR.is_dir() or not CONFIG_FILE.exists():
         raise FileNotFoundError("Cannot find `pm` config. Maybe you forgot to execute `pm init`?")
-    parser.read(CONFIG_FILE)
+    with profiling.span("config load"):
+        parser.read(CONFIG_FILE)
     return parser
 
 
@@ -93,6 +195,18 @@ def _add_default_settings_section(parser: ConfigParser) -> None:
     parser.add_section("sett")
     parser["sett"]["local"] = const.LOCAL_CONFIG_NAME
     parser["sett"]["db"] = str(const.DB_FILE.absolute())
+    parser["sett"]["db_backend"] = CSV_BACKEND
+    parser["sett"]["git_backend"] = NATIVE_BACKEND
+    parser["sett"]["executor"] = THREAD_EXECUTOR
+    parser["sett"]["workers"] = str(DEFAULT_WORKERS)
+    parser["sett"]["read_timeout"] = str(DEFAULT_READ_TIMEOUT)
+    parser["sett"]["ls_timeout"] = str(DEFAULT_LS_TIMEOUT)
+    parser["sett"]["scan_depth"] = str(DEFAULT_SCAN_DEPTH)
+    parser["sett"]["scan_ignore"] = DEFAULT_SCAN_IGNORE
+    parser["sett"]["remote_limit"] = str(DEFAULT_REMOTE_LIMIT)
+    parser["sett"]["remote_sort"] = NAME_SORT
+    parser["sett"]["remote_patterns"] = ""
+    parser["sett"]["detach_editor"] = "false"
 
 
 def _add_default_print_section(parser: ConfigParser) -> None:
@@ -107,16 +221,26 @@ def get_editor() -> str:
 
 
 def read_local_config(path: Path) -> AnyDict:
-    """Read local config file."""
-    # await asyncio.sleep(0.1)
+    """Read local config file.
+
+    Parsed files are kept in the local configs cache, in the `pm` home dir,
+    and reused while their mtime and size are unchanged.
+    """
+    from pm import caches
+
     local_config_file = path / const.LOCAL_CONFIG_NAME
-    if not local_config_file.exists():
+    signature = caches.local_config_signature(local_config_file)
+    if not signature:
         return {}
+    if (cached := caches.get_local_config(local_config_file, signature)) is not None:
+        return cached
 
-    with open(local_config_file, "r", encoding="utf-8") as fp:
+    with profiling.span("local config read"), open(local_config_file, encoding="utf-8") as fp:
         parser = ConfigParser()
         parser.read_file(fp)
-        return dict(parser["project"])
+        data = dict(parser["project"])
+    caches.put_local_config(local_config_file, signature, data)
+    return data
 
 
 def write_local_config(path: Path, data: AnyDict | None = None) -> None:
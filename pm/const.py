@@ -10,6 +10,8 @@ APP_NAME = "pm"
 HOME_DIR = Path.home()
 PM_DIR = Path(HOME_DIR / ".pm")
 DB_FILE = Path(PM_DIR / "db.csv")
+DB_SQLITE_FILE = Path(PM_DIR / "db.sqlite3")
+DAEMON_SOCKET_NAME = "pm.sock"
 
 
 LOCAL_CONFIG_NAME = ".pm-cfg"
@@ -0,0 +1,341 @@
+"""Resident `pm` server and its client.
+
+`pm daemon start` runs a server that keeps the project manager warm in memory and
+answers queries over a Unix socket in the `pm` home dir. The protocol is one JSON
+request line and one JSON response line per connection.
+
+Requests:
+    {"op": "ping"}
+    {"op": "ls", "argv": [...]}, output of the `ls` command
+    {"op": "resolve", "name": "..."}, project lookup for `open` and `cd`
+    {"op": "complete", "prefix": "..."}, project names starting with prefix
+    {"op": "stop"}
+"""
+
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pm import argparser, config, const, watcher
+from pm.models import Proj
+from pm.typedef import AnyDict, StrList
+
+if TYPE_CHECKING:
+    from pm.proj_manager import ProjManager
+
+logger = logging.getLogger("pm")
+
+CLIENT_TIMEOUT = 2.0
+START_TIMEOUT = 5.0
+
+
+class DaemonUnavailableError(Exception):
+    """The daemon is not running or did not answer."""
+
+
+def socket_file() -> Path:
+    """Path of the daemon socket."""
+    return const.PM_DIR / const.DAEMON_SOCKET_NAME
+
+
+def request(payload: AnyDict, timeout: float | None = CLIENT_TIMEOUT) -> AnyDict:
+    """Send a request to the daemon, waiting for timeout seconds or, if None, forever.
+
+    Returns:
+        The response of the daemon
+
+    Raises:
+        DaemonUnavailableError: if the daemon is not running or does not answer
+        ValueError: with the error message, if the request failed
+    """
+    path = socket_file()
+    if not path.exists():
+        raise DaemonUnavailableError("Daemon is not running")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as fp:
+                line = fp.readline()
+    except OSError as e:
+        raise DaemonUnavailableError(f"Daemon is not answering: {e}") from e
+    if not line:
+        raise DaemonUnavailableError("Daemon closed the connection")
+    response: AnyDict = json.loads(line)
+    if not response.get("ok"):
+        raise ValueError(response.get("error", "Daemon request failed"))
+    return response
+
+
+def run_ls(argv: StrList) -> str:
+    """Returns the output of the `ls` command run by the daemon.
+
+    Waits as long as an `ls` in process would, `ls_timeout`, plus the client timeout.
+    """
+    ls_timeout = config.ls_timeout()
+    timeout = ls_timeout + CLIENT_TIMEOUT if math.isfinite(ls_timeout) else None
+    return str(request({"op": "ls", "argv": argv}, timeout=timeout)["out"])
+
+
+def find_proj(name: str) -> Proj | None:
+    """Find project through the daemon.
+
+    Returns:
+        A Proj with name, short name, path and recent info, or None
+    """
+    found = request({"op": "resolve", "name": name})["proj"]
+    if not found:
+        return None
+    return Proj(
+        name=found["name"],
+        short=found["short"],
+        path=found["path"],
+        last_opened=datetime.strptime(found["last_opened"], const.DATE_FORMAT),
+        recent_branch=found["recent_branch"],
+    )
+
+
+def complete(prefix: str) -> StrList:
+    """Returns project names and short names starting with prefix."""
+    return list(request({"op": "complete", "prefix": prefix})["names"])
+
+
+class Daemon:
+    """Serves requests with a warm project manager.
+
+    Projects are read once and then only the ones reported changed by the
+    watcher are read again.
+    """
+
+    def __init__(self) -> None:
+        self._stamps: dict[str, tuple[int, int] | None] = {}
+        self._proj_mgr: ProjManager | None = None
+        self._watcher: watcher.Watcher | None = None
+        # held while reading projects, `ping` and `stop` are answered meanwhile
+        self._lock = threading.Lock()
+
+    def _changed(self, path: Path) -> bool:
+        try:
+            stat = path.stat()
+            stamp: tuple[int, int] | None = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        changed = self._stamps.get(str(path), ()) != stamp
+        self._stamps[str(path)] = stamp
+        return changed
+
+    def _watch(self, proj_mgr: "ProjManager") -> None:
+        from pm.proj_manager import record_path
+
+        self.close()
+        self._watcher = watcher.create_watcher()
+        for name, record in proj_mgr.index.by_name.items():
+            self._watcher.watch_project(name, record_path(record))
+        for group, path in config.dirs().items():
+            self._watcher.watch_root(group, Path(path))
+
+    def refresh(self) -> None:
+        """Reload what changed since the last request."""
+        from pm.proj_manager import get_proj_manager
+
+        if self._changed(config.CONFIG_FILE):
+            config.get_config.cache_clear()
+            get_proj_manager.cache_clear()
+        db_files = [const.DB_FILE, const.DB_SQLITE_FILE, Path(f"{const.DB_SQLITE_FILE}-wal")]
+        db_changed = any([self._changed(path) for path in db_files])
+
+        proj_mgr = get_proj_manager()
+        if proj_mgr is not self._proj_mgr or self._watcher is None:
+            self._proj_mgr = proj_mgr
+            self._watch(proj_mgr)
+            return
+        if db_changed:
+            self._reload_records(proj_mgr, self._watcher)
+        invalidations = self._watcher.poll()
+        if invalidations.everything:
+            proj_mgr.clear()
+            return
+        if invalidations.projects:
+            logger.debug(f"Reloading {sorted(invalidations.projects)}")
+            proj_mgr.reload_projs(invalidations.projects)
+        for group in invalidations.added.keys() | invalidations.removed.keys():
+            added = invalidations.added.get(group, set())
+            removed = invalidations.removed.get(group, set())
+            proj_mgr.update_non_managed(group, added=added, removed=removed)
+
+    def _reload_records(self, proj_mgr: "ProjManager", project_watcher: watcher.Watcher) -> None:
+        """Reload the database records, watching the added projects only."""
+        from pm.proj_manager import record_path
+
+        added, removed = proj_mgr.reload_records()
+        for name in removed | added:
+            project_watcher.unwatch_project(name)
+        for name in added:
+            project_watcher.watch_project(name, record_path(proj_mgr.index.by_name[name]))
+
+    def warm_up(self) -> None:
+        """Read all projects, so the first requests are answered from memory."""
+        from pm.proj_manager import get_proj_manager
+
+        with self._lock:
+            self.refresh()
+            proj_mgr = get_proj_manager()
+            proj_mgr.get_managed()
+            proj_mgr.get_non_managed()
+
+    def close(self) -> None:
+        """Stop watching the projects."""
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+
+    def handle(self, req: AnyDict) -> AnyDict:
+        """Handle a request."""
+        from pm.proj_manager import get_proj_manager
+
+        op = req.get("op")
+        if op in {"ping", "stop"}:
+            return {"ok": True, "pid": os.getpid()}
+        with self._lock:
+            self.refresh()
+            return self._handle(op, req, get_proj_manager())
+
+    def _handle(self, op: Any, req: AnyDict, proj_mgr: "ProjManager") -> AnyDict:
+        if op == "ls":
+            cmd = argparser.parse(req.get("argv", []))
+            if cmd.name != "ls":
+                raise ValueError(f"Daemon cannot run `{cmd.name}`")
+            if len(cmd.positional) > 1:
+                # runs `ls` in a child process, writing to the daemon's stdout
+                raise ValueError("Daemon cannot run `ls PROJECT WORKTREE`")
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                cmd.run()
+            return {"ok": True, "out": out.getvalue()}
+        if op == "resolve":
+            proj = proj_mgr.find_proj(str(req["name"]))
+            found = None
+            if proj:
+                found = {
+                    "name": proj.name,
+                    "short": proj.short,
+                    "path": proj.path,
+                    "last_opened": proj.last_opened.strftime(const.DATE_FORMAT),
+                    "recent_branch": proj.recent_branch,
+                }
+            return {"ok": True, "proj": found}
+        if op == "complete":
+            prefix = str(req.get("prefix", ""))
+            return {"ok": True, "names": sorted(proj_mgr.complete(prefix))}
+        raise ValueError(f"Unknown request `{op}`")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        response: AnyDict
+        req: AnyDict = {}
+        try:
+            req = json.loads(self.rfile.readline())
+            response = self.server.daemon.handle(req)
+        except Exception as e:
+            logger.debug(f"Request {req} failed: {e!r}")
+            response = {"ok": False, "error": str(e.args[0] if e.args else e)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        if req.get("op") == "stop":
+            threading.Thread(target=self.server.shutdown).start()
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Unix socket server, handles one request at a time."""
+
+    def __init__(self, path: Path) -> None:
+        self.daemon = Daemon()
+        super().__init__(str(path), _Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self) -> None:
+        """Close the socket and the watcher."""
+        super().server_close()
+        self.daemon.close()
+
+
+def is_running() -> bool:
+    """Checks if the daemon answers."""
+    try:
+        request({"op": "ping"})
+    except DaemonUnavailableError:
+        return False
+    return True
+
+
+def serve() -> None:
+    """Run the daemon in the foreground."""
+    if not config.is_unix():
+        raise OSError(f"Daemon not supported on '{config.PLATFORM}'")
+    config.get_config()
+    path = socket_file()
+    if is_running():
+        raise RuntimeError("Daemon is already running")
+    path.unlink(missing_ok=True)
+    with DaemonServer(path) as server:
+        threading.Thread(target=server.daemon.warm_up, name="pm-warm-up", daemon=True).start()
+        try:
+            server.serve_forever()
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def start() -> None:
+    """Start the daemon in the background."""
+    if is_running():
+        print("Daemon is already running")
+        return
+    subprocess.Popen(
+        [sys.executable, "-m", "pm", "daemon", "run"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_running():
+            print("Daemon started")
+            return
+        time.sleep(0.05)
+    raise TimeoutError("Daemon did not start")
+
+
+def stop() -> None:
+    """Stop the daemon."""
+    try:
+        request({"op": "stop"})
+    except DaemonUnavailableError:
+        print("Daemon is not running")
+        return
+    print("Daemon stopped")
+
+
+def status() -> None:
+    """Print daemon status."""
+    try:
+        pid: Any = request({"op": "ping"})["pid"]
+    except DaemonUnavailableError:
+        print("Daemon is not running")
+        return
+    print(f"Daemon is running, pid {pid}")
@@ -1,16 +1,70 @@
-"""Database module."""
+"""Database module.
+
+Records are stored in a CSV file or, with `db_backend = sqlite`, in a SQLite database.
+
+Writers of the CSV file, in any process, are serialized by an advisory lock
+on a sidecar `.lock` file. Updates replace the file atomically with a temp
+file in the same dir, so readers see either the old or the new records.
+"""
 
 import csv
-import shutil
-from tempfile import NamedTemporaryFile
-from typing import Iterable
+import io
+import os
+import sys
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterable, Iterator
 
+from pm import config
 from pm.const import DB_FILE, DbColumns
 from pm.typedef import RecordTuple, StrList
 
 
+def _sqlite_db() -> ModuleType | None:
+    """Returns the SQLite backend, if configured, creating it from the CSV records on first use."""
+    if config.db_backend() != config.SQLITE_BACKEND:
+        return None
+    from pm import db_sqlite
+
+    db_sqlite.create_db(csv_file=DB_FILE)
+    return db_sqlite
+
+
+@contextmanager
+def _locked(shared: bool = False) -> Iterator[None]:
+    """Hold the lock of the CSV database file, waiting for other processes.
+
+    Args:
+        shared: bool, take a shared lock, for readers, instead of an exclusive one.
+            Windows has no shared lock, readers take the exclusive one there
+    """
+    lock_file = DB_FILE.with_name(f"{DB_FILE.name}.lock")
+    with open(lock_file, "a+b") as fp:
+        if sys.platform == "win32":
+            import msvcrt
+
+            fp.seek(0)
+            # LK_LOCK retries for 10 seconds
+            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fp.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
 def create_db() -> None:
     """Create database file."""
+    if _sqlite_db():
+        return
     db_file = DB_FILE
     if not db_file.exists():
         db_file.parent.mkdir(parents=True, exist_ok=True)
@@ -19,35 +73,99 @@ def create_db() -> None:
 
 def read_db() -> Iterable[StrList]:
     """Read database file."""
+    if sqlite_db := _sqlite_db():
+        yield from sqlite_db.read_db()
+        return
     if not DB_FILE.exists():
         raise FileNotFoundError(
             "Cannot find database file. Maybe you forgot to execute `pm init`?"
         )
-    with DB_FILE.open("r", encoding="utf-8") as fp:
-        for line in csv.reader(fp):
-            if line:
-                yield line
+    # appends are not atomic, read the whole file while no writer holds the lock
+    with _locked(shared=True), DB_FILE.open("r", newline="", encoding="utf-8") as fp:
+        content = fp.read()
+    for line in csv.reader(io.StringIO(content)):
+        if line:
+            yield line
+
+
+def find_record(name: str) -> StrList | None:
+    """Find the record of a project by short name or name.
+
+    Indexed query with the SQLite backend, a scan of the records with the CSV one.
+    """
+    if sqlite_db := _sqlite_db():
+        found: StrList | None = sqlite_db.find_record(name)
+        return found
+    by_name = None
+    for record in read_db():
+        if (record[DbColumns.short] or record[DbColumns.name]) == name:
+            return record
+        if by_name is None and record[DbColumns.name] == name:
+            by_name = record
+    return by_name
+
+
+def read_recent(limit: int) -> list[StrList]:
+    """Read the records of the last opened projects, most recent first."""
+    if sqlite_db := _sqlite_db():
+        recent: list[StrList] = sqlite_db.read_recent(limit)
+        return recent
+    records = [record for record in read_db() if record[DbColumns.datetime_opened]]
+    records.sort(key=lambda record: record[DbColumns.datetime_opened], reverse=True)
+    return records[:limit]
+
+
+def add_records(records: Iterable[RecordTuple]) -> None:
+    """Write records to the database file, in one batch."""
+    if sqlite_db := _sqlite_db():
+        sqlite_db.add_records(records)
+    else:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        with _locked(), DB_FILE.open("a", newline="", encoding="utf-8") as fp:
+            fp.write(buffer.getvalue())
 
 
 def add_record(record: RecordTuple) -> None:
     """Write record to the database file."""
-    with DB_FILE.open("a", newline="", encoding="utf-8") as fp:
-        writer = csv.writer(fp)
-        writer.writerow(record)
+    add_records([record])
 
 
 def update_record(record: RecordTuple) -> None:
-    """Update record to the database file."""
-    tempfile = NamedTemporaryFile("w+t", newline="", delete=False)
+    """Update record to the database file.
 
-    with DB_FILE.open("r", newline="", encoding="utf-8") as dbfile, tempfile:
-        reader = csv.reader(dbfile, delimiter=",", quotechar='"')
-        writer = csv.writer(tempfile, delimiter=",", quotechar='"')
+    The CSV database is rewritten in full, to a temporary file replacing it,
+    so the cost grows with the number of records. The SQLite database updates
+    the one row.
+    """
+    if sqlite_db := _sqlite_db():
+        sqlite_db.update_record(record)
+        return
+    from tempfile import NamedTemporaryFile
 
-        for row in reader:
-            if row[DbColumns.name] == record[DbColumns.name]:
-                row[DbColumns.datetime_opened] = str(record[DbColumns.datetime_opened])
-                row[DbColumns.recent_branch] = str(record[DbColumns.recent_branch])
-            writer.writerow(row)
+    with _locked():
+        # same dir as the database, for an atomic replace
+        with NamedTemporaryFile(
+            "w+t",
+            newline="",
+            encoding="utf-8",
+            dir=DB_FILE.parent,
+            prefix=f"{DB_FILE.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as tempfile:
+            try:
+                with DB_FILE.open("r", newline="", encoding="utf-8") as dbfile:
+                    reader = csv.reader(dbfile, delimiter=",", quotechar='"')
+                    writer = csv.writer(tempfile, delimiter=",", quotechar='"')
 
-    shutil.move(tempfile.name, DB_FILE)
+                    for row in reader:
+                        if row and row[DbColumns.name] == record[DbColumns.name]:
+                            row[DbColumns.datetime_opened] = str(record[DbColumns.datetime_opened])
+                            row[DbColumns.recent_branch] = str(record[DbColumns.recent_branch])
+                        writer.writerow(row)
+            except BaseException:
+                tempfile.close()
+                os.remove(tempfile.name)
+                raise
+        os.replace(tempfile.name, DB_FILE)
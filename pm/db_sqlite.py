@@ -0,0 +1,151 @@
+"""SQLite storage for the project database."""
+
+import csv
+import os
+import sqlite3
+from contextlib import closing, suppress
+from pathlib import Path
+from typing import Iterable
+
+from pm.const import DB_SQLITE_FILE, DbColumns
+from pm.typedef import RecordTuple, StrList
+
+_COLUMNS = ", ".join(DbColumns.__members__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    short TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL DEFAULT '',
+    datetime_opened TEXT NOT NULL DEFAULT '',
+    recent_branch TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS projects_short ON projects (short);
+CREATE INDEX IF NOT EXISTS projects_opened ON projects (datetime_opened);
+"""
+
+
+# database files known to exist, created by this process or found
+_created: set[Path] = set()
+
+
+def _connect(db_file: Path | None = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_file or DB_SQLITE_FILE, timeout=10)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _to_row(record: RecordTuple) -> tuple[str, ...]:
+    return tuple(val or "" for val in record)
+
+
+def create_db(csv_file: Path | None = None) -> None:
+    """Create database file and migrate the records of csv_file, if it exists.
+
+    The database is built in a temp file and linked in place only when complete,
+    so other processes never see it without its schema or half migrated.
+    """
+    db_file = DB_SQLITE_FILE
+    if db_file in _created:
+        return
+    if db_file.exists():
+        _created.add(db_file)
+        return
+    db_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = db_file.with_name(f"{db_file.name}.{os.getpid()}.tmp")
+    try:
+        with closing(_connect(tmp_file)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.executescript(_SCHEMA)
+                if csv_file and csv_file.exists():
+                    _insert(conn, _read_csv(csv_file))
+        # unlike a rename, fails if another process created it first
+        with suppress(FileExistsError):
+            os.link(tmp_file, db_file)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+    _created.add(db_file)
+
+
+def _read_csv(csv_file: Path) -> list[tuple[str, ...]]:
+    with csv_file.open("r", newline="", encoding="utf-8") as fp:
+        return [_to_row(tuple(line)) for line in csv.reader(fp) if line]
+
+
+def _insert(conn: sqlite3.Connection, records: Iterable[RecordTuple]) -> None:
+    conn.executemany(
+        f"INSERT OR IGNORE INTO projects ({_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+        (_to_row(record) for record in records),
+    )
+
+
+def migrate_csv(csv_file: Path) -> int:
+    """Import the records of a CSV database.
+
+    Returns:
+        Number of imported records
+    """
+    rows = _read_csv(csv_file)
+    add_records(rows)
+    return len(rows)
+
+
+def read_db() -> Iterable[StrList]:
+    """Read all records in insertion order."""
+    if not DB_SQLITE_FILE.exists():
+        raise FileNotFoundError(
+            "Cannot find database file. Maybe you forgot to execute `pm init`?"
+        )
+    with closing(_connect()) as conn:
+        for row in conn.execute(f"SELECT {_COLUMNS} FROM projects ORDER BY rowid"):
+            yield list(row)
+
+
+def find_record(name: str) -> StrList | None:
+    """Find the record of a project by short name or name, with the indexes.
+
+    The short name of a record defaults to its name, as in `ProjIndex.get`.
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            f"SELECT {_COLUMNS} FROM projects WHERE short = ? OR name = ?"
+            " ORDER BY (CASE short WHEN '' THEN name ELSE short END) = ? DESC, rowid LIMIT 1",
+            (name, name, name),
+        ).fetchone()
+    return list(row) if row else None
+
+
+def read_recent(limit: int) -> list[StrList]:
+    """Read the records of the last opened projects, most recent first."""
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM projects WHERE datetime_opened != ''"
+            " ORDER BY datetime_opened DESC LIMIT ?",
+            (limit,),
+        )
+        return [list(row) for row in rows]
+
+
+def add_records(records: Iterable[RecordTuple]) -> None:
+    """Insert records, existing project names are left unchanged."""
+    with closing(_connect()) as conn, conn:
+        _insert(conn, records)
+
+
+def add_record(record: RecordTuple) -> None:
+    """Insert record."""
+    add_records([record])
+
+
+def update_record(record: RecordTuple) -> None:
+    """Update opened datetime and recent branch of a record."""
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "UPDATE projects SET datetime_opened = ?, recent_branch = ? WHERE name = ?",
+            (
+                record[DbColumns.datetime_opened] or "",
+                record[DbColumns.recent_branch] or "",
+                record[DbColumns.name],
+            ),
+        )
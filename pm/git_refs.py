@@ -0,0 +1,312 @@
+"""Lightweight git refs reader.
+
+Reads `HEAD`, the loose refs and `packed-refs` straight from the git directory,
+without going through GitPython.
+"""
+
+import fnmatch
+import heapq
+import mmap
+import os
+import re
+import sys
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Container, Iterable, Iterator
+
+from pm.models import Git, Worktree
+from pm.typedef import StrList
+
+HEADS = "refs/heads/"
+REMOTES = "refs/remotes/"
+
+# packed-refs files above this size are mmap'd instead of read
+MMAP_THRESHOLD = 64 * 1024
+
+_PACKED_REF_RE = re.compile(rb"^[0-9a-f]{40,64} (refs/(?:heads|remotes)/[^\r\n]+)$", re.MULTILINE)
+_CORE_BARE_RE = re.compile(r"^\s*bare\s*=\s*(\w+)", re.IGNORECASE)
+
+
+class UnsupportedRepoError(Exception):
+    """Repository layout that the reader cannot handle."""
+
+
+@dataclass(frozen=True)
+class RemoteFilter:
+    """Selection of the remote refs kept in the Git model.
+
+    Attributes:
+        limit: int, max number of remote refs kept, 0 for all
+        patterns: tuple with fnmatch patterns of the ref names kept, empty for all
+        recent: bool, keep the most recently updated refs instead of the first by name
+    """
+
+    limit: int = 0
+    patterns: tuple[str, ...] = ()
+    recent: bool = False
+
+    def signature(self) -> list[int]:
+        """Signature of the filter, for the git cache."""
+        return [zlib.crc32(repr(self).encode("utf-8"))]
+
+
+ALL_REMOTES = RemoteFilter()
+
+
+def find_git_dir(proj_path: Path) -> Path | None:
+    """Find the git directory of a project.
+
+    Returns:
+        The `.git` dir, the dir a `.git` file points to,
+        the project path itself for bare repos or None.
+    """
+    # os.path is used over pathlib, this runs for every project on every listing
+    dot_git = os.path.join(proj_path, ".git")
+    if os.path.isdir(dot_git):
+        return Path(dot_git)
+    if os.path.isfile(dot_git):
+        with open(dot_git, encoding="utf-8") as fp:
+            content = fp.read().strip()
+        if not content.startswith("gitdir:"):
+            return None
+        git_dir = Path(content.removeprefix("gitdir:").strip())
+        return git_dir if git_dir.is_absolute() else proj_path / git_dir
+    if os.path.isfile(os.path.join(proj_path, "HEAD")) and os.path.isdir(
+        os.path.join(proj_path, "objects")
+    ):
+        return proj_path
+    return None
+
+
+def find_common_dir(git_dir: Path) -> Path:
+    """Dir holding the shared refs, differs from git_dir for linked worktrees."""
+    commondir_file = os.path.join(git_dir, "commondir")
+    if not os.path.isfile(commondir_file):
+        return git_dir
+    with open(commondir_file, encoding="utf-8") as fp:
+        common_dir = Path(fp.read().strip())
+    return common_dir if common_dir.is_absolute() else git_dir / common_dir
+
+
+def intern_names(names: Iterable[str]) -> StrList:
+    """Interned ref names, `main` or `origin/main` are shared by all the Git models."""
+    return [sys.intern(name) for name in names]
+
+
+def read_head(git_dir: Path) -> str:
+    """Returns the active branch name or an empty str for a detached HEAD."""
+    content = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    if not content.startswith("ref:"):
+        return ""
+    return sys.intern(content.removeprefix("ref:").strip().removeprefix(HEADS))
+
+
+def read_worktrees(common_dir: Path, proj_path: Path) -> list[Worktree]:
+    """Read the linked worktrees from the `worktrees/` metadata of a repository.
+
+    Each `worktrees/<id>/` dir holds the `HEAD` of the worktree, a `gitdir` file
+    with the path of its `.git` file and a `locked` file, if locked.
+
+    Returns:
+        A list with the worktrees, sorted by name
+    """
+    try:
+        entries = list(os.scandir(common_dir / "worktrees"))
+    except OSError:
+        return []
+    proj_dir = os.path.realpath(proj_path)
+    worktrees = []
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        admin_dir = Path(entry.path)
+        try:
+            dot_git = (admin_dir / "gitdir").read_text(encoding="utf-8").strip()
+            branch = read_head(admin_dir)
+        except OSError:
+            continue
+        path = os.path.dirname(dot_git)
+        rel_path = os.path.relpath(os.path.realpath(path), proj_dir)
+        inside = not rel_path.startswith(os.pardir)
+        worktrees.append(
+            Worktree(
+                name=rel_path.replace(os.sep, "/") if inside else entry.name,
+                path=path,
+                branch=branch,
+                locked=(admin_dir / "locked").exists(),
+            )
+        )
+    return sorted(worktrees, key=lambda wt: wt.name)
+
+
+def iter_loose_refs(common_dir: Path, prefix: str) -> Iterator[str]:
+    """Yield the full names of the loose refs under prefix, e.g. `refs/heads/`."""
+    root = common_dir / prefix
+    for dirpath, _, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, common_dir).replace(os.sep, "/")
+        for filename in filenames:
+            if not filename.endswith(".lock"):
+                yield f"{rel_dir}/{filename}"
+
+
+def iter_packed_refs(common_dir: Path) -> Iterator[str]:
+    """Yield the full names of the branch and remote refs in `packed-refs`."""
+    packed_refs = common_dir / "packed-refs"
+    if not packed_refs.is_file():
+        return
+    with open(packed_refs, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if not size:
+            return
+        if size < MMAP_THRESHOLD:
+            data: bytes | mmap.mmap = fp.read()
+        else:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for match in _PACKED_REF_RE.finditer(data):
+                yield match.group(1).decode("utf-8")
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def remote_ref_mtime(
+    common_dir: Path, loose: Container[str] | None = None
+) -> Callable[[str], int]:
+    """Returns a function of a remote ref name to its last update time.
+
+    Loose refs have the mtime of their file, packed refs the one of `packed-refs`.
+    If the loose ref names are given, packed refs are not looked up on disk.
+    """
+    remotes_dir = os.path.join(common_dir, REMOTES)
+    try:
+        packed_mtime = os.stat(common_dir / "packed-refs").st_mtime_ns
+    except OSError:
+        packed_mtime = 0
+
+    def mtime(name: str) -> int:
+        if loose is not None and name not in loose:
+            return packed_mtime
+        try:
+            return os.stat(os.path.join(remotes_dir, name)).st_mtime_ns
+        except OSError:
+            return packed_mtime
+
+    return mtime
+
+
+def select_remotes(
+    refs: Iterable[str], remote_filter: RemoteFilter, mtime: Callable[[str], int]
+) -> tuple[StrList, dict[str, int]]:
+    """Select the remote refs to keep, consuming refs one by one.
+
+    Only the selected refs are held in memory, when a limit is set.
+
+    Args:
+        refs: remote ref names, e.g. `origin/main`, each given once
+        remote_filter: RemoteFilter, refs to keep
+        mtime: function of a ref name to its last update time
+
+    Returns:
+        A tuple with the selected ref names and the number of refs per remote
+    """
+    counts: dict[str, int] = {}
+    patterns = remote_filter.patterns
+
+    def matching() -> Iterator[str]:
+        for name in refs:
+            remote = name.partition("/")[0]
+            counts[remote] = counts.get(remote, 0) + 1
+            if not patterns or any(fnmatch.fnmatchcase(name, p) for p in patterns):
+                yield name
+
+    limit = remote_filter.limit
+    if remote_filter.recent:
+        stamped = ((mtime(name), name) for name in matching())
+        recent = heapq.nlargest(limit, stamped) if limit else list(stamped)
+        selected = [name for _, name in sorted(recent, key=lambda item: (-item[0], item[1]))]
+    elif limit:
+        selected = heapq.nsmallest(limit, matching())
+    else:
+        selected = sorted(matching())
+    return intern_names(selected), {sys.intern(remote): n for remote, n in counts.items()}
+
+
+def read_refs(
+    common_dir: Path, remote_filter: RemoteFilter = ALL_REMOTES
+) -> tuple[StrList, StrList, dict[str, int]]:
+    """Read branches and remote refs.
+
+    `packed-refs` is read in a single pass, remote refs are selected as
+    they are read, see `select_remotes`.
+
+    Returns:
+        A tuple with the sorted local branch names, the selected remote
+        ref names and the number of remote refs per remote
+    """
+    heads = {ref[len(HEADS) :] for ref in iter_loose_refs(common_dir, HEADS)}
+    loose_remotes = {ref[len(REMOTES) :] for ref in iter_loose_refs(common_dir, REMOTES)}
+
+    def remote_refs() -> Iterator[str]:
+        yield from loose_remotes
+        for ref in iter_packed_refs(common_dir):
+            if ref.startswith(HEADS):
+                heads.add(ref[len(HEADS) :])
+            elif (name := ref[len(REMOTES) :]) not in loose_remotes:
+                yield name
+
+    remotes, counts = select_remotes(
+        remote_refs(), remote_filter, mtime=remote_ref_mtime(common_dir, loose_remotes)
+    )
+    return intern_names(sorted(heads)), remotes, counts
+
+
+def is_bare(common_dir: Path) -> bool:
+    """Checks `core.bare` in the repository config."""
+    try:
+        lines = (common_dir / "config").read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return False
+    in_core = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("["):
+            in_core = stripped.lower().startswith("[core]")
+        elif in_core and (match := _CORE_BARE_RE.match(stripped)):
+            return match.group(1).lower() in {"true", "yes", "on", "1"}
+    return False
+
+
+def read_git(proj_path: Path, remote_filter: RemoteFilter = ALL_REMOTES) -> Git | None:
+    """Read git repository.
+
+    Args:
+        proj_path: Path, the project path
+        remote_filter: RemoteFilter, remote refs to keep
+
+    Returns:
+        A Git model or None, if proj_path is not a git repository
+
+    Raises:
+        UnsupportedRepoError: if the refs storage cannot be read directly
+    """
+    git_dir = find_git_dir(proj_path)
+    if not git_dir:
+        return None
+    common_dir = find_common_dir(git_dir)
+    if (common_dir / "reftable").is_dir():
+        raise UnsupportedRepoError(f"Unsupported reftable refs storage in {common_dir}")
+
+    branches, remote_branches, remote_counts = read_refs(common_dir, remote_filter)
+    bare = is_bare(common_dir)
+    worktree_details = read_worktrees(common_dir, proj_path)
+    return Git(
+        active_branch=read_head(git_dir),
+        branches=branches,
+        remote_branches=remote_branches,
+        remote_counts=remote_counts,
+        worktrees=[wt.name for wt in worktree_details] if bare else [],
+        is_bare=bare,
+        worktree_details=worktree_details,
+    )
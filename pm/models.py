@@ -1,8 +1,9 @@
 import abc
 import enum
+import os
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Iterable
+from typing import Iterable, NamedTuple
 
 from pm import const
 from pm.typedef import AnyDict, StrDict, StrList
@@ -39,6 +40,10 @@ class Cmd(abc.ABC):
     usage: Usage
     flags: list[Flag] = []
     positional: list[str] = []
+    # None for any number of positional arguments
+    max_positional: int | None = 4
+    # shell completion of the positional arguments, kinds from `pm.complete` or choices
+    positional_kinds: list[str | list[str]] = []
 
     @abc.abstractmethod
     def run(self) -> None:
@@ -49,25 +54,56 @@ class Cmd(abc.ABC):
 TCmd = type[Cmd]
 
 
-@dataclass
+@dataclass(slots=True)
+class Worktree:
+    """Linked worktree of a git repo.
+
+    Attributes:
+        name: str, path relative to the project dir or the worktree id, if outside of it
+        path: str, worktree path
+        branch: str, the checked out branch, empty for a detached HEAD
+        locked: bool, True if locked with `git worktree lock`
+    """
+
+    name: str
+    path: str
+    branch: str = ""
+    locked: bool = False
+
+    @property
+    def prunable(self) -> bool:
+        """True if the worktree path is gone.
+
+        Checked on use, not cached, as the worktree path is outside the git dir
+        and not covered by the signature of the repo.
+        """
+        return not os.path.exists(os.path.join(self.path, ".git"))
+
+
+@dataclass(slots=True)
 class Git:
     """Git repo.
 
     Attributes:
         branches: list with the project branches
         active_branch: str, the active branch, if defined
-        worktrees: list with the project worktrees
+        remote_branches: list with the selected remote refs, see `git_refs.RemoteFilter`
+        remote_counts: dict, remote name to its number of refs
+        worktrees: list with the worktree names of a bare repo
         is_bare: bool, True if the project repository is bare.
+        worktree_details: list with the linked worktrees
     """
 
     active_branch: str
     branches: StrList = field(default_factory=list)
     remote_branches: StrList = field(default_factory=list)
+    remote_counts: dict[str, int] = field(default_factory=dict)
     worktrees: StrList = field(default_factory=list)
     is_bare: bool = False
+    worktree_details: list[Worktree] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Proj:
     """Project data.
 
@@ -79,6 +115,7 @@ class Proj:
         git: Git, optional git repo info
         last_opened: datetime, last open time
         recent_branch: str, last opened branch
+        stale: bool, True if the read timed out and git holds the last cached info
     """
 
     name: str
@@ -88,6 +125,7 @@ class Proj:
     git: Git | None = field(default=None)
     last_opened: datetime = field(default=const.DAY_ONE)
     recent_branch: str | None = field(default=None)
+    stale: bool = field(default=False)
 
 
 ProjDict = dict[str, Proj]
@@ -109,6 +147,13 @@ class Clr(enum.StrEnum):
     UNDERLINE = "\033[4m"
 
 
+class Cell(NamedTuple):
+    """Table cell, text with its display width, without color codes."""
+
+    text: str
+    width: int
+
+
 @dataclass
 class Table:
     """Table to print."""
@@ -121,15 +166,15 @@ class Table:
     table_border: StrDict = field(default_factory=dict)
     widths: list[int] = field(default_factory=list)
     alignments: list[str] = field(default_factory=list)
-    rows: Iterable[StrList] | None = None
+    rows: Iterable[list[Cell]] | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PrintableProj:
     """Printable for a Proj."""
 
     short: str
     name: str
     bare: str
-    branches: list[str] = field(default_factory=list)
-    remote_branches: list[str] = field(default_factory=list)
+    branches: list[Cell] = field(default_factory=list)
+    remote_branches: list[Cell] = field(default_factory=list)
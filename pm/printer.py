@@ -1,10 +1,24 @@
 """Argument parsing module."""
 
+import itertools
 import sys
+from typing import Iterable
 
 from pm import __version__, config, utils
-from pm.models import Clr, Flags, PrintableProj, Proj, ProjDict, Table, TCmd, Usage
-from pm.typedef import StrDict, StrList, StrListDict
+from pm.models import (
+    Cell,
+    Clr,
+    Flags,
+    Git,
+    PrintableProj,
+    Proj,
+    ProjDict,
+    Table,
+    TCmd,
+    Usage,
+    Worktree,
+)
+from pm.typedef import StrDict, StrList
 
 
 def print_commands(commands: list[TCmd]) -> None:
@@ -62,22 +76,33 @@ def print_flags(flags: Flags) -> None:
             print(f"\t\t  {line}")
 
 
-def proj_to_printable(proj: Proj) -> PrintableProj:
-    """Create printable object from Proj."""
-    formatted_branches: StrList = []
-    remote_branches: StrList = []
+def proj_to_printable(proj: Proj, remotes: bool = True) -> PrintableProj:
+    """Create printable object from Proj, with the remote branches if remotes."""
+    formatted_branches: list[Cell] = []
+    remote_branches: list[Cell] = []
     bare = "b" if proj.git and proj.git.is_bare else " "
     if proj.git:
+        worktrees = {wt.name: wt for wt in proj.git.worktree_details}
         branches = proj.git.worktrees or proj.git.branches
-        formatted_branches = []
         for b in branches:
             if b == proj.recent_branch:
-                b = clr(Clr.YELLOW_FG, b)
+                cell = clr_cell(Clr.YELLOW_FG, b)
             elif b == proj.git.active_branch:
-                b = clr(Clr.GREEN_FG, f"*{b}")
-            formatted_branches.append(b)
-
-        remote_branches.extend(clr(Clr.RED_FG, f"[{b}]") for b in proj.git.remote_branches)
+                cell = clr_cell(Clr.GREEN_FG, f"*{b}")
+            else:
+                cell = Cell(b, len(b))
+            if proj.git.worktrees and b in worktrees:
+                cell = _worktree_cell(cell, worktrees[b])
+            formatted_branches.append(cell)
+
+        if remotes:
+            remote_branches.extend(
+                clr_cell(Clr.RED_FG, f"[{b}]") for b in proj.git.remote_branches
+            )
+            remote_branches.extend(_hidden_remotes_cells(proj.git))
+    if proj.stale:
+        marker = "(stale)" if proj.git else "(timed out)"
+        formatted_branches.insert(0, clr_cell(Clr.GRAY_FG, marker))
 
     return PrintableProj(
         short=proj.short,
@@ -88,9 +113,37 @@ def proj_to_printable(proj: Proj) -> PrintableProj:
     )
 
 
-def print_project(proj: Proj) -> None:
+def _hidden_remotes_cells(git: Git) -> list[Cell]:
+    """Cells summing up the remote refs left out by the remote limits, per remote."""
+    shown: dict[str, int] = {}
+    for ref in git.remote_branches:
+        remote = ref.partition("/")[0]
+        shown[remote] = shown.get(remote, 0) + 1
+    return [
+        clr_cell(Clr.GRAY_FG, f"[{remote}: +{count - shown.get(remote, 0)} more]")
+        for remote, count in sorted(git.remote_counts.items())
+        if count > shown.get(remote, 0)
+    ]
+
+
+def _worktree_cell(cell: Cell, worktree: Worktree) -> Cell:
+    """Worktree cell, with its branch, if named differently, and its state."""
+    marks = []
+    if worktree.branch != worktree.name:
+        marks.append(f":{worktree.branch or '(detached)'}")
+    if worktree.locked:
+        marks.append(" (locked)")
+    if worktree.prunable:
+        marks.append(" (prunable)")
+    if not marks:
+        return cell
+    suffix = "".join(marks)
+    return Cell(cell.text + clr(Clr.GRAY_FG, suffix), cell.width + len(suffix))
+
+
+def print_project(proj: Proj, remotes: bool = True) -> None:
     """Print project formatted info."""
-    printable = proj_to_printable(proj=proj)
+    printable = proj_to_printable(proj=proj, remotes=remotes)
     name = printable.name
     max_name = 40
     if len(name) > max_name:
@@ -101,64 +154,126 @@ def print_project(proj: Proj) -> None:
             name=name,
             max_name=max_name,
             bare=printable.bare,
-            branches=" ".join(printable.branches + printable.remote_branches),
+            branches=" ".join(c.text for c in printable.branches + printable.remote_branches),
         ),
         end="\n",
     )
 
 
-def print_table_headers(table: Table) -> None:
-    """Print headers of a Table."""
+def _pad(cell: Cell, width: int, alignment: str) -> str:
+    """Pad cell text to width, by its display width."""
+    fill = width - cell.width
+    if fill <= 0:
+        return cell.text
+    if alignment == ">":
+        return " " * fill + cell.text
+    if alignment == "^":
+        left = fill // 2
+        return " " * left + cell.text + " " * (fill - left)
+    return cell.text + " " * fill
+
+
+def render_table_headers(table: Table) -> StrList:
+    """Render the headers of a Table as lines."""
     if not table.headers:
-        return
+        return []
     n_columns = len(table.headers)
     column_border = table.header_border.get("column", "")
     row_width = sum(table.widths) + (n_columns + 2) * len(column_border)
-    end = column_border
 
+    lines = []
     if top_border := table.header_border.get("top", ""):
-        print(top_border * row_width, end="\n")
-
-    for i, (header, width) in enumerate(zip(table.headers, table.widths, strict=True), start=1):
-        if i == n_columns:
-            end = "\n"
-        print("{header:^{width}}".format(header=header, width=width), end=end)
-
+        lines.append(top_border * row_width + "\n")
+    cells = [
+        _pad(Cell(header, len(header)), width, "^")
+        for header, width in zip(table.headers, table.widths, strict=True)
+    ]
+    lines.append(column_border.join(cells) + "\n")
     if bottom_border := table.header_border.get("bottom", ""):
-        print(bottom_border * row_width, end="\n")
+        lines.append(bottom_border * row_width + "\n")
+    return lines
 
 
-def print_table_rows(table: Table) -> None:
-    """Print rows of a Table."""
+def render_table_rows(table: Table) -> StrList:
+    """Render the rows of a Table as lines."""
     if not table.rows:
-        return
+        return []
 
     column_border = table.table_border.get("column", "")
     row_width = sum(table.widths) + (table.n_columns + 2) * len(column_border)
+    columns = list(zip(table.widths, table.alignments, strict=True))
 
+    lines = []
     if top_border := table.table_border.get("top", ""):
-        print(top_border * row_width, end="\n")
-
+        lines.append(top_border * row_width + "\n")
     for row in table.rows:
-        end = column_border
-        for i, (val, width, alignment) in enumerate(
-            zip(row, table.widths, table.alignments, strict=True), start=1
-        ):
-            if i == table.n_columns:
-                end = "\n"
-            print(
-                "{val:{alignment}{width}}".format(val=val, alignment=alignment, width=width),
-                end=end,
-            )
-
+        cells = [
+            _pad(cell, width, alignment)
+            for cell, (width, alignment) in zip(row, columns, strict=True)
+        ]
+        lines.append(column_border.join(cells) + "\n")
     if bottom_border := table.table_border.get("bottom", ""):
-        print(bottom_border * row_width, end="\n")
+        lines.append(bottom_border * row_width + "\n")
+    return lines
+
+
+def print_table_headers(table: Table) -> None:
+    """Print headers of a Table."""
+    sys.stdout.write("".join(render_table_headers(table=table)))
+
+
+def print_table_rows(table: Table) -> None:
+    """Print rows of a Table."""
+    sys.stdout.write("".join(render_table_rows(table=table)))
 
 
 def print_table(table: Table) -> None:
-    """Print table."""
-    print_table_headers(table=table)
-    print_table_rows(table=table)
+    """Print table, with a single write."""
+    sys.stdout.write("".join(render_table_headers(table=table) + render_table_rows(table=table)))
+
+
+# rows collected before the top border of a streamed table
+STREAM_BATCH = 16
+
+
+def print_table_stream(table: Table, batch: int = STREAM_BATCH) -> None:
+    """Print table rows as they are produced.
+
+    The first `batch` rows are collected to size the columns and the top border,
+    then written, and the other rows are written one by one. Columns start at
+    the widths of the table and are widened for the rows that overflow them,
+    so only a row after the first batch can go past the top border.
+    """
+    write, flush = sys.stdout.write, sys.stdout.flush
+    write("".join(render_table_headers(table=table)))
+    column_border = table.table_border.get("column", "")
+    widths = list(table.widths)
+
+    def row_width() -> int:
+        return sum(widths) + (table.n_columns + 2) * len(column_border)
+
+    def write_row(row: list[Cell]) -> None:
+        cells = []
+        for i, (cell, alignment) in enumerate(zip(row, table.alignments, strict=True)):
+            widths[i] = max(widths[i], cell.width)
+            cells.append(_pad(cell, widths[i], alignment))
+        write(column_border.join(cells) + "\n")
+
+    rows = iter(table.rows or [])
+    first = list(itertools.islice(rows, batch))
+    for row in first:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], cell.width)
+    if top_border := table.table_border.get("top", ""):
+        write(top_border * row_width() + "\n")
+    for row in first:
+        write_row(row)
+    flush()
+    for row in rows:
+        write_row(row)
+        flush()
+    if bottom_border := table.table_border.get("bottom", ""):
+        write(bottom_border * row_width() + "\n")
 
 
 def print_managed(projects: ProjDict) -> None:
@@ -170,10 +285,17 @@ def print_managed(projects: ProjDict) -> None:
         print_project(proj=project)
 
 
-def print_non_managed(dirs: StrDict, non_managed: StrListDict) -> None:
-    """Print formatted info for the non-managed projects."""
+NON_MANAGED_MARKS = {"git": "", "bare": " (b)", "plain": "/"}
+
+
+def print_non_managed(dirs: StrDict, non_managed: dict[str, StrDict]) -> None:
+    """Print formatted info for the non-managed projects.
+
+    Bare repos are marked with `(b)` and plain dirs, not git repos, with a trailing `/`.
+    """
     for group in dirs:
-        projects = non_managed[group]
+        found = non_managed[group]
+        projects = [f"{name}{NON_MANAGED_MARKS.get(kind, '')}" for name, kind in found.items()]
         print(f"\n> {group}:\n")
         ljust = config.ljust()
         for i, project in enumerate(sorted(projects, key=str.lower)):
@@ -184,62 +306,89 @@ def print_non_managed(dirs: StrDict, non_managed: StrListDict) -> None:
                 print(f" {project}", end="\n")
 
 
+def print_add_report(added: StrList, conflicts: StrList) -> None:
+    """Print the projects added by `add` and the paths skipped for a conflict."""
+    print(f"Added {len(added)} project{'' if len(added) == 1 else 's'}")
+    if conflicts:
+        print(clr(Clr.YELLOW_FG, f"Skipped {len(conflicts)}:"))
+        for conflict in conflicts:
+            print(f"  {conflict}")
+
+
 def print_version_info() -> None:
     """Prints package version."""
     print(f"v{__version__}")
 
 
-def projects_to_table(projects: ProjDict) -> Table:
+_EMPTY = Cell(" ", 1)
+# headers = ["short", "full name", "b", "br/wt"]
+_ALIGNMENTS: StrList = [">", "<", "^", "<"]
+
+
+def proj_to_rows(proj: Proj, remotes: bool = True) -> list[list[Cell]]:
+    """Table rows of a project, branches wrap to extra rows, 3 per row."""
+    pproj = proj_to_printable(proj=proj, remotes=remotes)
+    branches = pproj.branches + pproj.remote_branches
+    chunks = [
+        Cell(" ".join(c.text for c in chunk), sum(c.width for c in chunk) + len(chunk) - 1)
+        for chunk in utils.chunks(lst=branches, n=3)
+    ]
+    row = [
+        Cell(pproj.short, len(pproj.short)),
+        Cell(pproj.name, len(pproj.name)),
+        Cell(pproj.bare, 1),
+        chunks[0] if chunks else Cell("", 0),
+    ]
+    # create empty rows for the other chunks
+    return [row] + [[_EMPTY, _EMPTY, _EMPTY, chunk] for chunk in chunks[1:]]
+
+
+def projects_to_table(projects: ProjDict, remotes: bool = True) -> Table:
     """Prepare projects as Table."""
-    rows = []
-    # prepare rows and calculate widths
-    swidth, fwidth, brwith = 0, 0, 0
-    for _, proj in projects.items():
-        pproj = proj_to_printable(proj=proj)
-        swidth = max(swidth, clr_str_len(proj.short))
-        fwidth = max(fwidth, clr_str_len(proj.name))
-        branches = pproj.branches + pproj.remote_branches
-        curr_row_branches = ""
-        more_branch_rows = []
-        if branches:
-            for chunk in utils.chunks(lst=branches, n=3):
-                chunk_str = " ".join(chunk)
-                brwith = max(brwith, clr_str_len(chunk_str))
-                if not curr_row_branches:
-                    curr_row_branches = chunk_str
-                    continue
-                # create empty row for current chunk
-                more_branch_rows.append([" ", " ", " ", chunk_str])
-        row: StrList = [
-            pproj.short,
-            pproj.name,
-            pproj.bare,
-            curr_row_branches,
-        ]
-        rows.append(row)
-        if more_branch_rows:
-            rows.extend(more_branch_rows)
-
-    # headers = ["short", "full name", "b", "br/wt"]
-    alignments: StrList = [">", "<", "^", "<"]
-    widths: list[int] = [swidth, fwidth, 1, brwith]
-    table = Table(
-        n_columns=len(alignments),
+    rows: list[list[Cell]] = []
+    for proj in projects.values():
+        rows.extend(proj_to_rows(proj=proj, remotes=remotes))
+    widths = [0, 0, 1, 0]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], cell.width)
+    return projects_table(rows=rows, widths=widths)
+
+
+def stream_projects_table(
+    projects: Iterable[Proj], widths: list[int], remotes: bool = True
+) -> Table:
+    """Prepare projects as Table, with rows produced as projects come.
+
+    Args:
+        projects: Iterable, the projects to print
+        widths: list, estimated column widths, see `print_table_stream`
+        remotes: bool, include the remote branches
+    """
+    rows = (row for proj in projects for row in proj_to_rows(proj=proj, remotes=remotes))
+    return projects_table(rows=rows, widths=widths)
+
+
+def projects_table(rows: Iterable[list[Cell]], widths: list[int]) -> Table:
+    """Projects Table with the given rows."""
+    return Table(
+        n_columns=len(_ALIGNMENTS),
         widths=widths,
-        alignments=alignments,
+        alignments=_ALIGNMENTS,
         table_border={"column": " ", "bottom": "-", "top": "-"},
         rows=rows,
     )
-    return table
+
+
+# Clr members are str, `.value` lookups are slow in hot loops
+_ENDC = str(Clr.ENDC.value)
 
 
 def clr(color: Clr, s: str) -> str:
     """Colored string."""
-    return f"{color.value}{s}{Clr.ENDC.value}"
+    return color + s + _ENDC
 
 
-def clr_str_len(chunk_str: str) -> int:
-    """Get str.len for colored string."""
-    for clr in Clr:
-        chunk_str = chunk_str.replace(clr.value, "")
-    return len(chunk_str)
+def clr_cell(color: Clr, s: str) -> Cell:
+    """Colored table cell, with the display width of s."""
+    return Cell(clr(color, s), len(s))
@@ -0,0 +1,198 @@
+"""Phase timings for `pm --profile`.
+
+Code marks its phases with `span` or `timed`. Spans are recorded only while
+profiling is enabled, otherwise `span` returns a shared no-op context manager.
+Recorded spans are printed as a summary table and can be saved as a Chrome
+trace-event file, for `chrome://tracing` or https://ui.perfetto.dev.
+"""
+
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Callable, ContextManager, TypeVar
+
+from pm.typedef import AnyDict
+
+T = TypeVar("T")
+
+PHASE = "phase"
+PROJECT = "project"
+FUNCTION = "function"
+
+# slowest projects listed under the summary
+SLOWEST_PROJECTS = 5
+
+
+@dataclass
+class Span:
+    """Timed section of code.
+
+    Attributes:
+        name: str, phase or project name
+        category: str, `phase`, `project` or `function`
+        start: float, perf counter seconds
+        end: float, perf counter seconds
+        thread_id: int, id of the thread that ran it
+        args: dict, extra info shown in the trace
+    """
+
+    name: str
+    category: str
+    start: float
+    end: float
+    thread_id: int
+    args: AnyDict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return self.end - self.start
+
+
+_enabled = False
+_spans: list[Span] = []
+_lock = threading.Lock()
+_null_span = contextlib.nullcontext()
+
+
+class _SpanContext:
+    def __init__(self, name: str, category: str, args: AnyDict) -> None:
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        add_span(self._name, self._category, self._start, time.perf_counter(), **self._args)
+
+
+def enable() -> None:
+    """Start recording spans."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    """Checks if spans are recorded."""
+    return _enabled
+
+
+def reset() -> None:
+    """Stop recording and drop the recorded spans."""
+    global _enabled
+    _enabled = False
+    with _lock:
+        _spans.clear()
+
+
+def spans() -> list[Span]:
+    """Returns the recorded spans."""
+    with _lock:
+        return list(_spans)
+
+
+def add_span(name: str, category: str, start: float, end: float, **args: Any) -> None:
+    """Record a span measured by the caller."""
+    if not _enabled:
+        return
+    span_ = Span(name, category, start, end, threading.get_ident(), args)
+    with _lock:
+        _spans.append(span_)
+
+
+def span(name: str, category: str = PHASE, **args: Any) -> ContextManager[None]:
+    """Context manager timing a section of code."""
+    if not _enabled:
+        return _null_span
+    return _SpanContext(name, category, args)
+
+
+def timed(fn: Callable[..., T]) -> Callable[..., T]:
+    """Decorator timing each call of a function."""
+
+    @functools.wraps(fn)
+    def wrapped(*args: Any, **kwargs: Any) -> T:
+        with span(fn.__qualname__, FUNCTION):
+            return fn(*args, **kwargs)
+
+    return wrapped
+
+
+def summary() -> list[tuple[str, int, float, float]]:
+    """Phase timings, project spans are summed up as `project read`.
+
+    Returns:
+        A list of (name, calls, total ms, max ms), in order of first start
+    """
+    totals: dict[str, tuple[int, float, float]] = {}
+    for span_ in sorted(spans(), key=lambda s: s.start):
+        name = "project read" if span_.category == PROJECT else span_.name
+        calls, total, longest = totals.get(name, (0, 0.0, 0.0))
+        duration = span_.duration * 1000
+        totals[name] = (calls + 1, total + duration, max(longest, duration))
+    return [(name, *stats) for name, stats in totals.items()]
+
+
+def print_summary() -> None:
+    """Print the phase timings table to stderr."""
+    from pm import printer
+    from pm.models import Cell, Table
+
+    headers = ["phase", "calls", "total ms", "max ms"]
+    rows = [
+        [name, str(calls), f"{total:.2f}", f"{longest:.2f}"]
+        for name, calls, total, longest in summary()
+    ]
+    slowest = sorted((s for s in spans() if s.category == PROJECT), key=lambda s: -s.duration)
+    rows.extend(
+        [f"  {s.name}", "", f"{s.duration * 1000:.2f}", ""] for s in slowest[:SLOWEST_PROJECTS]
+    )
+    widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    table = Table(
+        n_columns=len(headers),
+        headers=headers,
+        header_border={"column": "  ", "bottom": "-"},
+        table_border={"column": "  "},
+        widths=widths,
+        alignments=["<", ">", ">", ">"],
+        rows=[[Cell(text, len(text)) for text in row] for row in rows],
+    )
+    lines = printer.render_table_headers(table) + printer.render_table_rows(table)
+    sys.stderr.write("\n" + "".join(lines))
+
+
+def write_trace(path: str) -> None:
+    """Write the recorded spans as a Chrome trace-event JSON file."""
+    import json
+
+    recorded = spans()
+    origin = min((s.start for s in recorded), default=0.0)
+    pid = os.getpid()
+    events = [
+        {
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": round((s.start - origin) * 1e6, 3),
+            "dur": round(s.duration * 1e6, 3),
+            "pid": pid,
+            "tid": s.thread_id,
+            "args": s.args,
+        }
+        for s in recorded
+    ]
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
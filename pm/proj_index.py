@@ -0,0 +1,71 @@
+"""Project names index."""
+
+import bisect
+
+from pm.typedef import StrList
+
+
+class ProjIndex:
+    """Index of project records by name, short name and name prefix.
+
+    Values are database records, `[name, short, path, last_opened, recent_branch]`.
+    """
+
+    def __init__(self) -> None:
+        self.by_name: dict[str, StrList] = {}
+        self.by_short: dict[str, StrList] = {}
+        # sorted names and short names, for prefix lookup, built on first use
+        self._keys: StrList | None = None
+
+    def add(self, record: StrList) -> None:
+        """Add a record to the index."""
+        name, short = record[0], record[1] or record[0]
+        self.by_name[name] = record
+        self.by_short.setdefault(short, record)
+        self._keys = None
+
+    def remove(self, name: str) -> None:
+        """Remove the record of a project from the index."""
+        record = self.by_name.pop(name, None)
+        if record is None:
+            return
+        short = record[1] or name
+        if self.by_short.get(short) is record:
+            del self.by_short[short]
+        self._keys = None
+
+    def get(self, name: str) -> StrList | None:
+        """Find record by exact short name or name."""
+        return self.by_short.get(name) or self.by_name.get(name)
+
+    def keys_with_prefix(self, prefix: str) -> StrList:
+        """Returns the sorted names and short names starting with prefix."""
+        if self._keys is None:
+            self._keys = sorted(self.by_name.keys() | self.by_short.keys())
+        keys = self._keys
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return keys[start:end]
+
+    def find_prefix(self, prefix: str) -> list[StrList]:
+        """Find the records with a name or short name starting with prefix."""
+        found: dict[str, StrList] = {}
+        for key in self.keys_with_prefix(prefix):
+            for record in (self.by_short.get(key), self.by_name.get(key)):
+                if record:
+                    found[record[0]] = record
+        return list(found.values())
+
+    def find_unique_prefix(self, prefix: str) -> StrList | None:
+        """Find the only record with a name or short name starting with prefix.
+
+        Raises:
+            ValueError: if the prefix matches more than one project
+        """
+        found = self.find_prefix(prefix)
+        if len(found) > 1:
+            names = ", ".join(sorted(record[0] for record in found))
+            raise ValueError(f"Ambiguous project name `{prefix}`: {names}")
+        return found[0] if found else None
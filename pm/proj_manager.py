@@ -1,74 +1,226 @@
 """Project management module."""
 
 import asyncio
+import atexit
+import functools
+import itertools
 import logging
+import math
 import os
+import shlex
 import subprocess
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from functools import cache
 from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, Callable, Container, Iterable, Iterator, NamedTuple, TypeVar
 
-from git import InvalidGitRepositoryError
-from git.repo.base import Repo
-
-from pm import config, const, db
+from pm import caches, config, const, db, git_refs, profiling, scanner, snapshot
 from pm.models import Git, Proj, ProjDict
+from pm.proj_index import ProjIndex
+from pm.scanner import Discovered
 
 # from pm import util
-from pm.typedef import StrList, StrListDict
+from pm.typedef import StrList
 
 logger = logging.getLogger("pm")
 
+# projects read ahead per worker when streaming
+STREAM_WINDOW = 4
+# seconds between checks for a queued read to start
+WAIT_INTERVAL = 0.05
+# seconds to wait at exit for the reads that timed out
+LATE_READS_WAIT = 2.0
+
+T = TypeVar("T")
+
+# name of the projects whose dir is gone
+MISSING = "<missing>"
+
+# `config.get_editor` with the EDITOR environment variable not set
+UNSET_EDITOR = {"$EDITOR", "%EDITOR%"}
+# DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP, defined in subprocess on Windows only
+WIN32_DETACHED_FLAGS = 0x00000008 | 0x00000200
 
-async def read_repo(proj_path: Path) -> Git:
+
+async def read_repo(proj_path: Path) -> Git | None:
     """Read git repository.
 
     Returns:
-        A Git model
+        A Git model or None, if not a git repository
     """
     await asyncio.sleep(0)
-    repo = Repo(proj_path)
+    return load_repo(proj_path)
+
+
+def load_repo(proj_path: Path) -> Git | None:
+    """Read git repository, blocking.
+
+    The result is cached and reused while the repository refs are unchanged.
+
+    Returns:
+        A Git model or None, if not a git repository
+    """
+    with profiling.span("git read", project=proj_path.name):
+        git_dir = git_refs.find_git_dir(proj_path)
+        if not git_dir:
+            return None
+        remote_filter = remote_filter_from_config()
+        signature = caches.git_signature(git_dir, remote_filter)
+        if cached := caches.get_git(proj_path, signature):
+            return cached
+
+        git = _read_repo_backend(proj_path, remote_filter)
+        if git:
+            caches.put_git(proj_path, signature, git)
+        return git
+
+
+def remote_filter_from_config() -> git_refs.RemoteFilter:
+    """Remote refs kept in the Git models, per the `remote_*` settings."""
+    return git_refs.RemoteFilter(
+        limit=config.remote_limit(),
+        patterns=tuple(config.remote_patterns()),
+        recent=config.remote_sort() == config.RECENT_SORT,
+    )
+
+
+def _read_repo_backend(proj_path: Path, remote_filter: git_refs.RemoteFilter) -> Git | None:
+    """Read git repository with the configured backend."""
+    if config.git_backend() == config.NATIVE_BACKEND:
+        try:
+            return git_refs.read_git(proj_path, remote_filter)
+        except (git_refs.UnsupportedRepoError, OSError, UnicodeDecodeError) as e:
+            logger.info(f"Falling back to GitPython for {proj_path}: {e}")
+    return read_repo_gitpython(proj_path, remote_filter)
+
+
+def read_repo_gitpython(
+    proj_path: Path, remote_filter: git_refs.RemoteFilter = git_refs.ALL_REMOTES
+) -> Git | None:
+    """Read git repository with GitPython.
+
+    Returns:
+        A Git model or None, if not a git repository
+    """
+    from git import InvalidGitRepositoryError
+    from git.refs import RemoteReference
+    from git.repo.base import Repo
+
+    try:
+        repo = Repo(proj_path)
+    except InvalidGitRepositoryError:
+        return None
     logger.debug(f"repo: {repo}")
-    branches: StrList = [b.name for b in repo.branches]  # type: ignore
-    worktrees: StrList = []
-    if repo.bare:
-        worktrees = [b for b in branches if Path(proj_path).joinpath(b).is_dir()]
-    remote_branches = [ref.name for ref in repo.refs if ref.is_remote()]  # type: ignore[attr-defined]
-
-    git = Git(
-        active_branch=repo.active_branch.name,
+    branches = git_refs.intern_names(b.name for b in repo.branches)
+    common_dir = Path(repo.common_dir)
+    worktree_details = git_refs.read_worktrees(common_dir, Path(proj_path))
+    remote_branches, remote_counts = git_refs.select_remotes(
+        (ref.name for ref in RemoteReference.iter_items(repo)),
+        remote_filter,
+        mtime=git_refs.remote_ref_mtime(common_dir),
+    )
+    active_branch = "" if repo.head.is_detached else sys.intern(repo.active_branch.name)
+
+    return Git(
+        active_branch=active_branch,
         branches=branches,
         remote_branches=remote_branches,
-        worktrees=worktrees,
+        remote_counts=remote_counts,
+        worktrees=[wt.name for wt in worktree_details] if repo.bare else [],
         is_bare=repo.bare,
+        worktree_details=worktree_details,
     )
-    return git
 
 
 async def read_proj(record: list[str]) -> Proj:
     """Read project local config and git repo."""
+    await asyncio.sleep(0)
+    return load_proj(record)
+
+
+def record_path(record: StrList) -> Path:
+    """Returns the project dir of a database record."""
+    return Path(record[2] or config.get_projects_dir()) / record[0]
+
+
+def _last_opened(last_opened_str: str) -> datetime:
+    if not last_opened_str:
+        return const.DAY_ONE
+    return datetime.strptime(last_opened_str, const.DATE_FORMAT)
+
+
+def _record_proj(record: StrList) -> Proj:
+    """Project from its database record only."""
+    name, short, path, last_opened_str, recent_branch = record
+    return Proj(
+        name=name,
+        short=(short or name),
+        path=path or config.get_projects_dir(),
+        last_opened=_last_opened(last_opened_str),
+        recent_branch=recent_branch,
+    )
+
+
+def peek_proj(record: StrList) -> Proj:
+    """Project from its database record and its last cached git data, without reading it."""
+    proj = _record_proj(record)
+    proj_path = Path(proj.path) / proj.name
+    proj.local_config = caches.peek_local_config(proj_path / const.LOCAL_CONFIG_NAME)
+    proj.git = caches.peek_git(proj_path)
+    return proj
+
+
+class _Loaded(NamedTuple):
+    """Project read or taken from the snapshot, with its signature."""
+
+    proj: Proj
+    signature: caches.Signature
+    from_snapshot: bool
+
+
+def _load_or_lookup(
+    record: StrList, entry: tuple[Any, ...] | None, remote_filter: git_refs.RemoteFilter
+) -> _Loaded:
+    """Take a project from its snapshot entry, if up to date, or read it, blocking."""
+    proj = _record_proj(record)
+    signature = snapshot.signature(Path(proj.path) / proj.name, remote_filter)
+    if entry and (cached := snapshot.lookup(entry, proj, signature)):
+        return _Loaded(cached, signature, True)
+    return _Loaded(load_proj(record), signature, False)
+
+
+def load_proj(record: list[str]) -> Proj:
+    """Read project local config and git repo, blocking."""
+    with profiling.span(record[0], profiling.PROJECT, path=record[2]):
+        return _load_proj(record)
+
+
+def _load_proj(record: list[str]) -> Proj:
     name, short, path, last_opened_str, recent_branch = record
     if not path:
         path = config.get_projects_dir()
     if not short:
         short = name
-    last_opened = (
-        datetime.strptime(last_opened_str, const.DATE_FORMAT) if last_opened_str else const.DAY_ONE
-    )
+    last_opened = _last_opened(last_opened_str)
 
     proj_path = Path(path) / name
     if not proj_path.exists():
         return Proj(
-            name="<missing>",
-            short="<missing>",
+            name=MISSING,
+            short=MISSING,
             path=path,
         )
 
     local_config = config.read_local_config(path=proj_path)
-    git: Git | None = None
-    try:
-        git = await read_repo(proj_path=proj_path)
-    except InvalidGitRepositoryError:
+    git = load_repo(proj_path=proj_path)
+    if not git:
         logger.info(f"Not a git repo: {proj_path}")
     return Proj(
         name=name,
@@ -81,25 +233,42 @@ async def read_proj(record: list[str]) -> Proj:
     )
 
 
-def add_new_proj(name: str, short: str, path: str) -> None:
-    """Add new project with local file and save to the database."""
-    path_obj = Path(path)
-    config.write_local_config(path_obj / name)
-    proj_path = None if path_obj == Path(config.get_projects_dir()) else str(path_obj)
-    short_name = None if name == short else short
-    db.add_record(record=(name, short_name, proj_path, "", ""))
+def add_new_projs(projs: list[tuple[str, str, str]]) -> None:
+    """Add new projects with local files and save them to the database.
 
+    Args:
+        projs: list of (name, short, path) tuples, path is the parent dir
+    """
+    projects_dir = Path(config.get_projects_dir())
+    with ThreadPoolExecutor(max_workers=config.workers()) as pool:
+        # list, to raise the first failed write
+        list(pool.map(config.write_local_config, (Path(path, name) for name, _, path in projs)))
+    records = []
+    for name, short, path in projs:
+        proj_path = None if Path(path) == projects_dir else path
+        records.append((name, None if name == short else short, proj_path, "", ""))
+    db.add_records(records)
 
-async def update_proj_opened(proj: Proj) -> None:
+
+def add_new_proj(name: str, short: str, path: str) -> None:
     """Add new project with local file and save to the database."""
-    await asyncio.sleep(0)
+    add_new_projs([(name, short, path)])
+
 
+def record_proj_opened(proj: Proj) -> None:
+    """Save the last opened datetime and recent branch of a project to the database."""
     last_opened_str = proj.last_opened.strftime(const.DATE_FORMAT)
     db.update_record(
         record=(proj.name, proj.short, proj.path, last_opened_str, proj.recent_branch)
     )
 
 
+async def update_proj_opened(proj: Proj) -> None:
+    """Add new project with local file and save to the database."""
+    await asyncio.sleep(0)
+    record_proj_opened(proj)
+
+
 async def open_and_update(path: str, proj: Proj) -> None:
     """Open path in editor and update proj open."""
     out_, err_ = await editor_open(path=path)
@@ -117,77 +286,583 @@ async def editor_open(path: str) -> tuple[bytes, bytes]:
     return out_, err_
 
 
+def editor_launch(path: str) -> None:
+    """Start the editor on path in its own session, without waiting for it."""
+    editor = config.get_editor()
+    win32 = config.is_win32()
+    # an unset variable is not expanded
+    args = [] if editor in UNSET_EDITOR else shlex.split(editor, posix=not win32)
+    if not args:
+        raise ValueError("No editor set, see the EDITOR environment variable")
+    devnull = subprocess.DEVNULL
+    subprocess.Popen(
+        [*args, path],
+        stdin=devnull,
+        stdout=devnull,
+        stderr=devnull,
+        creationflags=WIN32_DETACHED_FLAGS if win32 else 0,
+        start_new_session=not win32,
+    )
+
+
+def open_detached(path: str, proj: Proj) -> None:
+    """Start the editor on path and save the project opened, `pm` exits right after.
+
+    With the CSV database, saving the project rewrites the whole file, see
+    `db.update_record`.
+    """
+    editor_launch(path)
+    record_proj_opened(proj)
+
+
 class ProjManager:
-    """Project manager."""
+    """Project manager.
 
-    def __init__(self, managed: ProjDict) -> None:
-        self.managed = managed
-        self.non_managed: StrListDict = {}
+    Managed projects are read on first use. Lookups go through an index
+    of the database records, built when the manager is created, and read
+    only the project they find.
+    """
+
+    def __init__(self) -> None:
+        self.managed: ProjDict | None = None
+        self.non_managed: dict[str, Discovered] = {}
+        self.index = ProjIndex()
+        with profiling.span("db read"):
+            records = list(db.read_db())
+        for record in records:
+            self.index.add(record)
+        self._non_managed_index: ProjIndex | None = None
+        # projects read after their deadline, see `iter_managed`
+        self._late: ProjDict = {}
 
     def get_managed(self) -> ProjDict:
         """Cache function for the managed projects."""
+        if self.managed is None:
+            records = list(self.index.by_name.values())
+            self.managed = {proj.name: proj for proj in iter_managed(records, self._on_late)}
+        self._apply_late()
         return self.managed
 
-    def get_non_managed(self) -> StrListDict:
+    def _on_late(self, proj: Proj) -> None:
+        """Keep a project read after its deadline, called from a pool thread."""
+        self._late[proj.name] = proj
+
+    def _apply_late(self) -> None:
+        """Replace the stale projects with the ones read after their deadline."""
+        if self.managed is None:
+            return
+        while self._late:
+            name, proj = self._late.popitem()
+            if name in self.managed:
+                self.managed[name] = proj
+
+    def iter_managed(self, recent: bool = False) -> Iterator[Proj]:
+        """Yield the managed projects as they are read.
+
+        Args:
+            recent: bool, in recently opened order instead of database order
+        """
+        self._apply_late()
+        if self.managed is not None:
+            projects = list(self.managed.values())
+            if recent:
+                projects.sort(key=lambda proj: proj.last_opened)
+            yield from projects
+            return
+        records = list(self.index.by_name.values())
+        if recent:
+            records.sort(key=lambda record: _last_opened(record[3]))
+        managed: ProjDict = {}
+        for proj in iter_managed(records, on_late=self._on_late):
+            managed[proj.name] = proj
+            yield proj
+        order = {name: i for i, name in enumerate(self.index.by_name)}
+        self.managed = dict(sorted(managed.items(), key=lambda item: order.get(item[0], -1)))
+
+    def peek_managed(self) -> list[Proj]:
+        """The managed projects read so far or, if not read, as last cached."""
+        if self.managed is not None:
+            return list(self.managed.values())
+        return [peek_proj(record) for record in self.index.by_name.values()]
+
+    def get_non_managed(self) -> dict[str, Discovered]:
         """Cache function for the non-managed projects."""
         if not self.non_managed:
-            self.non_managed = asyncio.run(read_non_managed(self.managed))
+            self.non_managed = asyncio.run(read_non_managed(self.index.by_name))
         return self.non_managed
 
+    def get_non_managed_index(self) -> ProjIndex:
+        """Cache function for the index of the non-managed projects."""
+        if self._non_managed_index is None:
+            self._non_managed_index = ProjIndex()
+            dirs = config.dirs()
+            for group, found in self.get_non_managed().items():
+                for name in found:
+                    self._non_managed_index.add(_non_managed_record(name, dirs[group]))
+        return self._non_managed_index
+
+    def clear(self) -> None:
+        """Drop the projects read so far, they are read again on next use."""
+        self.managed = None
+        self.non_managed = {}
+        self._non_managed_index = None
+        self._late.clear()
+
+    def reload_records(self) -> tuple[set[str], set[str]]:
+        """Read the database records again, keeping the projects read so far.
+
+        Records changed only in their opened datetime or recent branch, e.g. by
+        `open`, update their projects in place. New and moved projects are read.
+
+        Returns:
+            A tuple of the names of the added or moved projects and of the removed ones
+        """
+        with profiling.span("db read"):
+            records = {record[0]: record for record in db.read_db()}
+        old = self.index.by_name
+        removed = old.keys() - records.keys()
+        added = {
+            name
+            for name, record in records.items()
+            if name not in old or old[name][:3] != record[:3]
+        }
+        for name in removed | added:
+            self.index.remove(name)
+            if self.managed is not None:
+                self.managed.pop(name, None)
+        for name, record in records.items():
+            if name in added:
+                self.index.add(record)
+                if self.managed is not None:
+                    self.managed[name] = load_proj(record=record)
+            elif old[name] != record:
+                # shared by the index dicts, update in place
+                old[name][3:] = record[3:]
+                if self.managed is not None and (proj := self.managed.get(name)):
+                    proj.last_opened = _last_opened(record[3])
+                    proj.recent_branch = record[4]
+        if added or removed:
+            # removed projects may show up as non-managed, added ones no more
+            self.non_managed = {}
+            self._non_managed_index = None
+        return added, removed
+
+    def reload_projs(self, names: Iterable[str]) -> None:
+        """Read the given managed projects again, if already read."""
+        if self.managed is None:
+            return
+        for name in names:
+            if record := self.index.by_name.get(name):
+                self.managed[name] = load_proj(record=record)
+        caches.save()
+
+    def update_non_managed(self, group: str, added: Iterable[str], removed: Iterable[str]) -> None:
+        """Add and remove dirs of a project dir group, if already read.
+
+        Nested projects cannot be updated in place, they are discovered again on next use.
+        """
+        if not self.non_managed:
+            return
+        if config.scan_depth() > 1:
+            self.non_managed = {}
+            self._non_managed_index = None
+            return
+        path = config.dirs()[group]
+        found = self.non_managed.setdefault(group, {})
+        for name in sorted(added):
+            if name in self.index.by_name or name in found:
+                continue
+            if os.path.isdir(os.path.join(path, name)):
+                found[name] = scanner.classify(os.path.join(path, name))
+                if self._non_managed_index is not None:
+                    self._non_managed_index.add(_non_managed_record(name, path))
+        for name in removed:
+            if found.pop(name, None) and self._non_managed_index is not None:
+                self._non_managed_index.remove(name)
+
+    def complete(self, prefix: str) -> StrList:
+        """Returns the project names and short names starting with prefix."""
+        names = self.index.keys_with_prefix(prefix)
+        return names + self.get_non_managed_index().keys_with_prefix(prefix)
+
+    def add_projs(self, projs: list[tuple[str, str, str]]) -> None:
+        """Add new managed projects, (name, short, path) tuples, and update the indexes."""
+        from pm import completion
+
+        add_new_projs(projs)
+        for name, short, path in projs:
+            record = [name, "" if short == name else short, path, "", ""]
+            self.index.add(record)
+            if self.managed is not None:
+                self.managed[name] = load_proj(record=record)
+            for found in self.non_managed.values():
+                found.pop(name, None)
+        self._non_managed_index = None
+        completion.update_index(records=self.index.by_name.values())
+
+    def add_proj(self, name: str, short: str, path: str) -> None:
+        """Add new managed project and update the index."""
+        self.add_projs([(name, short, path)])
+
+    def _get_managed_proj(self, record: StrList) -> Proj:
+        if self.managed is not None and (proj := self.managed.get(record[0])):
+            return proj
+        proj = load_proj(record=record)
+        caches.save()
+        return proj
+
     def find_proj(self, name: str) -> Proj | None:
-        """Find project by name.
+        """Find project by name, short name or unique name prefix.
 
         Args:
             name: str, project to find
 
         Returns:
             A Proj instance or None, if not found
+
+        Raises:
+            ValueError: if name is a prefix of more than one project
         """
         # Try find managed
-        managed = self.get_managed()
-        for proj in managed.values():
-            if name in [proj.short, proj.name]:
-                return proj
+        if record := self.index.get(name):
+            return self._get_managed_proj(record)
 
         # Try find non-managed
-        non_managed = self.get_non_managed()
-        dirs = config.dirs()
-        for group, projects in non_managed.items():
-            for proj_name in projects:
-                if name == proj_name:
-                    proj = asyncio.run(read_proj(record=[name, dirs[group], "", "", ""]))
-                    return proj
+        for path in config.dirs().values():
+            if Path(path, name).is_dir():
+                return load_proj(record=[name, "", path, "", ""])
+        if record := self.get_non_managed_index().get(name):
+            return load_proj(record=record)
+
+        # Try name prefix
+        if record := self.index.find_unique_prefix(name):
+            return self._get_managed_proj(record)
+        if record := self.get_non_managed_index().find_unique_prefix(name):
+            return load_proj(record=record)
         return None
 
 
-async def read_managed() -> ProjDict:
+def _non_managed_record(name: str, path: str) -> StrList:
+    """Index record of a non-managed project, nested ones get their dir name as short name."""
+    short = name.rsplit("/", 1)[-1] if "/" in name else ""
+    return [name, short, path, "", ""]
+
+
+class _DaemonThreadPool(Executor):
+    """Thread pool of daemon threads.
+
+    Unlike `ThreadPoolExecutor`, reads hung on a file system do not keep
+    the interpreter from exiting.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str) -> None:
+        self._queue: SimpleQueue[tuple[Future[Any], Callable[..., Any], tuple[Any, ...]] | None]
+        self._queue = SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{thread_name_prefix}_{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not None:
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        """Schedule fn(*args) to run in a worker thread."""
+        future: Future[T] = Future()
+        self._queue.put((future, functools.partial(fn, **kwargs), args))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Stop the workers once the queued calls are done."""
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def _create_pool(executor: str, workers: int) -> Executor:
+    if executor == config.PROCESS_EXECUTOR:
+        return ProcessPoolExecutor(max_workers=workers)
+    return _DaemonThreadPool(max_workers=workers, thread_name_prefix="pm-read")
+
+
+class _Read:
+    """Project read in a thread pool, timed from when it starts."""
+
+    def __init__(
+        self,
+        record: StrList,
+        entry: tuple[Any, ...] | None,
+        remote_filter: git_refs.RemoteFilter,
+    ) -> None:
+        self.record = record
+        self.entry = entry
+        self.remote_filter = remote_filter
+        self.started: float | None = None
+
+    def run(self) -> _Loaded:
+        """Read the project."""
+        self.started = time.monotonic()
+        return _load_or_lookup(self.record, self.entry, self.remote_filter)
+
+    def wait(self, future: "Future[_Loaded]", deadline: float, timeout: float) -> _Loaded | None:
+        """Wait for the read, up to deadline and up to timeout after it started.
+
+        Returns:
+            The project or None, if the read did not finish in time
+        """
+        while not future.done():
+            limit = deadline if self.started is None else min(deadline, self.started + timeout)
+            remaining = limit - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self.started is None:
+                # not started yet, check again once it does
+                remaining = min(remaining, WAIT_INTERVAL)
+            try:
+                return future.result(timeout=None if remaining == math.inf else remaining)
+            except TimeoutError:
+                continue
+        return future.result()
+
+
+class _LateReads:
+    """Reads that timed out in `iter_managed`, going on in the background.
+
+    on_late is called with each project once it is read. Once all are read,
+    the caches are saved and the snapshot is written, as for a read in time.
+    """
+
+    def __init__(
+        self,
+        entries: snapshot.Entries,
+        done: list[_Loaded],
+        on_late: Callable[[Proj], None] | None,
+    ) -> None:
+        self._cond = threading.Condition()
+        self._entries = entries
+        self._done = done
+        self._on_late = on_late
+        self._pending = 0
+        self._closed = False
+        self._failed = False
+        self._written = False
+        self._writing = False
+
+    def add(self, future: "Future[_Loaded]") -> None:
+        """Track a read that timed out."""
+        with self._cond:
+            self._pending += 1
+        _late_reads.add(self)
+        future.add_done_callback(self._read_done)
+
+    def close(self) -> None:
+        """All projects were yielded, write the snapshot once the reads are done."""
+        with self._cond:
+            self._closed = True
+            write = self._should_write()
+        self._write(write)
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the reads and the snapshot write.
+
+        Returns:
+            True, if done in time
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def _read_done(self, future: "Future[_Loaded]") -> None:
+        ok = not future.cancelled() and future.exception() is None
+        if ok:
+            caches.save()
+            if self._on_late:
+                self._on_late(future.result().proj)
+        with self._cond:
+            if ok:
+                self._done.append(future.result())
+            self._failed |= not ok
+            self._pending -= 1
+            write = self._should_write()
+            self._cond.notify_all()
+        self._write(write)
+
+    def _should_write(self) -> bool:
+        if not self._closed or self._pending or self._failed or self._written:
+            return False
+        self._written = self._writing = True
+        return True
+
+    def _write(self, write: bool) -> None:
+        if not write:
+            return
+        try:
+            _update_snapshot(self._entries, self._done)
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+# reads that timed out and are not done yet, see `wait_late_reads`
+_late_reads: "weakref.WeakSet[_LateReads]" = weakref.WeakSet()
+
+
+@atexit.register
+def wait_late_reads(timeout: float = LATE_READS_WAIT) -> None:
+    """Wait up to timeout seconds for the reads that timed out, called at exit.
+
+    Reads run in daemon threads and are dropped when the interpreter exits.
+    Waiting lets a slow project get cached, and the snapshot written, by the
+    run that read it. Reads still running after the wait are read again on
+    the next run.
+    """
+    deadline = time.monotonic() + timeout
+    for late in list(_late_reads):
+        late.wait(max(0.0, deadline - time.monotonic()))
+
+
+async def read_managed(on_late: Callable[[Proj], None] | None = None) -> ProjDict:
     """Read managed projects.
 
-    Read managed projectsfrom the database
-    and for each project read it's git repository.
+    Read managed projects from the database and for each project read its git repository.
+    Projects are read in a bounded thread or process pool, see `config.executor`
+    and `iter_managed`.
     """
+    await asyncio.sleep(0)
     projects_dict: ProjDict = {}
-    tasks = []
-    for db_record in db.read_db():
-        task = asyncio.create_task(read_proj(record=db_record))
-        tasks.append(task)
-
-    projects_list: list[Proj] = await asyncio.gather(*tasks)
-    for proj in projects_list:
+    for proj in iter_managed(list(db.read_db()), on_late=on_late):
         projects_dict[proj.name] = proj
     return projects_dict
 
 
-async def read_non_managed(managed: ProjDict) -> StrListDict:
-    """Read non-managed projects directories."""
-    dirs = config.dirs()
+def iter_managed(
+    records: list[StrList], on_late: Callable[[Proj], None] | None = None
+) -> Iterator[Proj]:
+    """Read managed projects, yielding them in records order as they are read.
 
-    non_managed: StrListDict = {}
-    for group, path in dirs.items():
-        non_managed[group] = []
-        for name in os.listdir(path):
-            if name not in managed and os.path.isdir(os.path.join(path, name)):
-                non_managed[group].append(name)
+    Reads run in the configured pool, up to `STREAM_WINDOW` projects per worker
+    ahead of the last project yielded, so one slow project holds back only
+    the output, not the reads after it.
+
+    With the thread executor, a project that takes longer than `config.read_timeout`,
+    or is not read within `config.ls_timeout`, is yielded from its last cached info
+    and marked stale. Its read goes on in the background and on_late is called
+    with the project once it is done.
+
+    Projects unchanged since the last full read are taken from the snapshot,
+    see `snapshot`. The snapshot is written again once all projects are read.
+    """
+    executor = config.executor()
+    remote_filter = remote_filter_from_config()
+    entries = snapshot.load()
+    done: list[_Loaded] = []
+    if executor == config.NO_EXECUTOR or not records:
+        for record in records:
+            loaded = _load_or_lookup(record, entries.get(record[0]), remote_filter)
+            done.append(loaded)
+            yield loaded.proj
+        caches.save()
+        _update_snapshot(entries, done)
+        return
+
+    timed = executor == config.THREAD_EXECUTOR
+    deadline = time.monotonic() + config.ls_timeout()
+    read_timeout = config.read_timeout()
+    workers = min(config.workers(), len(records))
+    todo = iter(records)
+    pending: deque[tuple[_Read, Future[_Loaded]]] = deque()
+    pool = _create_pool(executor, workers)
+
+    def submit(record: StrList) -> None:
+        read = _Read(record, entries.get(record[0]), remote_filter)
+        if timed:
+            pending.append((read, pool.submit(read.run)))
+        else:
+            pending.append((read, pool.submit(_load_or_lookup, record, read.entry, remote_filter)))
+
+    late = _LateReads(entries, done, on_late)
+    try:
+        for record in itertools.islice(todo, workers * STREAM_WINDOW):
+            submit(record)
+        while pending:
+            read, future = pending.popleft()
+            result = read.wait(future, deadline, read_timeout) if timed else future.result()
+            for record in itertools.islice(todo, 1):
+                submit(record)
+            if result is None:
+                logger.warning(f"Reading {read.record[0]} timed out, showing cached info")
+                proj = peek_proj(read.record)
+                proj.stale = True
+                late.add(future)
+                yield proj
+                continue
+            if executor == config.PROCESS_EXECUTOR and not result.from_snapshot:
+                # workers cache in their own memory, collect their results here
+                _store_caches(result.proj, remote_filter)
+            done.append(result)
+            yield result.proj
+    finally:
+        # timed out reads go on in the background
+        pool.shutdown(wait=not timed)
+    caches.save()
+    late.close()
+
+
+def _store_caches(proj: Proj, remote_filter: git_refs.RemoteFilter) -> None:
+    """Cache the git and local config data of a project read in another process."""
+    proj_path = Path(proj.path) / proj.name
+    if proj.git:
+        caches.store_git(proj_path, proj.git, remote_filter)
+    if proj.local_config:
+        caches.store_local_config(proj_path / const.LOCAL_CONFIG_NAME, proj.local_config)
+
+
+def _update_snapshot(entries: snapshot.Entries, done: list[_Loaded]) -> None:
+    """Write the snapshot and the completion index of a full read, if anything changed."""
+    new_entries = {
+        loaded.proj.name: snapshot.entry(loaded.proj, loaded.signature)
+        for loaded in done
+        # like the git cache, skip the projects modified just now
+        if loaded.proj.name != MISSING and not caches.is_racy(loaded.signature)
+    }
+    found = [loaded for loaded in done if loaded.proj.name != MISSING]
+    if new_entries == entries and all(loaded.from_snapshot for loaded in found):
+        return
+    from pm import completion
+
+    completion.update_index(loaded.proj for loaded in found)
+    if new_entries != entries:
+        snapshot.save(new_entries)
+
+
+async def read_non_managed(managed: Container[str]) -> dict[str, Discovered]:
+    """Read non-managed projects directories.
+
+    Projects are discovered down to `config.scan_depth` and cached, see `scanner`.
+    """
+    await asyncio.sleep(0)
+    found = scanner.scan_dirs(
+        config.dirs(),
+        max_depth=config.scan_depth(),
+        ignore=config.scan_ignore(),
+        workers=config.workers(),
+    )
+    non_managed: dict[str, Discovered] = {}
+    for group, discovered in found.items():
+        non_managed[group] = {
+            name: kind for name, kind in discovered.items() if name not in managed
+        }
     return non_managed
 
 
@@ -195,6 +870,4 @@ async def read_non_managed(managed: ProjDict) -> StrListDict:
 def get_proj_manager() -> ProjManager:
     """Creates project manager."""
     config.get_config()
-    managed = asyncio.run(read_managed(), debug=True)
-    proj_man = ProjManager(managed=managed)
-    return proj_man
+    return ProjManager()
@@ -0,0 +1,172 @@
+"""Project dirs scanner.
+
+Discovers the projects in the configured project dirs, down to a max depth,
+and classifies them as `git` repos, `bare` repos or `plain` dirs. Descent stops
+at repos and plain dirs with no repos inside are listed as projects themselves,
+so `org/team/repo` is found while `docs/2023` is not.
+
+Results are cached in the `pm` home dir, keyed by the mtimes of the dirs
+listed and of the plain dirs classified, so an unchanged tree of repos costs
+one stat per listed dir. Turning a plain dir into a repo, e.g. by `git init`,
+updates its mtime. Repos are not stat'ed, so a repo that loses its `.git`
+stays cached as a repo until its parent dir changes.
+"""
+
+import fnmatch
+import logging
+import os
+import stat
+from collections.abc import Iterable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from pm import caches, profiling
+from pm.typedef import StrDict, StrList
+
+logger = logging.getLogger("pm")
+
+GIT = "git"
+BARE = "bare"
+PLAIN = "plain"
+
+# relative dir name to kind
+Discovered = StrDict
+
+
+def _is_dir(path: str) -> bool:
+    try:
+        return stat.S_ISDIR(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def classify(path: str) -> str:
+    """Returns the kind of a project dir, `git`, `bare` or `plain`."""
+    if os.path.lexists(os.path.join(path, ".git")):
+        return GIT
+    if os.path.isfile(os.path.join(path, "HEAD")) and _is_dir(os.path.join(path, "objects")):
+        return BARE
+    return PLAIN
+
+
+@dataclass(frozen=True)
+class _Walk:
+    """Discovery of the projects under a project dir."""
+
+    root: str
+    max_depth: int
+    ignore: tuple[str, ...]
+
+    def list(self, rel: str) -> tuple[int, StrList]:
+        """Returns the mtime and the sorted sub dir names of a dir."""
+        path = os.path.join(self.root, rel)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                names = [entry.name for entry in entries if entry.is_dir()]
+        except OSError as e:
+            logger.debug(f"Cannot list {path}: {e}")
+            return 0, []
+        names = [n for n in names if not any(fnmatch.fnmatch(n, p) for p in self.ignore)]
+        return mtime, sorted(names)
+
+    def visit(self, rel: str, depth: int) -> tuple[Discovered, dict[str, int]]:
+        """Discover the projects in a dir.
+
+        Returns:
+            The projects found and the mtimes of the dirs listed or classified plain
+        """
+        path = os.path.join(self.root, rel)
+        kind = classify(path)
+        if kind != PLAIN:
+            return {rel: kind}, {}
+        if depth >= self.max_depth:
+            return {rel: kind}, {rel: _mtime(path)}
+        mtime, names = self.list(rel)
+        found: Discovered = {}
+        visited = {rel: mtime}
+        for name in names:
+            sub_found, sub_visited = self.visit(f"{rel}/{name}", depth + 1)
+            found.update(sub_found)
+            visited.update(sub_visited)
+        if all(sub_kind == PLAIN for sub_kind in found.values()):
+            found = {rel: PLAIN}
+        return found, visited
+
+
+def _mtimes(root: str, dirs: Iterable[str]) -> list[int]:
+    return [_mtime(os.path.join(root, rel)) for rel in dirs]
+
+
+def discover(
+    root: str, max_depth: int = 1, ignore: Iterable[str] = (), pool: Executor | None = None
+) -> Discovered:
+    """Discover the projects in a project dir.
+
+    Args:
+        root: str, project dir
+        max_depth: int, depth to look for projects at, 1 for the direct sub dirs
+        ignore: patterns of dir names to skip
+        pool: Executor, to discover the sub dirs in parallel
+
+    Returns:
+        A dict, relative dir name to kind, sorted by name
+    """
+    walk = _Walk(root=root, max_depth=max(max_depth, 1), ignore=tuple(ignore))
+    key = f"{root}|{walk.max_depth}|{','.join(walk.ignore)}"
+    if entry := caches.dirs_cache.peek(key):
+        cached = caches.dirs_cache.get(key, _mtimes(root, entry["dirs"]))
+        if cached is not None:
+            return dict(cached["found"])
+
+    mtime, names = walk.list("")
+    results = (pool.map if pool else map)(lambda name: walk.visit(name, 1), names)
+    found: Discovered = {}
+    visited = {"": mtime}
+    for sub_found, sub_visited in results:
+        found.update(sub_found)
+        visited.update(sub_visited)
+    if not caches.is_racy(list(visited.values())):
+        data = {"dirs": list(visited), "found": found}
+        caches.dirs_cache.put(key, list(visited.values()), data)
+    return found
+
+
+def scan_dirs(
+    dirs: StrDict, max_depth: int = 1, ignore: Iterable[str] = (), workers: int = 8
+) -> dict[str, Discovered]:
+    """Discover the projects in every project dir group, in parallel.
+
+    Groups are discovered concurrently, each in its own thread, and the sub dirs
+    of every group in a shared pool, so a slow group does not hold up the others.
+
+    Args:
+        dirs: dict, group name to project dir
+        max_depth: int, depth to look for projects at, 1 for the direct sub dirs
+        ignore: patterns of dir names to skip
+        workers: int, max number of threads listing the sub dirs
+
+    Returns:
+        A dict, group name to the projects found
+    """
+    ignore = tuple(ignore)
+    # separate pools, a group waits for its sub dirs and must not take their workers
+    with (
+        profiling.span("non-managed scan"),
+        ThreadPoolExecutor(workers, thread_name_prefix="pm-scan") as pool,
+        ThreadPoolExecutor(max(1, len(dirs)), thread_name_prefix="pm-scan-group") as group_pool,
+    ):
+        futures = {
+            group: group_pool.submit(discover, path, max_depth, ignore, pool)
+            for group, path in dirs.items()
+        }
+        found = {group: future.result() for group, future in futures.items()}
+    caches.dirs_cache.save()
+    return found
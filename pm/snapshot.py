@@ -0,0 +1,114 @@
+"""Snapshot of the managed projects, for fast startup.
+
+After every full read of the managed projects, their local configs and
+Git models are written to a single marshal file in the `pm` home dir,
+together with a signature of each project. The next run loads it with one
+read and uses an entry only while the signature of its project is unchanged.
+Signatures are made of `stat` calls only, see `signature`.
+"""
+
+import logging
+import marshal
+import os
+from pathlib import Path
+from typing import Any
+
+from pm import caches, const, git_refs
+from pm.models import Git, Proj, Worktree
+
+logger = logging.getLogger("pm")
+
+SNAPSHOT_FILE = Path(const.PM_DIR / "snapshot.bin")
+# bump on changes of the entries layout or the Proj, Git and Worktree models
+VERSION = 2
+
+# project name to (path, signature, local config, git)
+Entries = dict[str, tuple[Any, ...]]
+
+
+def signature(proj_path: Path, remote_filter: git_refs.RemoteFilter) -> caches.Signature:
+    """Signature of a project, made of its git signature and local config signature."""
+    sig = caches.local_config_signature(os.path.join(proj_path, const.LOCAL_CONFIG_NAME)) or [0]
+    if git_dir := git_refs.find_git_dir(proj_path):
+        sig.extend(caches.git_signature(git_dir, remote_filter))
+    else:
+        # plain dir or gone
+        sig.append(int(os.path.isdir(proj_path)))
+    return sig
+
+
+def _encode_git(git: Git) -> tuple[Any, ...]:
+    worktrees = [(wt.name, wt.path, wt.branch, wt.locked) for wt in git.worktree_details]
+    return (
+        git.active_branch,
+        git.branches,
+        git.remote_branches,
+        git.remote_counts,
+        git.worktrees,
+        git.is_bare,
+        worktrees,
+    )
+
+
+def _decode_git(data: tuple[Any, ...]) -> Git:
+    active_branch, branches, remote_branches, remote_counts, worktrees, is_bare, details = data
+    return Git(
+        active_branch=active_branch,
+        branches=branches,
+        remote_branches=remote_branches,
+        remote_counts=remote_counts,
+        worktrees=worktrees,
+        is_bare=is_bare,
+        worktree_details=[Worktree(*wt) for wt in details],
+    )
+
+
+def entry(proj: Proj, sig: caches.Signature) -> tuple[Any, ...]:
+    """Snapshot entry of a project read with signature sig."""
+    git = _encode_git(proj.git) if proj.git else None
+    return (proj.path, sig, proj.local_config, git)
+
+
+def lookup(data: tuple[Any, ...], proj: Proj, sig: caches.Signature) -> Proj | None:
+    """Returns proj with its local config and Git model from its entry, if up to date.
+
+    Args:
+        data: tuple, the snapshot entry of the project
+        proj: Proj, the project as in its database record
+        sig: Signature, the current signature of the project
+    """
+    if data[0] != proj.path or data[1] != sig:
+        return None
+    _, _, local_config, git = data
+    proj.local_config = dict(local_config)
+    proj.git = _decode_git(git) if git else None
+    return proj
+
+
+def load() -> Entries:
+    """Load the snapshot, empty if missing or invalid."""
+    try:
+        with open(SNAPSHOT_FILE, "rb") as fp:
+            version, entries = marshal.loads(fp.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.debug(f"Ignoring invalid snapshot {SNAPSHOT_FILE}: {e}")
+        return {}
+    if version != VERSION or not isinstance(entries, dict):
+        return {}
+    return entries
+
+
+def save(entries: Entries) -> None:
+    """Write the snapshot atomically."""
+    if not SNAPSHOT_FILE.parent.is_dir():
+        return
+    tmp_file = SNAPSHOT_FILE.with_name(f"{SNAPSHOT_FILE.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "wb") as fp:
+            fp.write(marshal.dumps((VERSION, entries)))
+        os.replace(tmp_file, SNAPSHOT_FILE)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to write snapshot {SNAPSHOT_FILE}: {e}")
+        tmp_file.unlink(missing_ok=True)
@@ -1,33 +1,21 @@
 """Project utilities."""
 
-import functools
 import logging
-import time
 from pathlib import Path
-from typing import Any, Callable, Iterable
+from typing import Any, Callable, Iterable, TypeVar
 
+from pm import profiling
 from pm.models import Cmd, Flag, Flags
-from pm.typedef import AnyDict, AnyList
-
-profiler: dict[str, float] = {}
+from pm.typedef import AnyList
 
+T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
 
 
-def timeit(fn: Callable[..., Any]) -> Callable[..., Any]:
-    """Decorator to time a function."""
-    global profiler
-
-    @functools.wraps(fn)
-    def wrapped(*args: Any, **kwargs: AnyDict) -> Any:
-        start = time.perf_counter()
-        result = fn(*args, **kwargs)
-        end = time.perf_counter()
-        profiler[fn.__name__] = max(end - start, profiler.get(fn.__name__, 0))
-        return result
-
-    return wrapped
+def timeit(fn: Callable[..., T]) -> Callable[..., T]:
+    """Decorator to time a function, recorded when running with `--profile`."""
+    return profiling.timed(fn)
 
 
 def expand_flag_name(flag: str) -> list[str]:
@@ -0,0 +1,370 @@
+"""File system watcher for cached project state.
+
+Watches the git refs and the local config of each project and the configured
+project dirs, and reports which projects and dirs changed since the last poll.
+Uses inotify on Linux, through ctypes, and falls back to polling mtimes.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pm import caches, const, git_refs
+
+logger = logging.getLogger("pm")
+
+# names in the git dir that change the Git model
+GIT_DIR_NAMES = {"HEAD", "packed-refs", "config", "refs", "worktrees"}
+# names in the project dir that change the project
+PROJ_DIR_NAMES = {const.LOCAL_CONFIG_NAME, ".git"}
+
+
+@dataclass
+class Invalidations:
+    """Changes found by a watcher poll.
+
+    Attributes:
+        projects: set with the names of the changed projects
+        added: dict, group name to new dir names
+        removed: dict, group name to removed dir names
+        everything: bool, True if events were lost and everything must be re-read
+    """
+
+    projects: set[str] = field(default_factory=set)
+    added: dict[str, set[str]] = field(default_factory=dict)
+    removed: dict[str, set[str]] = field(default_factory=dict)
+    everything: bool = False
+
+    def __bool__(self) -> bool:
+        """True, if anything changed."""
+        return bool(self.projects or self.added or self.removed or self.everything)
+
+
+class Watcher(abc.ABC):
+    """Watcher prototype."""
+
+    @abc.abstractmethod
+    def watch_project(self, name: str, proj_path: Path) -> None:
+        """Watch the git refs and the local config of a project."""
+
+    @abc.abstractmethod
+    def watch_root(self, group: str, path: Path) -> None:
+        """Watch a project dir for added and removed dirs."""
+
+    @abc.abstractmethod
+    def unwatch_project(self, name: str) -> None:
+        """Stop watching a project."""
+
+    @abc.abstractmethod
+    def poll(self) -> Invalidations:
+        """Returns the changes since the last poll, without blocking."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release the watcher resources."""
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _list_dirs(path: Path) -> set[str]:
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except OSError:
+        return set()
+
+
+class PollingWatcher(Watcher):
+    """Watcher comparing mtimes on every poll."""
+
+    def __init__(self) -> None:
+        self._projects: dict[str, tuple[Path, list[object]]] = {}
+        self._roots: dict[str, tuple[Path, tuple[int, int] | None, set[str]]] = {}
+
+    @staticmethod
+    def _project_state(proj_path: Path) -> list[object]:
+        git_dir = git_refs.find_git_dir(proj_path)
+        signature = caches.git_signature(git_dir) if git_dir else []
+        return [signature, _stamp(proj_path / const.LOCAL_CONFIG_NAME), proj_path.is_dir()]
+
+    def watch_project(self, name: str, proj_path: Path) -> None:
+        """Watch the git refs and the local config of a project."""
+        self._projects[name] = (proj_path, self._project_state(proj_path))
+
+    def watch_root(self, group: str, path: Path) -> None:
+        """Watch a project dir for added and removed dirs."""
+        self._roots[group] = (path, _stamp(path), _list_dirs(path))
+
+    def unwatch_project(self, name: str) -> None:
+        """Stop watching a project."""
+        self._projects.pop(name, None)
+
+    def poll(self) -> Invalidations:
+        """Returns the changes since the last poll."""
+        invalidations = Invalidations()
+        for name, (proj_path, state) in self._projects.items():
+            new_state = self._project_state(proj_path)
+            if new_state != state:
+                self._projects[name] = (proj_path, new_state)
+                invalidations.projects.add(name)
+        for group, (path, stamp, names) in self._roots.items():
+            new_stamp = _stamp(path)
+            if new_stamp == stamp:
+                continue
+            new_names = _list_dirs(path)
+            self._roots[group] = (path, new_stamp, new_names)
+            if added := new_names - names:
+                invalidations.added[group] = added
+            if removed := names - new_names:
+                invalidations.removed[group] = removed
+        return invalidations
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+_EVENT = struct.Struct("iIII")
+
+
+@dataclass
+class _Target:
+    """What a watched dir belongs to.
+
+    Attributes:
+        key: str, project name or group name
+        is_root: bool, True for a project dir group
+        names: set with the entry names to react to, None for any
+        recursive: bool, True to watch new sub dirs as well
+    """
+
+    key: str
+    is_root: bool = False
+    names: set[str] | None = None
+    recursive: bool = False
+
+
+class InotifyWatcher(Watcher):
+    """Watcher using Linux inotify.
+
+    Dirs that cannot be watched, e.g. when the watch limit is reached,
+    are handed to a polling watcher. Missing project dirs are checked again
+    on every poll, and a project is watched again when its `.git` changes
+    or its dir is removed.
+    """
+
+    def __init__(self, libc: ctypes.CDLL) -> None:
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._targets: dict[int, list[_Target]] = {}
+        self._paths: dict[int, Path] = {}
+        self._project_wds: dict[str, set[int]] = {}
+        self._root_names: dict[str, set[str]] = {}
+        self._proj_paths: dict[str, Path] = {}
+        self._missing: dict[str, Path] = {}
+        self._missing_roots: dict[str, Path] = {}
+        self._rewatch: set[str] = set()
+        self._fallback = PollingWatcher()
+
+    def _add_watch(self, path: Path, target: _Target) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err not in {errno.ENOENT, errno.ENOTDIR}:
+                logger.warning(f"Cannot watch {path}: {os.strerror(err)}")
+                return False
+            return True
+        self._targets.setdefault(wd, []).append(target)
+        self._paths[wd] = path
+        if not target.is_root:
+            self._project_wds.setdefault(target.key, set()).add(wd)
+        return True
+
+    def _add_tree(self, path: Path, target: _Target) -> bool:
+        watched = True
+        for dirpath, _, _ in os.walk(path):
+            watched &= self._add_watch(Path(dirpath), target)
+        return watched
+
+    def watch_project(self, name: str, proj_path: Path) -> None:
+        """Watch the git refs and the local config of a project."""
+        self.unwatch_project(name)
+        self._proj_paths[name] = proj_path
+        if not proj_path.is_dir():
+            self._missing[name] = proj_path
+            return
+        watched = self._add_watch(proj_path, _Target(name, names=PROJ_DIR_NAMES))
+        if git_dir := git_refs.find_git_dir(proj_path):
+            common_dir = git_refs.find_common_dir(git_dir)
+            watched &= self._add_watch(git_dir, _Target(name, names=GIT_DIR_NAMES))
+            if common_dir != git_dir:
+                watched &= self._add_watch(common_dir, _Target(name, names=GIT_DIR_NAMES))
+            for sub_dir in ("refs", "worktrees"):
+                watched &= self._add_tree(common_dir / sub_dir, _Target(name, recursive=True))
+        if not watched:
+            self.unwatch_project(name)
+            self._fallback.watch_project(name, proj_path)
+
+    def watch_root(self, group: str, path: Path) -> None:
+        """Watch a project dir for added and removed dirs."""
+        self._root_names[group] = _list_dirs(path)
+        if not path.is_dir():
+            self._missing_roots[group] = path
+            return
+        self._missing_roots.pop(group, None)
+        if not self._add_watch(path, _Target(group, is_root=True)):
+            self._fallback.watch_root(group, path)
+
+    def unwatch_project(self, name: str) -> None:
+        """Stop watching a project."""
+        self._fallback.unwatch_project(name)
+        self._proj_paths.pop(name, None)
+        self._missing.pop(name, None)
+        self._rewatch.discard(name)
+        for wd in self._project_wds.pop(name, set()):
+            targets = [t for t in self._targets.get(wd, []) if t.is_root or t.key != name]
+            if targets:
+                self._targets[wd] = targets
+                continue
+            self._targets.pop(wd, None)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _read_events(self) -> list[tuple[int, int, str]]:
+        events: list[tuple[int, int, str]] = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def poll(self) -> Invalidations:
+        """Returns the changes since the last poll."""
+        invalidations = self._fallback.poll()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                invalidations.everything = True
+                continue
+            if mask & IN_IGNORED:
+                self._targets.pop(wd, None)
+                self._paths.pop(wd, None)
+                continue
+            for target in list(self._targets.get(wd, [])):
+                self._handle_event(wd, mask, name, target, invalidations)
+        self._retry_missing(invalidations)
+        return invalidations
+
+    def _retry_missing(self, invalidations: Invalidations) -> None:
+        for name, proj_path in list(self._missing.items()):
+            if proj_path.is_dir():
+                self._rewatch.add(name)
+        for name in self._rewatch & self._proj_paths.keys():
+            self.watch_project(name, self._proj_paths[name])
+            invalidations.projects.add(name)
+        self._rewatch.clear()
+        for group, path in list(self._missing_roots.items()):
+            if path.is_dir():
+                self.watch_root(group, path)
+                if names := self._root_names[group]:
+                    invalidations.added.setdefault(group, set()).update(names)
+
+    def _handle_event(
+        self, wd: int, mask: int, name: str, target: _Target, invalidations: Invalidations
+    ) -> None:
+        is_dir = bool(mask & IN_ISDIR)
+        if target.is_root:
+            if not is_dir or not name:
+                return
+            names = self._root_names.setdefault(target.key, set())
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                names.add(name)
+                invalidations.added.setdefault(target.key, set()).add(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                names.discard(name)
+                invalidations.removed.setdefault(target.key, set()).add(name)
+            return
+        if name.endswith(".lock"):
+            return
+        if target.names is not None and name and name not in target.names:
+            return
+        if name == ".git" or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self._rewatch.add(target.key)
+        if target.recursive and is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+            self._add_tree(self._paths[wd] / name, target)
+        invalidations.projects.add(target.key)
+
+    def close(self) -> None:
+        """Release the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _load_libc() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+def create_watcher() -> Watcher:
+    """Create an inotify watcher, if available, or a polling watcher."""
+    if libc := _load_libc():
+        try:
+            return InotifyWatcher(libc)
+        except OSError as e:
+            logger.info(f"Using polling watcher, {e}")
+    return PollingWatcher()
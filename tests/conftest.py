@@ -0,0 +1,83 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from pm import caches, complete, config, const, db, db_sqlite, profiling, proj_manager, snapshot
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run a git command in cwd and return its output."""
+    cmd = [
+        "git",
+        "-c",
+        "user.name=pm",
+        "-c",
+        "user.email=pm@test",
+        "-c",
+        "init.defaultBranch=main",
+    ]
+    result = subprocess.run([*cmd, *args], cwd=cwd, check=True, capture_output=True, text=True)
+    return result.stdout
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    """Factory creating a git repo with one commit and optional branches."""
+
+    def _make_repo(name: str = "proj", branches: tuple[str, ...] = ()) -> Path:
+        path = tmp_path / name
+        path.mkdir(parents=True)
+        git(path, "init", "-q")
+        git(path, "commit", "-q", "--allow-empty", "-m", "init")
+        for branch in branches:
+            git(path, "branch", branch)
+        return path
+
+    return _make_repo
+
+
+@pytest.fixture(autouse=True)
+def pm_home(tmp_path, monkeypatch):
+    """Isolated `pm` home dir with default config and an empty database."""
+    pm_dir = tmp_path / ".pm"
+    projects_dir = tmp_path / "projects"
+    projects_dir.mkdir()
+    monkeypatch.setenv("PROJECTS_DIR", str(projects_dir))
+    monkeypatch.setattr(const, "PM_DIR", pm_dir)
+    monkeypatch.setattr(const, "DB_FILE", pm_dir / "db.csv")
+    monkeypatch.setattr(db, "DB_FILE", pm_dir / "db.csv")
+    monkeypatch.setattr(const, "DB_SQLITE_FILE", pm_dir / "db.sqlite3")
+    monkeypatch.setattr(db_sqlite, "DB_SQLITE_FILE", pm_dir / "db.sqlite3")
+    monkeypatch.setattr(config, "CONFIG_FILE", pm_dir / "pmconf.ini")
+    monkeypatch.setattr(snapshot, "SNAPSHOT_FILE", pm_dir / "snapshot.bin")
+    monkeypatch.setattr(complete, "INDEX_FILE", str(pm_dir / "completion.json"))
+    config.get_projects_dir.cache_clear()
+    config.get_config.cache_clear()
+    proj_manager.get_proj_manager.cache_clear()
+    config.create_config()
+    db.create_db()
+    yield pm_dir
+    config.get_projects_dir.cache_clear()
+    config.get_config.cache_clear()
+    proj_manager.get_proj_manager.cache_clear()
+    profiling.reset()
+
+
+# attributes of `pm.caches` holding a FileCache, with their file names
+FILE_CACHES = [
+    ("git_cache", "git-cache.json"),
+    ("dirs_cache", "dirs-cache.json"),
+    ("local_configs_cache", "local-configs.json"),
+]
+
+
+@pytest.fixture(autouse=True)
+def file_caches(pm_home, monkeypatch):
+    """Isolate the persistent caches from the user's home dir."""
+    isolated = {}
+    for attr, file_name in FILE_CACHES:
+        version = getattr(caches, attr).version
+        isolated[attr] = caches.FileCache(pm_home / file_name, version=version)
+        monkeypatch.setattr(caches, attr, isolated[attr])
+    return isolated
@@ -22,6 +22,7 @@ def isin_flags(actual: models.Flags, expect: tuple[str, Any]) -> bool:
         ("pm open proj_name worktree", "open", [], ["proj_name", "worktree"]),
         ("pm init", "init", [], []),
         ("pm add . -s foo", "add", [("s/short", "foo")], ["."]),
+        ("pm add a b c d e -s foo", "add", [("s/short", "foo")], ["a", "b", "c", "d", "e"]),
         ("pm cd proj_name", "cd", [], ["proj_name"]),
     ],
 )
@@ -80,3 +81,17 @@ def test_parse_flag(flag, argv, expect_val, expect_ndx_offset):
     actual = argparser.parse_flag(flag, argv, ndx)
     assert flag.val == expect_val
     assert actual == ndx + expect_ndx_offset
+
+
+@pytest.mark.parametrize(
+    "argv_str, expect_argv, expect_profile, expect_file",
+    [
+        ("pm ls -a", ["ls", "-a"], False, ""),
+        ("pm --profile", [], True, ""),
+        ("pm --profile ls", ["ls"], True, ""),
+        ("pm ls --profile=trace.json -a", ["ls", "-a"], True, "trace.json"),
+    ],
+)
+def test_parse_profile(argv_str, expect_argv, expect_profile, expect_file):
+    sys_argv = argv_str.split()
+    assert argparser.parse_profile(sys_argv[1:]) == (expect_argv, expect_profile, expect_file)
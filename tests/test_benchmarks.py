@@ -0,0 +1,52 @@
+"""Smoke tests of the benchmark suite."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.fleet import FleetSpec, age_fleet, make_fleet
+from pm import caches, git_refs, proj_manager
+from tests.test_startup import ROOT_DIR
+
+
+@pytest.mark.parametrize("bare_ratio", [0.0, 1.0])
+def test_fleet_repos_readable(tmp_path, bare_ratio):
+    spec = FleetSpec(n_projects=1, n_branches=4, n_remotes=2, bare_ratio=bare_ratio)
+    (name,) = make_fleet(tmp_path, spec)
+
+    actual = git_refs.read_git(tmp_path / name)
+
+    assert actual == proj_manager.read_repo_gitpython(tmp_path / name)
+    assert actual.active_branch == "main"
+    assert len(actual.branches) == 4
+    assert len(actual.remote_branches) == 2 * spec.n_remote_branches
+    assert actual.is_bare == bool(bare_ratio)
+
+
+def test_age_fleet(tmp_path):
+    (name,) = make_fleet(tmp_path, FleetSpec(n_projects=1, bare_ratio=0.0))
+
+    age_fleet(tmp_path)
+
+    git_dir = git_refs.find_git_dir(tmp_path / name)
+    assert not caches.is_racy(caches.git_signature(git_dir))
+
+
+def test_run_benchmarks(tmp_path):
+    output = tmp_path / "results.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--sizes", "3", "--repeat", "1"]
+        + ["--output", str(output)],
+        cwd=ROOT_DIR,
+        env={**os.environ, "PYTHONPATH": str(ROOT_DIR)},
+        check=True,
+        capture_output=True,
+    )
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert set(results["results"]["3"]) >= {"read_managed_cold", "render_table", "app_ls_warm"}
+    if sys.platform != "win32":
+        assert results["results"]["3"]["process_read_managed_cold"]["peak_rss_mb"] > 0
@@ -0,0 +1,119 @@
+"""Test caches.py."""
+
+import asyncio
+import os
+import time
+from unittest import mock
+
+from pm import caches, config, const, proj_manager
+from pm.models import Git, Worktree
+from tests.conftest import git
+
+
+def test_file_cache_roundtrip(tmp_path):
+    path = tmp_path / "cache.json"
+    file_cache = caches.FileCache(path, version=1)
+    file_cache.put("key", [1, 2], {"a": "b"})
+    file_cache.save()
+
+    reloaded = caches.FileCache(path, version=1)
+    assert reloaded.get("key", [1, 2]) == {"a": "b"}
+    assert reloaded.get("key", [1, 3]) is None
+    assert caches.FileCache(path, version=2).get("key", [1, 2]) is None
+
+
+def test_file_cache_ignores_corrupted_file(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert caches.FileCache(path, version=1).get("key", []) is None
+
+
+def test_read_repo_uses_cache(make_repo, monkeypatch):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    repo_path = make_repo(branches=("dev",))
+    git = asyncio.run(proj_manager.read_repo(repo_path))
+    assert git.branches == ["dev", "main"]
+
+    with mock.patch("pm.proj_manager._read_repo_backend") as read_mock:
+        cached = asyncio.run(proj_manager.read_repo(repo_path))
+    assert not read_mock.called
+    assert cached == git
+
+    caches.git_cache.save()
+    assert caches.git_cache.path.exists()
+
+
+def test_read_repo_recent_refs_not_cached(make_repo):
+    repo_path = make_repo()
+    asyncio.run(proj_manager.read_repo(repo_path))
+
+    with mock.patch("pm.proj_manager._read_repo_backend") as read_mock:
+        asyncio.run(proj_manager.read_repo(repo_path))
+    assert read_mock.called
+    assert not caches.git_cache.peek(str(repo_path))
+
+
+def test_read_repo_invalidated_on_ref_change(make_repo):
+    repo_path = make_repo()
+    asyncio.run(proj_manager.read_repo(repo_path))
+
+    git(repo_path, "branch", "feature/new")
+    actual = asyncio.run(proj_manager.read_repo(repo_path))
+    assert actual.branches == ["feature/new", "main"]
+
+    git(repo_path, "checkout", "-q", "feature/new")
+    actual = asyncio.run(proj_manager.read_repo(repo_path))
+    assert actual.active_branch == "feature/new"
+
+
+def test_git_cache_worktree_details(tmp_path):
+    git_model = Git(
+        active_branch="main",
+        worktree_details=[Worktree(name="dev", path="/p/dev", branch="dev", locked=True)],
+    )
+    caches.put_git(tmp_path, [1], git_model)
+    caches.git_cache.save()
+    caches.git_cache._entries = None
+
+    assert caches.get_git(tmp_path, [1]) == git_model
+    assert caches.peek_git(tmp_path) == git_model
+
+
+def test_read_repo_invalidated_on_worktree_checkout(make_repo, tmp_path):
+    repo_path = make_repo(branches=("dev",))
+    worktree = tmp_path / "wt"
+    git(repo_path, "worktree", "add", "-q", str(worktree), "dev")
+    asyncio.run(proj_manager.read_repo(repo_path))
+
+    git(worktree, "checkout", "-q", "--detach")
+    actual = asyncio.run(proj_manager.read_repo(repo_path))
+    assert actual.worktree_details[0].branch == ""
+
+
+def _age(path):
+    os.utime(path, ns=(0, time.time_ns() - 2 * caches.RACY_NS))
+
+
+def test_read_local_config_cached(tmp_path):
+    config.write_local_config(tmp_path, {"description": "Cached", "lang": "py"})
+    config_file = tmp_path / const.LOCAL_CONFIG_NAME
+    _age(config_file)
+    assert config.read_local_config(tmp_path) == {"description": "Cached", "lang": "py"}
+
+    with mock.patch("pm.config.ConfigParser") as parser_mock:
+        assert config.read_local_config(tmp_path)["lang"] == "py"
+    assert not parser_mock.called
+    caches.local_configs_cache.save()
+    assert caches.FileCache(caches.local_configs_cache.path, version=1).peek(str(config_file))
+
+    config_file.write_text("[project]\nlang = rust\n", encoding="utf-8")
+    _age(config_file)
+    assert config.read_local_config(tmp_path) == {"lang": "rust"}
+    assert caches.peek_local_config(config_file) == {"lang": "rust"}
+
+
+def test_read_local_config_racy(tmp_path):
+    config.write_local_config(tmp_path)
+
+    assert config.read_local_config(tmp_path)["lang"] == "na"
+    assert caches.local_configs_cache.peek(str(tmp_path / const.LOCAL_CONFIG_NAME)) is None
@@ -2,7 +2,8 @@ from unittest import mock
 
 import pytest
 
-from pm import commands
+from pm import argparser, caches, commands, config, db, proj_manager
+from pm.const import DbColumns
 
 
 class TestOpen:
@@ -51,3 +52,83 @@ class TestOpen:
         assert get_editor_mock.called
         assert cmd_mock.communicate.called
         assert popen_mock.called_with(f"ed {fake_proj_path}", shell=True)
+
+
+def test_ls_stream(make_repo, monkeypatch, capsys):
+    # widths are estimated from the cached projects, cache the new repos
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    make_repo(name="projects/repo", branches=("dev",))
+    make_repo(name="projects/other-repo")
+    db.add_record(record=("repo", "r", None, "", ""))
+    db.add_record(record=("other-repo", None, None, "", ""))
+
+    argparser.parse(["ls"]).run()
+    listing = capsys.readouterr().out
+    proj_manager.get_proj_manager.cache_clear()
+    argparser.parse(["ls", "-s"]).run()
+
+    assert capsys.readouterr().out == listing
+
+
+def test_add_many(tmp_path, capsys):
+    src = tmp_path / "src"
+    for name in ("one", "two", "three"):
+        (src / name).mkdir(parents=True)
+    (tmp_path / "other" / "one").mkdir(parents=True)
+    (src / "file").touch()
+    db.add_record(record=("three", None, None, "", ""))
+
+    argparser.parse(["add", f"{src}/*", str(tmp_path / "other" / "one"), str(src / "gone")]).run()
+
+    records = {record[0]: record for record in db.read_db()}
+    assert records.keys() == {"one", "two", "three"}
+    assert records["two"][2] == str(src)
+    assert (src / "one" / ".pm-cfg").exists()
+    assert not (src / "three" / ".pm-cfg").exists()
+    report = capsys.readouterr().out
+    assert "Added 2 projects" in report
+    assert report.count("Project 'three' already exists") == 1
+    assert report.count("Project 'one' already exists") == 1
+    assert "gone" in report
+
+
+def test_add_single_conflict(tmp_path):
+    (tmp_path / "src" / "one").mkdir(parents=True)
+    db.add_record(record=("other", "one", None, "", ""))
+
+    with pytest.raises(NameError, match="Short name 'one' already exists"):
+        argparser.parse(["add", str(tmp_path / "src" / "one")]).run()
+    with pytest.raises(ValueError, match="SHORT_NAME"):
+        argparser.parse(["add", "-s", "x", f"{tmp_path}/src/*", str(tmp_path)]).run()
+
+
+@pytest.mark.parametrize("argv", [["open", "-d", "repo", "dev"], ["open", "repo", "dev"]])
+def test_open_detached(make_repo, monkeypatch, argv):
+    repo = make_repo(name="projects/repo")
+    (repo / "dev").mkdir()
+    db.add_record(record=("repo", None, None, "", ""))
+    monkeypatch.setenv("EDITOR", "code --new-window")
+    if "-d" not in argv:
+        config.get_config()["sett"]["detach_editor"] = "true"
+
+    with mock.patch("subprocess.Popen") as popen_mock:
+        argparser.parse(argv).run()
+
+    (args,), kwargs = popen_mock.call_args
+    assert args == ["code", "--new-window", str(repo / "dev")]
+    assert kwargs["start_new_session"]
+    assert not popen_mock.return_value.communicate.called
+    (record,) = db.read_db()
+    assert record[DbColumns.recent_branch] == "dev"
+    assert record[DbColumns.datetime_opened]
+
+
+def test_open_detached_no_editor(make_repo, monkeypatch):
+    make_repo(name="projects/repo")
+    db.add_record(record=("repo", None, None, "", ""))
+    monkeypatch.delenv("EDITOR", raising=False)
+
+    with mock.patch("subprocess.Popen") as popen_mock, pytest.raises(ValueError, match="EDITOR"):
+        argparser.parse(["open", "-d", "repo"]).run()
+
+    popen_mock.assert_not_called()
@@ -0,0 +1,81 @@
+import pytest
+
+from pm import argparser, complete, completion, config, db, proj_manager
+from tests.conftest import git
+
+
+@pytest.fixture
+def index(make_repo):
+    repo = make_repo(name="projects/repo")
+    git(repo, "worktree", "add", "-q", "feature")
+    make_repo(name="projects/other")
+    db.add_record(record=("repo", "r", None, "", ""))
+    db.add_record(record=("other", None, None, "", ""))
+    proj_manager.get_proj_manager().get_managed()
+    return complete.load_index()
+
+
+@pytest.mark.parametrize(
+    "words, expected",
+    [
+        (["pm", ""], ["ls", "cd", "open", "add", "init", "daemon", "completion"]),
+        (["pm", "o"], ["open"]),
+        (["pm", "-"], ["-h", "--help", "-V", "--version", "--profile"]),
+        (["pm", "open", ""], ["other", "r", "repo"]),
+        (["pm", "open", "re"], ["repo"]),
+        (["pm", "open", "repo", ""], ["feature"]),
+        (["pm", "open", "r", "f"], ["feature"]),
+        (["pm", "open", "other", ""], []),
+        (["pm", "open", "repo", "feature", ""], []),
+        (["pm", "daemon", "st"], ["start", "stop", "status"]),
+        (["pm", "completion", "z"], ["zsh"]),
+        (["pm", "ls", "--st"], ["--stream"]),
+        (["pm", "add", "-s", ""], []),
+        (["pm", "add", "-s", "x", "--mis"], []),
+    ],
+)
+def test_complete(index, words, expected):
+    assert complete.complete(words, index) == expected
+
+
+def test_complete_dirs(tmp_path, monkeypatch):
+    (tmp_path / "alpha").mkdir()
+    (tmp_path / "beta").mkdir()
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / "afile").touch()
+    monkeypatch.chdir(tmp_path)
+
+    completion.update_index()
+    index = complete.load_index()
+
+    assert complete.complete(["pm", "add", ""], index) == ["alpha/", "beta/", "projects/"]
+    assert complete.complete(["pm", "add", "a"], index) == ["alpha/"]
+    assert complete.complete(["pm", "add", "."], index) == [".hidden/", ".pm/"]
+
+
+def test_index_updated_on_add_proj(make_repo):
+    make_repo(name="projects/repo")
+    assert complete.load_index() == {}
+
+    proj_manager.ProjManager().add_proj(name="repo", short="r", path=config.get_projects_dir())
+
+    assert complete.load_index()["projects"] == {"repo": ["r", []]}
+
+
+def test_invalid_index(pm_home):
+    (pm_home / "completion.json").write_text("{not json")
+
+    assert complete.load_index() == {}
+    assert complete.complete(["pm", ""], {}) == []
+
+
+def test_completion_command(capsys):
+    argparser.parse(["completion", "bash"]).run()
+
+    assert capsys.readouterr().out == completion.script("bash")
+    assert "completion" in complete.load_index()["commands"]
+
+
+def test_completion_command_invalid_shell():
+    with pytest.raises(ValueError):
+        argparser.parse(["completion", "tcsh"]).run()
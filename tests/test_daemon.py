@@ -0,0 +1,147 @@
+"""Test daemon.py."""
+
+import threading
+from unittest import mock
+
+import pytest
+
+from pm import cli, commands, config, daemon, db, proj_manager
+from tests.conftest import git
+
+
+@pytest.fixture
+def server():
+    with daemon.DaemonServer(daemon.socket_file()) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+@pytest.fixture
+def repo(make_repo):
+    make_repo(name="projects/repo", branches=("dev",))
+    db.add_record(record=("repo", "r", None, "", ""))
+
+
+def test_ls(server, repo, make_repo):
+    assert "repo" in daemon.run_ls([])
+
+    # database changes are picked up
+    make_repo(name="projects/other")
+    db.add_record(record=("other", None, None, "", ""))
+    out = daemon.run_ls(["ls", "-a"])
+    assert "other" in out
+    assert "repo" in out
+
+
+def test_ls_error(server, repo):
+    with pytest.raises(ValueError, match="Project missing not found"):
+        daemon.run_ls(["ls", "missing"])
+
+
+def test_find_proj(server, repo):
+    proj = daemon.find_proj("r")
+    assert proj.name == "repo"
+    assert proj.path == config.get_projects_dir()
+    assert daemon.find_proj("missing") is None
+
+
+def test_complete(server, repo, tmp_path):
+    (tmp_path / "projects" / "readme-site").mkdir()
+    assert daemon.complete("re") == ["readme-site", "repo"]
+
+
+def test_cli_runs_ls_in_daemon(server, repo, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["pm", "ls"])
+    with mock.patch.object(daemon, "run_ls", wraps=daemon.run_ls) as run_ls_mock:
+        cli.app()
+    assert run_ls_mock.called
+    assert "repo" in capsys.readouterr().out
+
+
+def test_ls_worktree_runs_in_process(server, repo, tmp_path, monkeypatch):
+    (tmp_path / "projects" / "repo" / "wt").mkdir()
+    with pytest.raises(ValueError, match="Daemon cannot run"):
+        daemon.run_ls(["ls", "repo", "wt"])
+
+    monkeypatch.setattr("sys.argv", ["pm", "ls", "repo", "wt"])
+    with (
+        mock.patch.object(daemon, "run_ls") as run_ls_mock,
+        mock.patch("subprocess.Popen") as popen_mock,
+    ):
+        popen_mock.return_value.communicate.return_value = None, None
+        cli.app()
+    assert not run_ls_mock.called
+    assert str(tmp_path / "projects" / "repo" / "wt") in popen_mock.call_args.args[0]
+
+
+def test_unavailable_daemon_falls_back(repo, monkeypatch, capsys):
+    daemon.socket_file().touch()
+    assert not daemon.is_running()
+    with pytest.raises(daemon.DaemonUnavailableError):
+        daemon.run_ls([])
+
+    monkeypatch.setattr("sys.argv", ["pm", "ls"])
+    cli.app()
+    assert "repo" in capsys.readouterr().out
+
+
+def test_stop(repo):
+    with daemon.DaemonServer(daemon.socket_file()) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        daemon.stop()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+
+def test_create_cmd_copies_flags():
+    first = commands.create_cmd("ls")
+    first.flags[0].val = True
+    assert commands.create_cmd("ls").flags[0].val is False
+
+
+def test_ls_reads_changed_projects(server, repo, make_repo):
+    other = make_repo(name="projects/other")
+    db.add_record(record=("other", None, None, "", ""))
+    assert "other" in daemon.run_ls([])
+
+    git(other, "checkout", "-q", "-b", "topic")
+    with mock.patch("pm.proj_manager.load_proj", wraps=proj_manager.load_proj) as load_proj_mock:
+        out = daemon.run_ls([])
+    assert "topic" in out
+    assert [c.kwargs["record"][0] for c in load_proj_mock.call_args_list] == ["other"]
+
+
+def test_db_update_keeps_warm_manager(server, repo, make_repo):
+    daemon.run_ls([])
+    proj_mgr = proj_manager.get_proj_manager()
+    project_watcher = server.daemon._watcher
+
+    db.update_record(record=("repo", "r", None, "2024-01-02 03:04:05", "dev"))
+    make_repo(name="projects/other")
+    db.add_record(record=("other", None, None, "", ""))
+    with mock.patch("pm.proj_manager.load_proj", wraps=proj_manager.load_proj) as load_proj_mock:
+        assert "other" in daemon.run_ls([])
+
+    assert proj_manager.get_proj_manager() is proj_mgr
+    assert server.daemon._watcher is project_watcher
+    assert [c.kwargs["record"][0] for c in load_proj_mock.call_args_list] == ["other"]
+    assert proj_mgr.get_managed()["repo"].recent_branch == "dev"
+
+
+def test_warm_up(repo):
+    project_daemon = daemon.Daemon()
+    project_daemon.warm_up()
+    project_daemon.close()
+
+    assert proj_manager.get_proj_manager().managed is not None
+
+
+def test_ls_timeout_from_config(server, repo):
+    config.get_config()["sett"]["ls_timeout"] = "30"
+    with mock.patch.object(daemon, "request", wraps=daemon.request) as request_mock:
+        daemon.run_ls([])
+    assert request_mock.call_args.kwargs["timeout"] == 30 + daemon.CLIENT_TIMEOUT
@@ -0,0 +1,112 @@
+"""Test db.py."""
+
+import multiprocessing
+import sqlite3
+import sys
+import threading
+from unittest import mock
+
+import pytest
+
+from pm import config, db, db_sqlite
+
+
+@pytest.fixture(params=[config.CSV_BACKEND, config.SQLITE_BACKEND])
+def backend(request):
+    config.get_config()["sett"]["db_backend"] = request.param
+    db.create_db()
+    return request.param
+
+
+def test_add_and_update_record(backend):
+    db.add_record(record=("foo", None, None, "", ""))
+    db.add_record(record=("bar", "b", "/src", "", ""))
+    db.update_record(record=("foo", "foo", "", "2024-01-02 03:04:05", "dev"))
+
+    assert list(db.read_db()) == [
+        ["foo", "", "", "2024-01-02 03:04:05", "dev"],
+        ["bar", "b", "/src", "", ""],
+    ]
+
+
+def test_sqlite_migrates_csv_records():
+    db.add_record(record=("foo", "f", None, "2024-01-02 03:04:05", "main"))
+    db.add_record(record=("bar", None, "/src", "", ""))
+    csv_records = list(db.read_db())
+    assert not db_sqlite.DB_SQLITE_FILE.exists()
+
+    config.get_config()["sett"]["db_backend"] = config.SQLITE_BACKEND
+
+    assert list(db.read_db()) == csv_records
+    assert db_sqlite.DB_SQLITE_FILE.exists()
+    # migration is one-shot
+    db.DB_FILE.write_text("", encoding="utf-8")
+    assert list(db.read_db()) == csv_records
+
+
+def _write(ndx: int) -> None:
+    db.add_record(record=(f"proj{ndx:03}", None, None, "", ""))
+    db.update_record(record=(f"proj{ndx:03}", "", "", "2024-01-02 03:04:05", f"b{ndx}"))
+    db.update_record(record=("shared", "", "", "2024-01-02 03:04:05", f"b{ndx}"))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="forks the writers")
+def test_concurrent_writers(backend):
+    db.add_record(record=("shared", None, None, "", ""))
+    ctx = multiprocessing.get_context("fork")
+    writers = [ctx.Process(target=_write, args=(ndx,)) for ndx in range(200)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert all(writer.exitcode == 0 for writer in writers)
+    records = {record[0]: record for record in db.read_db()}
+    assert len(records) == 201
+    assert all(records[f"proj{ndx:03}"][4] == f"b{ndx}" for ndx in range(200))
+    assert not list(db.DB_FILE.parent.glob("*.tmp"))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no shared lock on Windows")
+def test_readers_share_the_lock():
+    db.create_db()
+    db.add_record(record=("proj", None, None, "", ""))
+    reader = threading.Thread(target=lambda: list(db.read_db()), daemon=True)
+
+    # a reader holding the lock does not block another one
+    with db._locked(shared=True):
+        reader.start()
+        reader.join(timeout=5)
+
+    assert not reader.is_alive()
+
+
+def test_queries(backend):
+    db.add_record(record=("foo", None, None, "2024-01-02 03:04:05", ""))
+    db.add_record(record=("bar", "b", "/src", "2024-03-02 03:04:05", "dev"))
+    db.add_record(record=("baz", None, None, "", ""))
+    db.add_record(record=("b", "foo", None, "", ""))
+
+    assert db.find_record("bar")[0] == "bar"
+    assert db.find_record("b")[0] == "bar"
+    assert db.find_record("foo")[0] == "foo"
+    assert db.find_record("baz")[0] == "baz"
+    assert db.find_record("missing") is None
+    assert [record[0] for record in db.read_recent(5)] == ["bar", "foo"]
+    assert [record[0] for record in db.read_recent(1)] == ["bar"]
+
+
+def test_sqlite_created_complete():
+    db.add_record(record=("foo", None, None, "", ""))
+    config.get_config()["sett"]["db_backend"] = config.SQLITE_BACKEND
+
+    # a failed migration leaves no database behind
+    with (
+        mock.patch.object(db_sqlite, "_insert", side_effect=sqlite3.OperationalError),
+        pytest.raises(sqlite3.OperationalError),
+    ):
+        db.create_db()
+    assert not db_sqlite.DB_SQLITE_FILE.exists()
+    assert not list(db_sqlite.DB_SQLITE_FILE.parent.glob("*.tmp"))
+
+    assert [record[0] for record in db.read_db()] == ["foo"]
@@ -0,0 +1,143 @@
+"""Test git_refs.py."""
+
+import pytest
+
+from pm import git_refs, proj_manager
+from tests.conftest import git
+
+
+@pytest.fixture
+def cloned_repo(make_repo, tmp_path):
+    """Clone with remote refs, local branches and packed refs."""
+    origin = make_repo("origin", branches=("develop", "feature/a"))
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "-q", str(origin), str(clone))
+    git(clone, "branch", "loose")
+    git(clone, "pack-refs", "--all")
+    git(clone, "branch", "feature/loose")
+    return clone
+
+
+def assert_same_as_gitpython(path):
+    actual = git_refs.read_git(path)
+    expect = proj_manager.read_repo_gitpython(path)
+    assert actual == expect
+    return actual
+
+
+def test_read_git_non_bare(cloned_repo):
+    actual = assert_same_as_gitpython(cloned_repo)
+    assert actual.active_branch == "main"
+    assert actual.branches == ["feature/loose", "loose", "main"]
+    assert actual.remote_branches == [
+        "origin/HEAD",
+        "origin/develop",
+        "origin/feature/a",
+        "origin/main",
+    ]
+    assert not actual.is_bare
+
+
+def test_read_git_bare(cloned_repo, tmp_path):
+    bare = tmp_path / "bare"
+    git(tmp_path, "clone", "-q", "--bare", str(cloned_repo), str(bare))
+    git(bare, "worktree", "add", "-q", str(bare / "loose"), "loose")
+
+    actual = assert_same_as_gitpython(bare)
+    assert actual.is_bare
+    assert actual.worktrees == ["loose"]
+
+
+def test_read_git_worktree_details(cloned_repo, tmp_path):
+    bare = tmp_path / "bare"
+    git(tmp_path, "clone", "-q", "--bare", str(cloned_repo), str(bare))
+    git(bare, "worktree", "add", "-q", str(bare / "wt" / "dev"), "loose")
+    git(bare, "worktree", "add", "-q", "--lock", str(tmp_path / "outside"), "feature/loose")
+    git(bare, "worktree", "add", "-q", "--detach", str(bare / "gone"))
+    (bare / "gone" / ".git").unlink()
+
+    actual = assert_same_as_gitpython(bare)
+    assert actual.worktrees == ["gone", "outside", "wt/dev"]
+    assert [(wt.branch, wt.locked, wt.prunable) for wt in actual.worktree_details] == [
+        ("", False, True),
+        ("feature/loose", True, False),
+        ("loose", False, False),
+    ]
+    assert actual.worktree_details[2].path == str(bare / "wt" / "dev")
+
+    # checked on use, the worktree path is not in the signature of the repo
+    (bare / "wt" / "dev" / ".git").unlink()
+    assert actual.worktree_details[2].prunable
+
+
+def test_read_git_linked_worktree(cloned_repo, tmp_path):
+    worktree = tmp_path / "wt"
+    git(cloned_repo, "worktree", "add", "-q", str(worktree), "loose")
+
+    actual = assert_same_as_gitpython(worktree)
+    assert actual.active_branch == "loose"
+
+
+def test_read_git_detached_head(cloned_repo):
+    git(cloned_repo, "checkout", "-q", "--detach")
+    actual = assert_same_as_gitpython(cloned_repo)
+    assert actual.active_branch == ""
+
+
+def test_read_git_not_a_repo(tmp_path):
+    assert git_refs.find_git_dir(tmp_path) is None
+    assert git_refs.read_git(tmp_path) is None
+
+
+def test_iter_packed_refs_mmap(tmp_path, monkeypatch):
+    sha = "a" * 40
+    lines = ["# pack-refs with: peeled fully-peeled sorted"]
+    lines += [f"{sha} refs/heads/b{i}" for i in range(3)]
+    lines += [f"{sha} refs/tags/v1", f"^{sha}", f"{sha} refs/remotes/origin/b0"]
+    (tmp_path / "packed-refs").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    monkeypatch.setattr(git_refs, "MMAP_THRESHOLD", 1)
+
+    actual = list(git_refs.iter_packed_refs(tmp_path))
+    assert actual == ["refs/heads/b0", "refs/heads/b1", "refs/heads/b2", "refs/remotes/origin/b0"]
+
+
+@pytest.mark.parametrize(
+    "remote_filter, expect",
+    [
+        (git_refs.RemoteFilter(), ["origin/a", "origin/b", "origin/c", "up/a"]),
+        (git_refs.RemoteFilter(limit=2), ["origin/a", "origin/b"]),
+        (git_refs.RemoteFilter(limit=2, recent=True), ["up/a", "origin/c"]),
+        (git_refs.RemoteFilter(patterns=("*/a",)), ["origin/a", "up/a"]),
+    ],
+)
+def test_select_remotes(remote_filter, expect):
+    refs = iter(["origin/c", "up/a", "origin/a", "origin/b"])
+    mtimes = {"origin/c": 3, "up/a": 4}
+
+    actual, counts = git_refs.select_remotes(refs, remote_filter, lambda name: mtimes.get(name, 0))
+
+    assert actual == expect
+    assert counts == {"origin": 3, "up": 1}
+
+
+def test_read_git_remote_filter(cloned_repo):
+    git(cloned_repo, "update-ref", "refs/remotes/origin/hotfix", "HEAD")
+    remote_filter = git_refs.RemoteFilter(limit=2, recent=True)
+
+    actual = git_refs.read_git(cloned_repo, remote_filter)
+
+    assert actual == proj_manager.read_repo_gitpython(cloned_repo, remote_filter)
+    assert actual.remote_branches[0] == "origin/hotfix"
+    assert len(actual.remote_branches) == 2
+    assert actual.remote_counts == {"origin": 5}
+
+
+def test_read_git_interned_names(cloned_repo, tmp_path):
+    other = tmp_path / "other"
+    git(tmp_path, "clone", "-q", str(cloned_repo), str(other))
+
+    actual, other_actual = git_refs.read_git(cloned_repo), git_refs.read_git(other)
+
+    assert actual.branches[-1] is other_actual.branches[0] is actual.active_branch
+    assert actual.remote_branches[0] is other_actual.remote_branches[0]
+    assert not hasattr(actual, "__dict__")
@@ -0,0 +1,110 @@
+"""Test printer.py."""
+
+import io
+from unittest import mock
+
+from pm import printer
+from pm.models import Cell, Clr, Git, Proj, Worktree
+
+
+def _projects():
+    git = Git(
+        active_branch="main",
+        branches=["main", "dev", "feature/a", "feature/b"],
+        remote_branches=["origin/main"],
+        worktrees=[],
+        is_bare=True,
+    )
+    return {
+        "long-project": Proj(
+            name="long-project", short="lp", path="", git=git, recent_branch="dev"
+        ),
+        "p": Proj(name="p", short="p", path=""),
+    }
+
+
+def test_proj_to_printable_widths():
+    printable = printer.proj_to_printable(_projects()["long-project"])
+    assert printable.branches[0] == Cell(printer.clr(Clr.GREEN_FG, "*main"), 5)
+    assert printable.branches[1] == Cell(printer.clr(Clr.YELLOW_FG, "dev"), 3)
+    assert printable.branches[2] == Cell("feature/a", 9)
+    assert printable.remote_branches[0].width == len("[origin/main]")
+
+
+def test_print_table_single_write():
+    out = io.StringIO()
+    with mock.patch("sys.stdout", out), mock.patch.object(out, "write") as write_mock:
+        printer.print_table(printer.projects_to_table(_projects()))
+    write_mock.assert_called_once()
+
+
+def test_print_table_aligns_colored_cells(capsys):
+    printer.print_table(printer.projects_to_table(_projects()))
+    lines = capsys.readouterr().out.splitlines()
+
+    visible = lines
+    for color in Clr:
+        visible = [line.replace(color.value, "") for line in visible]
+    assert visible == [
+        "-" * 44,
+        "lp long-project b *main dev feature/a    ",
+        "                  feature/b [origin/main]",
+        " p p              " + " " * 23,
+        "-" * 44,
+    ]
+
+
+def test_print_table_stream_widens_columns(capsys):
+    projects = _projects().values()
+    table = printer.stream_projects_table(projects, widths=[2, 4, 1, 10], remotes=False)
+    printer.print_table_stream(table)
+    lines = capsys.readouterr().out.splitlines()
+
+    assert lines[0] == "-" * 40
+    assert lines[1].startswith("lp long-project b ")
+    assert lines[3] == " p " + "p".ljust(12) + "   " + " " * 19
+    assert lines[-1] == "-" * 40
+
+
+def test_stale_marker():
+    proj = _projects()["long-project"]
+    proj.stale = True
+    assert printer.proj_to_printable(proj).branches[0].text == printer.clr(Clr.GRAY_FG, "(stale)")
+    missing = Proj(name="p", short="p", path="", stale=True)
+    assert printer.proj_to_printable(missing).branches[0].width == len("(timed out)")
+
+
+def test_proj_to_printable_worktrees(tmp_path):
+    for name in ("dev", "wt/main"):
+        (tmp_path / name).mkdir(parents=True)
+        (tmp_path / name / ".git").touch()
+    git = Git(
+        active_branch="main",
+        branches=["main", "dev"],
+        worktrees=["dev", "gone", "wt/main"],
+        is_bare=True,
+        worktree_details=[
+            Worktree(name="dev", path=str(tmp_path / "dev"), branch="dev", locked=True),
+            Worktree(name="gone", path=str(tmp_path / "gone"), branch="gone"),
+            Worktree(name="wt/main", path=str(tmp_path / "wt/main"), branch="main"),
+        ],
+    )
+    printable = printer.proj_to_printable(Proj(name="p", short="p", path="", git=git))
+
+    assert printable.branches == [
+        Cell("dev" + printer.clr(Clr.GRAY_FG, " (locked)"), len("dev (locked)")),
+        Cell("gone" + printer.clr(Clr.GRAY_FG, " (prunable)"), len("gone (prunable)")),
+        Cell("wt/main" + printer.clr(Clr.GRAY_FG, ":main"), len("wt/main:main")),
+    ]
+
+
+def test_proj_to_printable_hidden_remotes():
+    git = Git(
+        active_branch="main",
+        remote_branches=["origin/main", "up/main"],
+        remote_counts={"origin": 30000, "up": 1},
+    )
+    printable = printer.proj_to_printable(Proj(name="p", short="p", path="", git=git))
+
+    assert printable.remote_branches[2] == printer.clr_cell(Clr.GRAY_FG, "[origin: +29999 more]")
+    assert len(printable.remote_branches) == 3
@@ -0,0 +1,61 @@
+import json
+import sys
+
+from pm import cli, db, profiling
+
+
+def test_span_disabled():
+    with profiling.span("config load"):
+        pass
+
+    assert not profiling.spans()
+
+
+def test_summary():
+    profiling.enable()
+    profiling.add_span("db read", profiling.PHASE, 1.0, 1.5)
+    profiling.add_span("repo", profiling.PROJECT, 1.5, 1.75)
+    profiling.add_span("other-repo", profiling.PROJECT, 1.5, 2.0)
+    with profiling.span("render"):
+        pass
+
+    actual = profiling.summary()
+
+    assert [row[:3] for row in actual[:2]] == [("db read", 1, 500.0), ("project read", 2, 750.0)]
+    assert actual[1][3] == 500.0
+    assert actual[2][:2] == ("render", 1)
+
+
+def test_write_trace(tmp_path):
+    profiling.enable()
+    profiling.add_span("db read", profiling.PHASE, 1.0, 1.5)
+    profiling.add_span("repo", profiling.PROJECT, 1.5, 1.75, path="/projects")
+    trace_file = tmp_path / "trace.json"
+
+    profiling.write_trace(str(trace_file))
+
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    assert [(e["name"], e["ph"], e["ts"], e["dur"]) for e in events] == [
+        ("db read", "X", 0.0, 500000.0),
+        ("repo", "X", 500000.0, 250000.0),
+    ]
+    assert events[1]["args"] == {"path": "/projects"}
+
+
+def test_app_profile(make_repo, tmp_path, monkeypatch, capsys):
+    make_repo(name="projects/repo")
+    make_repo(name="projects/other-repo")
+    db.add_record(record=("repo", "r", None, "", ""))
+    db.add_record(record=("other-repo", None, None, "", ""))
+    trace_file = tmp_path / "trace.json"
+    monkeypatch.setattr(sys, "argv", ["pm", f"--profile={trace_file}", "ls"])
+
+    cli.app()
+
+    captured = capsys.readouterr()
+    assert "other-repo" in captured.out
+    phases = [line.split()[0] for line in captured.err.splitlines()[3:] if line.strip()]
+    assert {"import", "db", "project", "render"} <= set(phases)
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    projects = {e["name"] for e in events if e["cat"] == profiling.PROJECT}
+    assert projects == {"repo", "other-repo"}
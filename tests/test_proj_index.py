@@ -0,0 +1,64 @@
+"""Test proj_index.py."""
+
+import pytest
+
+from pm.proj_index import ProjIndex
+
+
+@pytest.fixture
+def index():
+    index = ProjIndex()
+    for name, short in [("qspreadsheet", "qs"), ("qa-tools", ""), ("pm", ""), ("wake", "wk")]:
+        index.add([name, short, "", "", ""])
+    return index
+
+
+@pytest.mark.parametrize(
+    "name, expect",
+    [
+        ("qs", "qspreadsheet"),
+        ("qspreadsheet", "qspreadsheet"),
+        ("wk", "wake"),
+        ("wake", "wake"),
+        ("pm", "pm"),
+        ("qsp", None),
+    ],
+)
+def test_get(index, name, expect):
+    record = index.get(name)
+    assert (record[0] if record else None) == expect
+
+
+@pytest.mark.parametrize(
+    "prefix, expect",
+    [
+        ("qsp", "qspreadsheet"),
+        ("qa", "qa-tools"),
+        ("w", "wake"),
+        ("x", None),
+    ],
+)
+def test_find_unique_prefix(index, prefix, expect):
+    record = index.find_unique_prefix(prefix)
+    assert (record[0] if record else None) == expect
+
+
+def test_find_ambiguous_prefix(index):
+    with pytest.raises(ValueError, match="qa-tools, qspreadsheet"):
+        index.find_unique_prefix("q")
+
+
+def test_remove(index):
+    index.remove("qspreadsheet")
+    index.remove("missing")
+    assert index.get("qs") is None
+    assert index.keys_with_prefix("q") == ["qa-tools"]
+
+
+def test_keys_updated_after_lookup(index):
+    assert index.keys_with_prefix("q") == ["qa-tools", "qs", "qspreadsheet"]
+
+    index.add(["quarto", "", "", "", ""])
+    index.remove("qspreadsheet")
+
+    assert index.keys_with_prefix("q") == ["qa-tools", "quarto"]
@@ -0,0 +1,264 @@
+"""Test proj_manager.py."""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from pm import caches, config, db, proj_manager, snapshot
+from pm.models import Git
+from tests.conftest import git
+
+READ_LATENCY = 0.02
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    """Synthetic fleet of managed projects."""
+    projects_dir = Path(config.get_projects_dir())
+    names = [f"proj{i:02}" for i in range(16)]
+    for name in names:
+        (projects_dir / name).mkdir()
+        db.add_record(record=(name, None, None, "", ""))
+    return names
+
+
+def slow_load_repo(proj_path: Path) -> Git:
+    """Stand-in for a repo read on a slow, network mounted dir."""
+    time.sleep(READ_LATENCY)
+    return Git(active_branch="main", branches=["main"])
+
+
+def set_executor(executor: str, workers: int) -> None:
+    config.get_config()["sett"]["executor"] = executor
+    config.get_config()["sett"]["workers"] = str(workers)
+
+
+@pytest.mark.parametrize("executor", [config.THREAD_EXECUTOR, config.PROCESS_EXECUTOR])
+def test_read_managed_executors(make_repo, monkeypatch, executor):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    make_repo(name="projects/repo", branches=("dev",))
+    (Path(config.get_projects_dir()) / "plain").mkdir()
+    db.add_record(record=("repo", "r", None, "", ""))
+    db.add_record(record=("plain", None, None, "", ""))
+    set_executor(executor, workers=2)
+
+    projects = asyncio.run(proj_manager.read_managed())
+
+    assert list(projects) == ["repo", "plain"]
+    assert projects["repo"].short == "r"
+    assert projects["repo"].git.branches == ["dev", "main"]
+    assert projects["plain"].git is None
+    assert caches.git_cache.path.exists()
+
+
+def test_read_managed_parallel(fleet, monkeypatch):
+    monkeypatch.setattr(proj_manager, "load_repo", slow_load_repo)
+    set_executor(config.NO_EXECUTOR, workers=1)
+    serial = asyncio.run(proj_manager.read_managed())
+
+    # each read waits for 8 reads to run at once, serial reads would break the barrier
+    barrier = threading.Barrier(8, timeout=5)
+
+    def load_repo(proj_path):
+        barrier.wait()
+        return slow_load_repo(proj_path)
+
+    monkeypatch.setattr(proj_manager, "load_repo", load_repo)
+    set_executor(config.THREAD_EXECUTOR, workers=8)
+    parallel = asyncio.run(proj_manager.read_managed())
+
+    assert list(serial) == list(parallel) == fleet
+    assert not barrier.broken
+
+
+def test_invalid_executor():
+    config.get_config()["sett"]["executor"] = "fibers"
+    with pytest.raises(ValueError, match="Invalid executor"):
+        config.executor()
+
+
+def test_find_proj_reads_only_one_project(fleet, monkeypatch):
+    read_paths = []
+    monkeypatch.setattr(proj_manager, "load_repo", lambda proj_path: read_paths.append(proj_path))
+    db.add_record(record=("named", "nm", None, "", ""))
+    (Path(config.get_projects_dir()) / "named").mkdir()
+
+    proj_mgr = proj_manager.ProjManager()
+    proj = proj_mgr.find_proj("nm")
+
+    assert proj.name == "named"
+    assert read_paths == [Path(config.get_projects_dir()) / "named"]
+    assert proj_mgr.managed is None
+
+
+def test_find_proj_non_managed(tmp_path):
+    other = tmp_path / "other"
+    (other / "side").mkdir(parents=True)
+    config.get_config()["dirs"]["other"] = str(other)
+
+    proj = proj_manager.ProjManager().find_proj("side")
+
+    assert proj.name == "side"
+    assert proj.path == str(other)
+    assert proj_manager.ProjManager().find_proj("missing") is None
+
+
+def test_find_proj_by_prefix(fleet, tmp_path):
+    other = tmp_path / "other"
+    (other / "side-project").mkdir(parents=True)
+    config.get_config()["dirs"]["other"] = str(other)
+    proj_mgr = proj_manager.ProjManager()
+
+    assert proj_mgr.find_proj("proj07").name == "proj07"
+    assert proj_mgr.find_proj("side").name == "side-project"
+    with pytest.raises(ValueError, match="Ambiguous"):
+        proj_mgr.find_proj("proj")
+
+
+def test_add_proj_updates_index(fleet):
+    proj_mgr = proj_manager.ProjManager()
+    proj_mgr.get_non_managed()
+    new_path = Path(config.get_projects_dir()) / "new-proj"
+    new_path.mkdir()
+
+    proj_mgr.add_proj(name="new-proj", short="np", path=config.get_projects_dir())
+
+    assert proj_mgr.find_proj("np").name == "new-proj"
+    assert (new_path / ".pm-cfg").exists()
+    assert "new-proj" in proj_manager.ProjManager().index.by_name
+
+
+def test_find_proj_nested(tmp_path):
+    projects_dir = Path(config.get_projects_dir())
+    git(tmp_path, "init", "-q", str(projects_dir / "org" / "team-repo"))
+    config.get_config()["sett"]["scan_depth"] = "2"
+    proj_mgr = proj_manager.ProjManager()
+
+    assert proj_mgr.get_non_managed() == {"projects_dir": {"org/team-repo": "git"}}
+    assert proj_mgr.find_proj("org/team-repo").name == "org/team-repo"
+    proj = proj_mgr.find_proj("team-repo")
+    assert proj.name == "org/team-repo"
+    assert proj.git.active_branch
+
+
+def test_iter_managed_streams_in_order(fleet, monkeypatch):
+    read = []
+    others_read = threading.Event()
+
+    def load_repo(proj_path):
+        if proj_path.name == "proj00":
+            # the other projects are read while the first one is slow
+            assert others_read.wait(timeout=5)
+        read.append(proj_path.name)
+        if len(read) == len(fleet) - 1:
+            others_read.set()
+        return Git(active_branch="main", branches=["main"])
+
+    monkeypatch.setattr(proj_manager, "load_repo", load_repo)
+    set_executor(config.THREAD_EXECUTOR, workers=4)
+    proj_mgr = proj_manager.ProjManager()
+
+    projects = list(proj_mgr.iter_managed())
+
+    assert read[-1] == "proj00"
+    assert [proj.name for proj in projects] == fleet
+    assert list(proj_mgr.managed) == fleet
+
+
+def test_iter_managed_recent(fleet):
+    db.update_record(record=("proj03", None, None, "2024-01-02 10:00:00", ""))
+    db.update_record(record=("proj01", None, None, "2024-01-01 10:00:00", ""))
+    proj_mgr = proj_manager.ProjManager()
+
+    names = [proj.name for proj in proj_mgr.iter_managed(recent=True)]
+
+    assert names[-2:] == ["proj01", "proj03"]
+    assert list(proj_mgr.managed) == fleet
+    assert [proj.name for proj in proj_mgr.iter_managed(recent=True)] == names
+
+
+def test_read_timeout_shows_cached_info(fleet, monkeypatch):
+    release = threading.Event()
+    hung_path = Path(config.get_projects_dir()) / "proj03"
+
+    def load_repo(proj_path):
+        if proj_path == hung_path:
+            release.wait(timeout=5)
+            return Git(active_branch="fresh", branches=["fresh"])
+        return Git(active_branch="main", branches=["main"])
+
+    monkeypatch.setattr(proj_manager, "load_repo", load_repo)
+    caches.put_git(hung_path, [0], Git(active_branch="cached", branches=["cached"]))
+    set_executor(config.THREAD_EXECUTOR, workers=4)
+    config.get_config()["sett"]["read_timeout"] = "0.2"
+    proj_mgr = proj_manager.ProjManager()
+
+    managed = proj_mgr.get_managed()
+
+    assert managed["proj03"].stale
+    assert managed["proj03"].git.active_branch == "cached"
+    assert not any(proj.stale for name, proj in managed.items() if name != "proj03")
+
+    # the read goes on and replaces the stale project once done
+    release.set()
+    deadline = time.monotonic() + 5
+    while proj_mgr.get_managed()["proj03"].stale and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert proj_mgr.get_managed()["proj03"].git.active_branch == "fresh"
+
+
+def test_ls_timeout_bounds_latency(fleet, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(proj_manager, "load_repo", lambda proj_path: release.wait(timeout=5))
+    set_executor(config.THREAD_EXECUTOR, workers=2)
+    config.get_config()["sett"]["ls_timeout"] = "0.3"
+
+    projects = list(proj_manager.iter_managed(list(db.read_db())))
+    release.set()
+
+    # no read finished, the projects are shown without waiting for them
+    assert [proj.name for proj in projects] == fleet
+    assert all(proj.stale and proj.git is None for proj in projects)
+
+
+def test_late_reads_cached_at_exit(fleet, monkeypatch):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    release = threading.Event()
+    hung_path = Path(config.get_projects_dir()) / "proj03"
+
+    def load_repo(proj_path):
+        if proj_path == hung_path:
+            release.wait(timeout=5)
+        return Git(active_branch="main", branches=["main"])
+
+    monkeypatch.setattr(proj_manager, "load_repo", load_repo)
+    set_executor(config.THREAD_EXECUTOR, workers=4)
+    config.get_config()["sett"]["read_timeout"] = "0.2"
+
+    projects = list(proj_manager.iter_managed(list(db.read_db())))
+    assert [proj.name for proj in projects if proj.stale] == ["proj03"]
+    assert snapshot.load() == {}
+
+    release.set()
+    proj_manager.wait_late_reads(timeout=5)
+
+    assert sorted(snapshot.load()) == fleet
+
+
+def test_load_repo_remote_limits(make_repo):
+    repo_path = make_repo()
+    for i in range(3):
+        git(repo_path, "update-ref", f"refs/remotes/origin/r{i}", "HEAD")
+    # all remotes are kept by default
+    assert len(proj_manager.load_repo(repo_path).remote_branches) == 3
+
+    config.get_config()["sett"]["remote_limit"] = "2"
+    assert proj_manager.load_repo(repo_path).remote_branches == ["origin/r0", "origin/r1"]
+
+    config.get_config()["sett"]["remote_patterns"] = "origin/r2"
+    actual = proj_manager.load_repo(repo_path)
+    assert actual.remote_branches == ["origin/r2"]
+    assert actual.remote_counts == {"origin": 3}
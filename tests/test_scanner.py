@@ -0,0 +1,133 @@
+"""Test scanner.py."""
+
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from pm import caches, scanner
+from tests.conftest import git
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "root"
+    for name in ("b-proj", "a-proj"):
+        (root / name).mkdir(parents=True)
+    (root / "file.txt").write_text("text", encoding="utf-8")
+    return root
+
+
+def _age(*paths):
+    """Move the mtime of paths out of the racy window."""
+    for path in paths:
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns - 2 * caches.RACY_NS))
+
+
+def test_discover_cached(root):
+    _age(root, root / "a-proj", root / "b-proj")
+    assert scanner.discover(str(root)) == {"a-proj": "plain", "b-proj": "plain"}
+
+    with mock.patch("os.scandir") as scandir_mock:
+        assert scanner.discover(str(root)) == {"a-proj": "plain", "b-proj": "plain"}
+    scandir_mock.assert_not_called()
+
+    (root / "c-proj").mkdir()
+    assert list(scanner.discover(str(root))) == ["a-proj", "b-proj", "c-proj"]
+
+
+def test_discover_recent_not_cached(root):
+    scanner.discover(str(root))
+    with mock.patch("os.scandir", wraps=os.scandir) as scandir_mock:
+        scanner.discover(str(root))
+    scandir_mock.assert_called()
+
+
+def test_discover_missing(tmp_path):
+    assert scanner.discover(str(tmp_path / "missing")) == {}
+
+
+def test_discover_nested(tmp_path):
+    root = tmp_path / "root"
+    git(tmp_path, "init", "-q", str(root / "org" / "team" / "repo"))
+    git(tmp_path, "init", "-q", "--bare", str(root / "org" / "bare.git"))
+    (root / "org" / "team" / "repo" / "sub").mkdir()
+    (root / "notes" / "2023").mkdir(parents=True)
+    (root / "org" / "node_modules" / "dep" / ".git").mkdir(parents=True)
+    git(tmp_path, "init", "-q", str(root / "too" / "deep" / "down" / "repo"))
+
+    found = scanner.discover(str(root), max_depth=3, ignore=["node_modules"])
+
+    assert found == {
+        "notes": "plain",
+        "org/bare.git": "bare",
+        "org/team/repo": "git",
+        "too": "plain",
+    }
+    assert scanner.discover(str(root), max_depth=1) == {
+        "notes": "plain",
+        "org": "plain",
+        "too": "plain",
+    }
+
+
+def test_discover_nested_cached(tmp_path):
+    root = tmp_path / "root"
+    git(tmp_path, "init", "-q", str(root / "org" / "repo"))
+    _age(root, root / "org", root / "org" / "repo")
+    assert scanner.discover(str(root), max_depth=2) == {"org/repo": "git"}
+
+    (root / "org" / "new").mkdir()
+    git(tmp_path, "init", "-q", str(root / "org" / "new"))
+    assert scanner.discover(str(root), max_depth=2) == {"org/new": "git", "org/repo": "git"}
+
+
+def test_discover_plain_dir_turned_repo(root, tmp_path):
+    _age(root, root / "a-proj", root / "b-proj")
+    assert scanner.discover(str(root)) == {"a-proj": "plain", "b-proj": "plain"}
+
+    git(tmp_path, "init", "-q", str(root / "a-proj"))
+
+    assert scanner.discover(str(root)) == {"a-proj": "git", "b-proj": "plain"}
+
+
+def test_discover_repos_cached_with_one_stat(tmp_path):
+    root = tmp_path / "root"
+    for name in ("a-repo", "b-repo"):
+        git(tmp_path, "init", "-q", str(root / name))
+    _age(root)
+    assert scanner.discover(str(root)) == {"a-repo": "git", "b-repo": "git"}
+
+    with mock.patch.object(scanner, "_mtime", wraps=scanner._mtime) as mtime_mock:
+        assert scanner.discover(str(root)) == {"a-repo": "git", "b-repo": "git"}
+    mtime_mock.assert_called_once_with(os.path.join(str(root), ""))
+
+
+def test_scan_dirs_groups_concurrent(tmp_path):
+    dirs = {name: str(tmp_path / name) for name in ("slow", "fast")}
+    started = {name: threading.Event() for name in dirs}
+
+    def discover(root, *args):
+        name = os.path.basename(root)
+        started[name].set()
+        # each group waits for the other to start, serial groups would time out
+        other = "fast" if name == "slow" else "slow"
+        assert started[other].wait(timeout=5)
+        return {name: "plain"}
+
+    with mock.patch.object(scanner, "discover", side_effect=discover):
+        found = scanner.scan_dirs(dirs, workers=1)
+
+    assert found == {"slow": {"slow": "plain"}, "fast": {"fast": "plain"}}
+
+
+def test_scan_dirs(root, tmp_path):
+    other = tmp_path / "other"
+    (other / "side").mkdir(parents=True)
+    _age(root, root / "a-proj", root / "b-proj", other, other / "side")
+
+    found = scanner.scan_dirs({"root": str(root), "other": str(other)})
+
+    assert found == {"root": {"a-proj": "plain", "b-proj": "plain"}, "other": {"side": "plain"}}
+    assert caches.dirs_cache.path.exists()
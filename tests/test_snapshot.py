@@ -0,0 +1,99 @@
+"""Test snapshot.py."""
+
+import time
+from pathlib import Path
+from unittest import mock
+
+from pm import caches, config, db, proj_manager, snapshot
+from tests.conftest import git
+
+
+def _records():
+    return list(db.read_db())
+
+
+def test_full_read_writes_snapshot(make_repo, monkeypatch):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    make_repo(name="projects/repo", branches=("dev",))
+    make_repo(name="projects/other-repo")
+    db.add_record(record=("repo", "r", None, "", ""))
+    db.add_record(record=("other-repo", None, None, "", ""))
+
+    expect = list(proj_manager.iter_managed(_records()))
+
+    assert set(snapshot.load()) == {"repo", "other-repo"}
+    with mock.patch("pm.proj_manager.load_proj") as load_mock:
+        actual = list(proj_manager.iter_managed(_records()))
+    assert not load_mock.called
+    assert actual == expect
+
+
+def test_changed_project_read_again(make_repo, monkeypatch):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    repo = make_repo(name="projects/repo")
+    make_repo(name="projects/other-repo")
+    db.add_record(record=("repo", None, None, "", ""))
+    db.add_record(record=("other-repo", None, None, "", ""))
+    list(proj_manager.iter_managed(_records()))
+
+    git(repo, "branch", "feature/new")
+    with mock.patch("pm.proj_manager.load_proj", wraps=proj_manager.load_proj) as load_mock:
+        actual = {proj.name: proj for proj in proj_manager.iter_managed(_records())}
+
+    assert [call.args[0][0] for call in load_mock.call_args_list] == ["repo"]
+    assert actual["repo"].git.branches == ["feature/new", "main"]
+    assert snapshot.load()["repo"][3][1] == ["feature/new", "main"]
+
+
+def test_recent_project_not_saved(make_repo):
+    make_repo(name="projects/repo")
+    (Path(config.get_projects_dir()) / "plain").mkdir()
+    db.add_record(record=("repo", None, None, "", ""))
+    db.add_record(record=("plain", None, None, "", ""))
+
+    list(proj_manager.iter_managed(_records()))
+
+    assert set(snapshot.load()) == {"plain"}
+
+
+def test_record_fields_not_from_snapshot(make_repo):
+    make_repo(name="projects/repo")
+    db.add_record(record=("repo", None, None, "", ""))
+    list(proj_manager.iter_managed(_records()))
+
+    db.update_record(record=("repo", None, None, "2024-01-02 03:04:05", "main"))
+    (actual,) = proj_manager.iter_managed(_records())
+
+    assert (actual.last_opened.year, actual.recent_branch) == (2024, "main")
+
+
+def test_load_invalid_snapshot():
+    snapshot.SNAPSHOT_FILE.write_bytes(b"\x00garbage")
+    assert snapshot.load() == {}
+
+
+def test_stale_read_not_saved(make_repo, monkeypatch):
+    make_repo(name="projects/repo")
+    db.add_record(record=("repo", None, None, "", ""))
+    config.get_config()["sett"]["ls_timeout"] = "0.000001"
+    monkeypatch.setattr(proj_manager, "load_repo", lambda proj_path: time.sleep(0.2))
+
+    (actual,) = proj_manager.iter_managed(_records())
+
+    assert actual.stale
+    assert not snapshot.SNAPSHOT_FILE.exists()
+    proj_manager.wait_late_reads(timeout=5)
+
+
+def test_unchanged_snapshot_not_written(make_repo, monkeypatch):
+    monkeypatch.setattr(caches, "RACY_NS", 0)
+    make_repo(name="projects/repo")
+    db.add_record(record=("repo", None, None, "", ""))
+    db.add_record(record=("gone", None, None, "", ""))
+    list(proj_manager.iter_managed(_records()))
+    assert set(snapshot.load()) == {"repo"}
+
+    with mock.patch.object(snapshot, "save") as save_mock:
+        list(proj_manager.iter_managed(_records()))
+
+    save_mock.assert_not_called()
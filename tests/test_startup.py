@@ -0,0 +1,72 @@
+"""Startup import budget of the `pm` entry point."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# cumulative import time of `pm.cli`, in microseconds
+IMPORT_BUDGET_US = 100_000
+
+DEFERRED_MODULES = {
+    "asyncio",
+    "concurrent.futures",
+    "git",
+    "pm.proj_manager",
+    "sqlite3",
+    "subprocess",
+}
+
+
+def import_times(argv: list[str], tmp_path: Path) -> dict[str, int]:
+    """Run `pm` with `-X importtime` and return the cumulative import time per module."""
+    code = f"import sys; sys.argv[1:] = {argv!r}; from pm import cli; cli.app()"
+    env = {
+        **os.environ,
+        "HOME": str(tmp_path),
+        "USERPROFILE": str(tmp_path),
+        "PROJECTS_DIR": str(tmp_path),
+        "PYTHONPATH": str(ROOT_DIR),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("argv", [["-V"], ["-h"], ["init"]])
+def test_startup_imports(argv, tmp_path):
+    times = import_times(argv, tmp_path)
+
+    assert "pm.cli" in times
+    assert not DEFERRED_MODULES & times.keys()
+    assert times["pm.cli"] < IMPORT_BUDGET_US
+
+
+def test_complete_imports(tmp_path):
+    code = "import sys; sys.argv[1:] = ['pm', 'o']; from pm import complete; complete.main()"
+    env = {**os.environ, "HOME": str(tmp_path), "PYTHONPATH": str(ROOT_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = {line.split("|")[-1].strip() for line in result.stderr.splitlines()}
+    assert not {"pm.commands", "pm.config", "pm.db", *DEFERRED_MODULES} & modules
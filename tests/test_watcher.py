@@ -0,0 +1,128 @@
+"""Test watcher.py."""
+
+import shutil
+
+import pytest
+
+from pm import watcher
+from tests.conftest import git
+
+libc = watcher._load_libc()
+
+
+@pytest.fixture(params=["polling", "inotify"])
+def proj_watcher(request):
+    if request.param == "polling":
+        proj_watcher = watcher.PollingWatcher()
+    elif libc is None:
+        pytest.skip("inotify not available")
+    else:
+        proj_watcher = watcher.InotifyWatcher(libc)
+    yield proj_watcher
+    proj_watcher.close()
+
+
+def test_branch_changes(proj_watcher, make_repo):
+    repo = make_repo(name="projects/repo", branches=("dev",))
+    other = make_repo(name="projects/other")
+    proj_watcher.watch_project("repo", repo)
+    proj_watcher.watch_project("other", other)
+    assert not proj_watcher.poll()
+
+    git(repo, "branch", "feature/new")
+    assert proj_watcher.poll().projects == {"repo"}
+    assert not proj_watcher.poll()
+
+    git(repo, "checkout", "-q", "dev")
+    assert proj_watcher.poll().projects == {"repo"}
+
+    git(other, "pack-refs", "--all")
+    assert proj_watcher.poll().projects == {"other"}
+
+
+def test_local_config_changes(proj_watcher, make_repo):
+    repo = make_repo(name="projects/repo")
+    proj_watcher.watch_project("repo", repo)
+    (repo / "README.md").write_text("readme", encoding="utf-8")
+    assert not proj_watcher.poll()
+
+    (repo / ".pm-cfg").write_text("[sett]\n", encoding="utf-8")
+    assert proj_watcher.poll().projects == {"repo"}
+
+
+def test_removed_project(proj_watcher, make_repo):
+    repo = make_repo(name="projects/repo")
+    proj_watcher.watch_project("repo", repo)
+    shutil.rmtree(repo)
+    assert "repo" in proj_watcher.poll().projects
+
+    proj_watcher.unwatch_project("repo")
+    make_repo(name="projects/repo")
+    assert not proj_watcher.poll()
+
+
+def test_root_changes(proj_watcher, tmp_path):
+    root = tmp_path / "projects"
+    (root / "old").mkdir(parents=True)
+    proj_watcher.watch_root("projects", root)
+    (root / "file.txt").write_text("text", encoding="utf-8")
+    assert not proj_watcher.poll()
+
+    (root / "new").mkdir()
+    (root / "old").rmdir()
+    invalidations = proj_watcher.poll()
+    assert invalidations.added == {"projects": {"new"}}
+    assert invalidations.removed == {"projects": {"old"}}
+
+
+def test_missing_project(proj_watcher, make_repo, tmp_path):
+    proj_watcher.watch_project("repo", tmp_path / "projects/repo")
+    assert not proj_watcher.poll()
+
+    repo = make_repo(name="projects/repo")
+    assert proj_watcher.poll().projects == {"repo"}
+    assert not proj_watcher.poll()
+
+    git(repo, "branch", "feature/new")
+    assert proj_watcher.poll().projects == {"repo"}
+
+
+def test_git_dir_created(proj_watcher, tmp_path):
+    proj_path = tmp_path / "projects/repo"
+    proj_path.mkdir(parents=True)
+    proj_watcher.watch_project("repo", proj_path)
+    assert not proj_watcher.poll()
+
+    git(proj_path, "init", "-q")
+    assert proj_watcher.poll().projects == {"repo"}
+    proj_watcher.poll()
+
+    git(proj_path, "checkout", "-q", "-b", "dev")
+    assert proj_watcher.poll().projects == {"repo"}
+
+
+def test_recreated_project(proj_watcher, make_repo):
+    repo = make_repo(name="projects/repo")
+    proj_watcher.watch_project("repo", repo)
+    shutil.rmtree(repo)
+    assert "repo" in proj_watcher.poll().projects
+
+    make_repo(name="projects/repo")
+    assert proj_watcher.poll().projects == {"repo"}
+    proj_watcher.poll()
+
+    git(repo, "branch", "feature/new")
+    assert proj_watcher.poll().projects == {"repo"}
+
+
+def test_missing_root(proj_watcher, tmp_path):
+    root = tmp_path / "projects"
+    proj_watcher.watch_root("projects", root)
+    assert not proj_watcher.poll()
+
+    (root / "new").mkdir(parents=True)
+    assert proj_watcher.poll().added == {"projects": {"new"}}
+    assert not proj_watcher.poll()
+
+    (root / "other").mkdir()
+    assert proj_watcher.poll().added == {"projects": {"other"}}